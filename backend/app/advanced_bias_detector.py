@@ -3,104 +3,202 @@ import torch
 from transformers import AutoTokenizer, AutoModel, pipeline
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
-from textstat import flesch_reading_ease, flesch_kincaid_grade
-import networkx as nx
 from collections import Counter, defaultdict
+from dataclasses import asdict
 from typing import List, Dict, Tuple, Any, Optional
+import os
 import re
-from dataclasses import dataclass
-from scipy import stats
-import pandas as pd
 
-from .models import BiasType, BiasAnalysis
+from .models import BiasType, BiasAnalysis, DetectorMode
+# Features e análises ficam em tabela colunar (importadas também daqui)
+from .segment_table import (
+    SemanticFeatures, SyntacticFeatures, AdvancedBiasAnalysis, SegmentTable, SegmentTableBuilder, BIAS_TYPES
+)
+from .utils import token_windows
+from .model_registry import ModelRegistry
+from .inference_batcher import InferenceBatcher
+from .inference_backends import INFERENCE_BACKEND, build_backend
+from .metrics import count_segments, stage, timed
+from . import tracing
 
-@dataclass
-class SemanticFeatures:
-    """Características semânticas de um texto"""
-    sentiment_polarity: float
-    sentiment_confidence: float
-    subjectivity_score: float
-    emotional_intensity: float
-    certainty_level: float
-    formality_score: float
+# Componentes do pipeline spaCy que o detector não usa (NER, por padrão)
+SPACY_EXCLUDE = [c.strip() for c in os.getenv("SPACY_EXCLUDE", "ner").split(",") if c.strip()]
+# Vetores estáticos do spaCy: auto (descarta se nenhum componente os usa), keep ou drop
+SPACY_VECTORS = os.getenv("SPACY_VECTORS", "auto").lower()
 
-@dataclass
-class SyntacticFeatures:
-    """Características sintáticas de um texto"""
-    dependency_complexity: float
-    pos_diversity: float
-    modal_verb_ratio: float
-    passive_voice_ratio: float
-    hedge_word_ratio: float
-    intensifier_ratio: float
+# Sobreposição (tokens) entre janelas de textos maiores que o limite dos transformers
+WINDOW_OVERLAP_TOKENS = int(os.getenv("WINDOW_OVERLAP_TOKENS", "128"))
 
-@dataclass
-class AdvancedBiasAnalysis:
-    """Análise avançada de viés com múltiplas dimensões"""
-    text_segment: str
-    start_pos: int
-    end_pos: int
-    bias_types: List[BiasType]
-    confidence_scores: Dict[BiasType, float]
-    semantic_features: SemanticFeatures
-    syntactic_features: SyntacticFeatures
-    explanation: str
-    evidence: Dict[str, Any]
-    reformulation_suggestions: List[str]
-    overall_bias_score: float
+SENTIMENT_MODEL_NAME = "cardiffnlp/twitter-xlm-roberta-base-sentiment"
+
+# Texto curto usado para aquecer os modelos logo após o carregamento
+WARMUP_TEXT = "O governo anunciou ontem novas medidas econômicas para o país."
+
+def _uses_static_vectors(config) -> bool:
+    """Se algum componente do pipeline usa os vetores estáticos como feature"""
+    if isinstance(config, dict):
+        return any(
+            (key == "include_static_vectors" and value is True) or _uses_static_vectors(value)
+            for key, value in config.items()
+        )
+    if isinstance(config, (list, tuple)):
+        return any(_uses_static_vectors(item) for item in config)
+    return False
 
 class AdvancedBiasDetector:
-    def __init__(self):
-        self._initialize_models()
+    # Modelos carregados pelo detector, na ordem de carregamento
+    MODEL_NAMES = ("spacy", "sentiment", "bert")
+    
+    def __init__(self, load_models: bool = True, registry: Optional[ModelRegistry] = None,
+                 inference_backend: str = INFERENCE_BACKEND):
+        # Os modelos vivem no registro, que os carrega sob demanda e pode
+        # descarregá-los quando ociosos; os atributos abaixo leem dele
+        self.models = registry or ModelRegistry()
+        self.models.register("spacy", self._load_spacy_model, self._warmup_spacy)
+        self.models.register("sentiment", self._load_sentiment_model, self._warmup_sentiment)
+        self.models.register("bert", self._load_bert_model, self._warmup_bert)
+        self.bert_model_name = None
+        # Backend pedido e o efetivamente usado por modelo (torch, quantized, onnx)
+        self.inference_backend = inference_backend
+        self.inference_backends = {}
+        
+        # Inferência agrupada entre requisições concorrentes
+        self.sentiment_batcher = InferenceBatcher("sentiment", self._sentiment_batch)
+        self.bert_batcher = InferenceBatcher("bert", self._bert_embedding_batch)
+        
         self._load_bias_lexicons()
         self._setup_semantic_analyzers()
         
+        # Com load_models=False os modelos são carregados depois via load_model
+        if load_models:
+            self._initialize_models()
+        
     def _initialize_models(self):
         """Inicializa todos os modelos necessários"""
+        for name in self.MODEL_NAMES:
+            self.load_model(name)
+    
+    def load_model(self, name: str, warmup: bool = True):
+        """Carrega (e aquece) um modelo pelo nome"""
+        return self.models.load(name, warmup=warmup)
+    
+    @property
+    def model_status(self) -> Dict[str, Dict[str, Any]]:
+        """Estado, tempo de carregamento e memória de cada modelo"""
+        return self.models.status()
+    
+    def inference_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Fila e tamanhos de lote dos modelos com inferência agrupada"""
+        return {
+            "sentiment": self.sentiment_batcher.stats(),
+            "bert": self.bert_batcher.stats(),
+        }
+    
+    @property
+    def nlp(self):
+        return self.models.get("spacy")
+    
+    @property
+    def sentiment_analyzer(self):
+        return self.models.get("sentiment")
+    
+    @property
+    def bert_tokenizer(self):
+        bert = self.models.get("bert")
+        return bert[0] if bert else None
+    
+    @property
+    def bert_model(self):
+        bert = self.models.get("bert")
+        return bert[1] if bert else None
+    
+    def _load_spacy_model(self):
+        """Carrega o spaCy português (lg, com fallback para sm) sem os componentes
+        não usados pelo detector"""
         try:
-            # spaCy para análise sintática e NER
-            self.nlp = spacy.load("pt_core_news_lg")
+            # spaCy para análise sintática (morfologia, dependências e lemas)
+            nlp = spacy.load("pt_core_news_lg", exclude=SPACY_EXCLUDE)
             print("✓ spaCy modelo português carregado")
         except OSError:
             print("⚠️ Modelo spaCy pt_core_news_lg não encontrado. Tentando modelo básico...")
             try:
-                self.nlp = spacy.load("pt_core_news_sm")
+                nlp = spacy.load("pt_core_news_sm", exclude=SPACY_EXCLUDE)
                 print("✓ spaCy modelo básico carregado")
             except OSError:
                 print("❌ Nenhum modelo spaCy português encontrado")
-                self.nlp = None
-        
+                return None
+        self._trim_spacy_vectors(nlp)
+        return nlp
+    
+    @staticmethod
+    def _trim_spacy_vectors(nlp):
+        """Descarta os vetores estáticos quando nenhum componente os usa"""
+        if SPACY_VECTORS == "keep" or nlp.vocab.vectors.shape[0] == 0:
+            return
+        if SPACY_VECTORS == "auto" and _uses_static_vectors(nlp.config):
+            return
+        nlp.vocab.reset_vectors(shape=(0, 0))
+        print("✓ Vetores estáticos do spaCy descartados")
+    
+    def _load_bert_model(self):
+        """Carrega o BERT português (com fallback para o multilingual)"""
         # BERT multilingual para embeddings contextuais
         self.bert_model_name = "neuralmind/bert-base-portuguese-cased"
         try:
-            self.bert_tokenizer = AutoTokenizer.from_pretrained(self.bert_model_name)
-            self.bert_model = AutoModel.from_pretrained(self.bert_model_name)
+            tokenizer = AutoTokenizer.from_pretrained(self.bert_model_name)
+            model = AutoModel.from_pretrained(self.bert_model_name)
             print("✓ BERT português carregado")
         except Exception as e:
             print(f"⚠️ Erro ao carregar BERT português: {e}. Usando modelo multilingual...")
             self.bert_model_name = "bert-base-multilingual-cased"
             try:
-                self.bert_tokenizer = AutoTokenizer.from_pretrained(self.bert_model_name)
-                self.bert_model = AutoModel.from_pretrained(self.bert_model_name)
+                tokenizer = AutoTokenizer.from_pretrained(self.bert_model_name)
+                model = AutoModel.from_pretrained(self.bert_model_name)
                 print("✓ BERT multilingual carregado")
             except Exception as e2:
                 print(f"❌ Erro ao carregar BERT: {e2}")
-                self.bert_tokenizer = None
-                self.bert_model = None
-        
+                return None
+        model.eval()
+        model, self.inference_backends["bert"] = build_backend(
+            model, tokenizer, self.inference_backend, self.bert_model_name
+        )
+        return tokenizer, model
+    
+    def _load_sentiment_model(self):
+        """Carrega o pipeline de análise de sentimento"""
         # Pipeline de análise de sentimento
         try:
-            self.sentiment_analyzer = pipeline(
+            sentiment_analyzer = pipeline(
                 "sentiment-analysis",
-                model="cardiffnlp/twitter-xlm-roberta-base-sentiment",
-                tokenizer="cardiffnlp/twitter-xlm-roberta-base-sentiment",
+                model=SENTIMENT_MODEL_NAME,
+                tokenizer=SENTIMENT_MODEL_NAME,
                 device=-1  # CPU
             )
+            # O pipeline só chama model(**inputs) e lê .logits, então o modelo
+            # pode ser trocado pelo do backend escolhido
+            sentiment_analyzer.model, self.inference_backends["sentiment"] = build_backend(
+                sentiment_analyzer.model, sentiment_analyzer.tokenizer, self.inference_backend,
+                SENTIMENT_MODEL_NAME, output="logits"
+            )
             print("✓ Analisador de sentimento carregado")
+            return sentiment_analyzer
         except Exception as e:
             print(f"⚠️ Erro ao carregar sentiment analyzer: {e}")
-            self.sentiment_analyzer = None
+            return None
+    
+    @staticmethod
+    def _warmup_spacy(nlp):
+        list(nlp(WARMUP_TEXT).sents)
+    
+    @staticmethod
+    def _warmup_sentiment(sentiment_analyzer):
+        sentiment_analyzer(WARMUP_TEXT)
+    
+    @staticmethod
+    def _warmup_bert(bert):
+        tokenizer, model = bert
+        with torch.no_grad():
+            model(**tokenizer(WARMUP_TEXT, return_tensors="pt"))
     
     def _load_bias_lexicons(self):
         """Carrega léxicos especializados para detecção de viés"""
@@ -200,33 +298,157 @@ class AdvancedBiasDetector:
         """Obtém embeddings BERT para lista de textos"""
         if not self.bert_tokenizer or not self.bert_model:
             return np.array([])
-            
-        embeddings = []
         
+        # As sentenças entram na fila compartilhada e são processadas em lotes
+        # junto com as de outras requisições
+        with tracing.span("bert.embeddings", texts=len(texts)):
+            embeddings = self.bert_batcher.map(texts)
+        return np.array(embeddings) if embeddings else np.array([])
+    
+    @staticmethod
+    def _window_size(tokenizer) -> int:
+        """Tokens de conteúdo por janela (limite do modelo menos os especiais)"""
+        max_length = min(getattr(tokenizer, "model_max_length", 512) or 512, 512)
+        return max_length - tokenizer.num_special_tokens_to_add()
+    
+    @timed("bert")
+    def _bert_embedding_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Embeddings BERT de um lote de textos (média dos tokens de conteúdo).
+        
+        Textos maiores que o limite do modelo são cobertos por janelas
+        sobrepostas; cada token entra na média uma vez (nas sobreposições, a
+        média das janelas que o contêm), em vez de o texto ser truncado."""
+        bert = self.models.get("bert")
+        if bert is None:
+            return [np.zeros(768) for _ in texts]
+        tokenizer, model = bert
+        
+        try:
+            return self._pooled_embeddings(tokenizer, model, texts)
+        except Exception as e:
+            print(f"Erro ao obter embeddings em lote: {e}")
+        
+        # Texto a texto, com as mesmas janelas (sem truncar em 512 tokens)
+        embeddings = []
         for text in texts:
             try:
-                # Tokeniza o texto
-                inputs = self.bert_tokenizer(
-                    text, 
-                    return_tensors="pt", 
-                    truncation=True, 
-                    padding=True, 
-                    max_length=512
-                )
-                
-                # Obtém embeddings
-                with torch.no_grad():
-                    outputs = self.bert_model(**inputs)
-                    # Usa a média dos tokens como embedding da sentença
-                    embedding = outputs.last_hidden_state.mean(dim=1).squeeze().numpy()
-                    embeddings.append(embedding)
+                embeddings.extend(self._pooled_embeddings(tokenizer, model, [text]))
             except Exception as e:
                 print(f"Erro ao obter embedding: {e}")
                 # Fallback: embedding zero
                 embeddings.append(np.zeros(768))
+        return embeddings
+    
+    def _pooled_embeddings(self, tokenizer, model, texts: List[str]) -> List[np.ndarray]:
+        """Média dos tokens de conteúdo de cada texto ([CLS]/[SEP] e padding
+        ficam fora), calculada sobre as janelas que cobrem o texto"""
+        window = self._window_size(tokenizer)
+        token_ids = tokenizer(texts, add_special_tokens=False, verbose=False)["input_ids"]
+        windows, owners = [], []
+        # Quantas janelas cobrem cada token (peso de cada token na média)
+        coverage = [np.zeros(len(ids)) for ids in token_ids]
+        for index, ids in enumerate(token_ids):
+            for start, end in token_windows(len(ids), window, WINDOW_OVERLAP_TOKENS):
+                windows.append(tokenizer.build_inputs_with_special_tokens(ids[start:end]))
+                owners.append((index, start, end))
+                coverage[index][start:end] += 1
+        
+        sums = {}
+        # Um forward por grupo de até max_batch_size janelas: a memória não
+        # cresce com o tamanho do texto (as janelas de um lote são alinhadas)
+        step = self.bert_batcher.max_batch_size
+        with tracing.span("bert.forward", texts=len(texts), windows=len(windows),
+                          tokens=sum(len(window_ids) for window_ids in windows)):
+            for first in range(0, len(windows), step):
+                inputs = tokenizer.pad({"input_ids": windows[first:first + step]}, return_tensors="pt")
+                if "token_type_ids" in tokenizer.model_input_names:
+                    inputs["token_type_ids"] = torch.zeros_like(inputs["input_ids"])
+                with torch.no_grad():
+                    hidden = model(**inputs).last_hidden_state.numpy()
+                
+                for row, (index, start, end) in enumerate(owners[first:first + step], start=first):
+                    if end == start:
+                        continue
+                    # Primeira posição de conteúdo da janela (após os tokens especiais iniciais)
+                    offset = tokenizer.get_special_tokens_mask(windows[row], already_has_special_tokens=True).index(0)
+                    weighted = hidden[row - first, offset:offset + end - start] / coverage[index][start:end, None]
+                    sums[index] = sums.get(index, 0) + weighted.sum(axis=0)
+        # Textos sem tokens de conteúdo ficam com embedding zero
+        return [sums[index] / len(ids) if index in sums else np.zeros(model.config.hidden_size)
+                for index, ids in enumerate(token_ids)]
+    
+    def _text_windows(self, tokenizer, text: str) -> List[Tuple[str, int]]:
+        """Trechos do texto (com o número de tokens de cada um) que cabem no
+        limite do modelo, usando os offsets dos tokens para cortar o texto"""
+        window = self._window_size(tokenizer)
+        encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+        offsets = encoding["offset_mapping"]
+        if len(offsets) <= window:
+            return [(text, len(offsets))]
+        return [
+            (text[offsets[start][0]:offsets[end - 1][1]], end - start)
+            for start, end in token_windows(len(offsets), window, WINDOW_OVERLAP_TOKENS)
+        ]
+    
+    @timed("sentiment")
+    def _sentiment_batch(self, texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Sentimento de um lote de textos (None para os que falharem).
         
-        return np.array(embeddings) if embeddings else np.array([])
+        Textos longos são avaliados em janelas sobrepostas e as probabilidades
+        de cada rótulo são combinadas pela média ponderada pelo número de tokens."""
+        sentiment_analyzer = self.models.get("sentiment")
+        if sentiment_analyzer is None:
+            return [None] * len(texts)
+        
+        try:
+            pieces = [
+                (index, piece, weight)
+                for index, text in enumerate(texts)
+                for piece, weight in self._text_windows(sentiment_analyzer.tokenizer, text)
+            ]
+            with tracing.span("sentiment.forward", texts=len(texts), windows=len(pieces),
+                              tokens=sum(weight for _, _, weight in pieces)):
+                # Lotes de até max_batch_size janelas por forward, qualquer que seja o tamanho do texto
+                outputs = sentiment_analyzer(
+                    [piece for _, piece, _ in pieces], top_k=None, truncation=True,
+                    batch_size=max(1, min(len(pieces), self.sentiment_batcher.max_batch_size))
+                )
+            return self._pool_sentiment(len(texts), pieces, outputs)
+        except Exception as e:
+            print(f"Erro na análise de sentimento em lote: {e}")
+        
+        # Refaz item a item para que um texto problemático não derrube o lote
+        results = []
+        for text in texts:
+            try:
+                pieces = [(0, piece, weight) for piece, weight in self._text_windows(sentiment_analyzer.tokenizer, text)]
+                outputs = sentiment_analyzer([piece for _, piece, _ in pieces], top_k=None, truncation=True)
+                results.append(self._pool_sentiment(1, pieces, outputs)[0])
+            except Exception as e:
+                print(f"Erro na análise de sentimento: {e}")
+                results.append(None)
+        return results
+    
+    @staticmethod
+    def _pool_sentiment(count: int, pieces, outputs) -> List[Optional[Dict[str, Any]]]:
+        """Combina as probabilidades das janelas de cada texto no rótulo final"""
+        totals = [defaultdict(float) for _ in range(count)]
+        weights = [0] * count
+        for (index, _, weight), scores in zip(pieces, outputs):
+            weight = max(weight, 1)
+            for score in scores:
+                totals[index][score['label']] += score['score'] * weight
+            weights[index] += weight
+        results = []
+        for total, weight in zip(totals, weights):
+            if not total:
+                results.append(None)
+                continue
+            label, score = max(total.items(), key=lambda item: item[1])
+            results.append({'label': label, 'score': score / weight})
+        return results
     
+    @tracing.traced("advanced.semantic_features", lambda self, text: {"chars": len(text)})
     def analyze_semantic_features(self, text: str) -> SemanticFeatures:
         """Analisa características semânticas do texto"""
         
@@ -235,15 +457,17 @@ class AdvancedBiasDetector:
         sentiment_conf = 0.0
         if self.sentiment_analyzer:
             try:
-                result = self.sentiment_analyzer(text)[0]
-                sentiment_score = result['score'] if result['label'] == 'POSITIVE' else -result['score']
-                sentiment_conf = result['score']
+                # None quando a inferência do trecho falhou (já registrado no lote)
+                result = self.sentiment_batcher(text)
+                if result is not None:
+                    sentiment_score = result['score'] if result['label'] == 'POSITIVE' else -result['score']
+                    sentiment_conf = result['score']
             except Exception as e:
                 print(f"Erro na análise de sentimento: {e}")
         
         # Subjetividade baseada em marcadores linguísticos
         if self.nlp:
-            doc = self.nlp(text)
+            doc = self._parse(text)
             
             # Contagem de marcadores subjetivos (expandida)
             subjective_markers = 0
@@ -307,12 +531,13 @@ class AdvancedBiasDetector:
             formality_score=formality
         )
     
+    @tracing.traced("advanced.syntactic_features", lambda self, text: {"chars": len(text)})
     def analyze_syntactic_features(self, text: str) -> SyntacticFeatures:
         """Analisa características sintáticas do texto"""
         if not self.nlp:
             return SyntacticFeatures(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
             
-        doc = self.nlp(text)
+        doc = self._parse(text)
         
         # Complexidade das dependências
         dep_depths = []
@@ -384,13 +609,14 @@ class AdvancedBiasDetector:
         
         return formal_markers / total_markers
     
+    @tracing.traced("advanced.semantic_bias", lambda self, text: {"chars": len(text)})
     def detect_semantic_bias(self, text: str) -> Dict[BiasType, float]:
         """Detecta viés usando análise semântica avançada"""
         bias_scores = defaultdict(float)
         
         # Análise com BERT embeddings (se disponível)
         if self.nlp:
-            sentences = [sent.text for sent in self.nlp(text).sents]
+            sentences = [sent.text for sent in self._parse(text).sents]
             if len(sentences) > 1:
                 embeddings = self.get_bert_embeddings(sentences)
                 if embeddings.size > 0:
@@ -437,79 +663,73 @@ class AdvancedBiasDetector:
         
         return dict(bias_scores)
     
-    def analyze_text_advanced(self, content: str) -> List[AdvancedBiasAnalysis]:
+    def analyze_text_advanced(self, content: str) -> SegmentTable:
         """Análise avançada completa do texto"""
         if not self.nlp:
             print("❌ spaCy não disponível, usando análise básica")
-            return []
-            
-        doc = self.nlp(content)
-        analyses = []
+            return SegmentTable()
         
         # Analisa por sentenças
-        segments = list(doc.sents)
+        return self.analyze_spans_advanced(content, self.sentence_spans(content))
+    
+    def _parse(self, text: str):
+        """Processa o texto com o spaCy (tempo medido na etapa spacy_parse)"""
+        with stage("spacy_parse"), tracing.span("spacy.parse", chars=len(text)):
+            return self.nlp(text)
+    
+    def sentence_spans(self, content: str) -> List[Tuple[int, int]]:
+        """Sentenças do texto como [início, fim) segundo o spaCy"""
+        doc = self._parse(content)
+        return [(segment.start_char, segment.end_char) for segment in doc.sents]
+    
+    @tracing.traced("advanced.analyze_spans", lambda self, content, spans: {"segments": len(spans)})
+    def analyze_spans_advanced(self, content: str, spans: List[Tuple[int, int]]) -> SegmentTable:
+        """Análise avançada apenas dos trechos [início, fim) indicados, p.ex. os
+        sinalizados por um detector mais barato no modo cascata"""
+        count_segments(DetectorMode.ADVANCED.value, len(spans))
+        builder = SegmentTableBuilder(explainer=self)
+        for start_pos, end_pos in spans:
+            row = self._analyze_segment(content[start_pos:end_pos].strip(), start_pos, end_pos)
+            if row is not None:
+                builder.add(*row)
+        return builder.build()
+    
+    @tracing.traced("advanced.segment", lambda self, segment_text, start_pos, end_pos: {
+        "start_pos": start_pos, "end_pos": end_pos, "chars": len(segment_text)})
+    def _analyze_segment(self, segment_text: str, start_pos: int, end_pos: int) -> Optional[tuple]:
+        """Análise avançada de um segmento: os campos de uma linha da
+        SegmentTable, ou None se curto demais ou sem viés significativo"""
+        if len(segment_text) < 20:  # Pula segmentos muito curtos
+            return None
         
-        for segment in segments:
-            segment_text = segment.text.strip()
-            if len(segment_text) < 20:  # Pula segmentos muito curtos
-                continue
-            
-            start_pos = segment.start_char
-            end_pos = segment.end_char
-            
-            # Análises semânticas
-            semantic_features = self.analyze_semantic_features(segment_text)
-            
-            # Análises sintáticas
-            syntactic_features = self.analyze_syntactic_features(segment_text)
-            
-            # Detecção de viés multi-dimensional
-            bias_scores = self.detect_semantic_bias(segment_text)
-            
-            # Detecção baseada em features
-            feature_bias = self._detect_feature_based_bias(semantic_features, syntactic_features)
-            
-            # Combina scores
-            for bias_type, score in feature_bias.items():
-                bias_scores[bias_type] = max(bias_scores.get(bias_type, 0), score)
-            
-            # Filtra vieses significativos (threshold reduzido para detectar mais viéses sutis)
-            significant_biases = {k: v for k, v in bias_scores.items() if v > 0.15}
-            
-            if significant_biases:
-                # Calcula score geral
-                overall_score = np.mean(list(significant_biases.values()))
-                
-                # Gera explicação detalhada
-                explanation = self._generate_detailed_explanation(
-                    segment_text, significant_biases, semantic_features, syntactic_features
-                )
-                
-                # Coleta evidências
-                evidence = self._collect_evidence(segment_text, significant_biases)
-                
-                # Gera sugestões de reformulação
-                suggestions = self._generate_reformulation_suggestions(
-                    segment_text, significant_biases, semantic_features
-                )
-                
-                analysis = AdvancedBiasAnalysis(
-                    text_segment=segment_text,
-                    start_pos=start_pos,
-                    end_pos=end_pos,
-                    bias_types=list(significant_biases.keys()),
-                    confidence_scores=significant_biases,
-                    semantic_features=semantic_features,
-                    syntactic_features=syntactic_features,
-                    explanation=explanation,
-                    evidence=evidence,
-                    reformulation_suggestions=suggestions,
-                    overall_bias_score=overall_score
-                )
-                
-                analyses.append(analysis)
+        # Análises semânticas
+        semantic_features = self.analyze_semantic_features(segment_text)
+        
+        # Análises sintáticas
+        syntactic_features = self.analyze_syntactic_features(segment_text)
+        
+        # Detecção de viés multi-dimensional
+        bias_scores = self.detect_semantic_bias(segment_text)
+        
+        # Detecção baseada em features
+        feature_bias = self._detect_feature_based_bias(semantic_features, syntactic_features)
+        
+        # Combina scores
+        for bias_type, score in feature_bias.items():
+            bias_scores[bias_type] = max(bias_scores.get(bias_type, 0), score)
         
-        return analyses
+        # Filtra vieses significativos (threshold reduzido para detectar mais viéses sutis)
+        significant_biases = {k: v for k, v in bias_scores.items() if v > 0.15}
+        
+        if not significant_biases:
+            return None
+        
+        # Calcula score geral
+        overall_score = np.mean(list(significant_biases.values()))
+        
+        # Explicação, evidências e sugestões são geradas pela tabela sob demanda
+        return (segment_text, start_pos, end_pos, significant_biases, semantic_features, syntactic_features,
+                overall_score)
     
     def _detect_feature_based_bias(self, semantic: SemanticFeatures, syntactic: SyntacticFeatures) -> Dict[BiasType, float]:
         """Detecta viés baseado em features semânticas e sintáticas"""
@@ -540,39 +760,42 @@ class AdvancedBiasDetector:
     def _generate_detailed_explanation(self, text: str, biases: Dict[BiasType, float], 
                                      semantic: SemanticFeatures, syntactic: SyntacticFeatures) -> str:
         """Gera explicação detalhada da análise"""
-        explanations = []
-        
-        for bias_type, score in biases.items():
-            if bias_type == BiasType.LOADED_LANGUAGE:
-                explanations.append(
-                    f"Linguagem carregada detectada (confiança: {score:.2f}). "
-                    f"O texto apresenta certeza elevada ({semantic.certainty_level:.2f}) "
-                    f"combinada com intensidade emocional ({semantic.emotional_intensity:.2f})."
-                )
-            elif bias_type == BiasType.SUBJECTIVE_TERMS:
-                explanations.append(
-                    f"Termos subjetivos identificados (confiança: {score:.2f}). "
-                    f"Score de subjetividade: {semantic.subjectivity_score:.2f}. "
-                    f"Uso de hedge words: {syntactic.hedge_word_ratio:.2f}."
-                )
-            elif bias_type == BiasType.EMOTIONAL_LANGUAGE:
-                explanations.append(
-                    f"Linguagem emocional detectada (confiança: {score:.2f}). "
-                    f"Intensidade emocional: {semantic.emotional_intensity:.2f}. "
-                    f"Polaridade do sentimento: {semantic.sentiment_polarity:.2f}."
-                )
-            elif bias_type == BiasType.OPINION_AS_FACT:
-                explanations.append(
-                    f"Opinião apresentada como fato (confiança: {score:.2f}). "
-                    f"Baixa formalidade ({semantic.formality_score:.2f}) com alta certeza ({semantic.certainty_level:.2f})."
-                )
-            elif bias_type == BiasType.MISSING_COUNTERPOINT:
-                explanations.append(
-                    f"Ausência de contrapontos detectada (confiança: {score:.2f}). "
-                    f"Baixa diversidade sintática ({syntactic.pos_diversity:.2f}) e alta certeza."
-                )
-        
-        return " ".join(explanations)
+        features = {**asdict(semantic), **asdict(syntactic)}
+        explanations = [self._explain_bias(bias_type, score, features) for bias_type, score in biases.items()]
+        return " ".join(explanation for explanation in explanations if explanation)
+    
+    def _explain_bias(self, bias_type: BiasType, score: float, features: Dict[str, float]) -> str:
+        """Explicação de um tipo de viés a partir das features do segmento
+        (nomes dos campos de SemanticFeatures e SyntacticFeatures)"""
+        if bias_type == BiasType.LOADED_LANGUAGE:
+            return (
+                f"Linguagem carregada detectada (confiança: {score:.2f}). "
+                f"O texto apresenta certeza elevada ({features['certainty_level']:.2f}) "
+                f"combinada com intensidade emocional ({features['emotional_intensity']:.2f})."
+            )
+        if bias_type == BiasType.SUBJECTIVE_TERMS:
+            return (
+                f"Termos subjetivos identificados (confiança: {score:.2f}). "
+                f"Score de subjetividade: {features['subjectivity_score']:.2f}. "
+                f"Uso de hedge words: {features['hedge_word_ratio']:.2f}."
+            )
+        if bias_type == BiasType.EMOTIONAL_LANGUAGE:
+            return (
+                f"Linguagem emocional detectada (confiança: {score:.2f}). "
+                f"Intensidade emocional: {features['emotional_intensity']:.2f}. "
+                f"Polaridade do sentimento: {features['sentiment_polarity']:.2f}."
+            )
+        if bias_type == BiasType.OPINION_AS_FACT:
+            return (
+                f"Opinião apresentada como fato (confiança: {score:.2f}). "
+                f"Baixa formalidade ({features['formality_score']:.2f}) com alta certeza ({features['certainty_level']:.2f})."
+            )
+        if bias_type == BiasType.MISSING_COUNTERPOINT:
+            return (
+                f"Ausência de contrapontos detectada (confiança: {score:.2f}). "
+                f"Baixa diversidade sintática ({features['pos_diversity']:.2f}) e alta certeza."
+            )
+        return ""
     
     def _collect_evidence(self, text: str, biases: Dict[BiasType, float]) -> Dict[str, Any]:
         """Coleta evidências específicas do viés detectado"""
@@ -635,33 +858,31 @@ class AdvancedBiasDetector:
         
         return suggestions
 
-    def generate_comprehensive_report(self, analyses: List[AdvancedBiasAnalysis]) -> Dict[str, Any]:
+    def generate_comprehensive_report(self, analyses) -> Dict[str, Any]:
         """Gera relatório abrangente da análise"""
-        if not analyses:
+        if not len(analyses):
             return {"status": "no_bias_detected", "summary": "Nenhum viés significativo detectado"}
         
-        # Estatísticas gerais
-        total_segments = len(analyses)
-        bias_type_counts = Counter()
-        confidence_scores = []
+        table = SegmentTable.from_analyses(analyses)
         
-        for analysis in analyses:
-            for bias_type in analysis.bias_types:
-                bias_type_counts[bias_type] += 1
-            confidence_scores.extend(analysis.confidence_scores.values())
+        # Estatísticas gerais
+        total_segments = len(table)
+        counts = table.bias_counts()
+        most_common = int(counts.argmax())
         
         # Métricas agregadas
-        avg_confidence = np.mean(confidence_scores)
-        semantic_features_avg = self._aggregate_semantic_features(analyses)
-        syntactic_features_avg = self._aggregate_syntactic_features(analyses)
+        avg_confidence = float(table.confidence[table.bias_mask].mean())
+        semantic_features_avg = self._aggregate_semantic_features(table)
+        syntactic_features_avg = self._aggregate_syntactic_features(table)
+        top = table.top(5)  # Top 5 para o resumo
         
         report = {
             "summary": {
                 "total_biased_segments": total_segments,
                 "average_confidence": avg_confidence,
-                "most_common_bias": bias_type_counts.most_common(1)[0] if bias_type_counts else None
+                "most_common_bias": (BIAS_TYPES[most_common], int(counts[most_common])) if counts.any() else None
             },
-            "bias_distribution": dict(bias_type_counts),
+            "bias_distribution": {BIAS_TYPES[i]: int(counts[i]) for i in np.flatnonzero(counts)},
             "semantic_profile": semantic_features_avg,
             "syntactic_profile": syntactic_features_avg,
             "detailed_analyses": [
@@ -671,55 +892,58 @@ class AdvancedBiasDetector:
                     "overall_score": analysis.overall_bias_score,
                     "explanation": analysis.explanation
                 }
-                for analysis in analyses[:5]  # Top 5 para o resumo
+                for analysis in top
             ],
-            "recommendations": self._generate_comprehensive_recommendations(analyses)
+            "recommendations": self._generate_comprehensive_recommendations(table)
         }
         
         return report
     
-    def _aggregate_semantic_features(self, analyses: List[AdvancedBiasAnalysis]) -> Dict[str, float]:
+    def _aggregate_semantic_features(self, table: SegmentTable) -> Dict[str, float]:
         """Agrega features semânticas"""
-        features = [a.semantic_features for a in analyses]
+        means = table.mean(("sentiment_polarity", "subjectivity_score", "emotional_intensity",
+                            "certainty_level", "formality_score"))
         return {
-            "avg_sentiment_polarity": np.mean([f.sentiment_polarity for f in features]),
-            "avg_subjectivity": np.mean([f.subjectivity_score for f in features]),
-            "avg_emotional_intensity": np.mean([f.emotional_intensity for f in features]),
-            "avg_certainty_level": np.mean([f.certainty_level for f in features]),
-            "avg_formality": np.mean([f.formality_score for f in features])
+            "avg_sentiment_polarity": means["sentiment_polarity"],
+            "avg_subjectivity": means["subjectivity_score"],
+            "avg_emotional_intensity": means["emotional_intensity"],
+            "avg_certainty_level": means["certainty_level"],
+            "avg_formality": means["formality_score"]
         }
     
-    def _aggregate_syntactic_features(self, analyses: List[AdvancedBiasAnalysis]) -> Dict[str, float]:
+    def _aggregate_syntactic_features(self, table: SegmentTable) -> Dict[str, float]:
         """Agrega features sintáticas"""
-        features = [a.syntactic_features for a in analyses]
+        means = table.mean(("dependency_complexity", "pos_diversity", "modal_verb_ratio",
+                            "passive_voice_ratio", "hedge_word_ratio"))
         return {
-            "avg_dependency_complexity": np.mean([f.dependency_complexity for f in features]),
-            "avg_pos_diversity": np.mean([f.pos_diversity for f in features]),
-            "avg_modal_ratio": np.mean([f.modal_verb_ratio for f in features]),
-            "avg_passive_ratio": np.mean([f.passive_voice_ratio for f in features]),
-            "avg_hedge_ratio": np.mean([f.hedge_word_ratio for f in features])
+            "avg_dependency_complexity": means["dependency_complexity"],
+            "avg_pos_diversity": means["pos_diversity"],
+            "avg_modal_ratio": means["modal_verb_ratio"],
+            "avg_passive_ratio": means["passive_voice_ratio"],
+            "avg_hedge_ratio": means["hedge_word_ratio"]
         }
     
-    def _generate_comprehensive_recommendations(self, analyses: List[AdvancedBiasAnalysis]) -> List[str]:
+    def _generate_comprehensive_recommendations(self, table: SegmentTable) -> List[str]:
         """Gera recomendações abrangentes"""
         recommendations = []
+        rows = table.rows
         
         # Analisa padrões gerais
-        high_certainty_count = sum(1 for a in analyses if a.semantic_features.certainty_level > 0.7)
-        high_emotion_count = sum(1 for a in analyses if a.semantic_features.emotional_intensity > 0.6)
-        low_formality_count = sum(1 for a in analyses if a.semantic_features.formality_score < 0.3)
+        high_certainty_count = np.count_nonzero(rows["certainty_level"] > 0.7)
+        high_emotion_count = np.count_nonzero(rows["emotional_intensity"] > 0.6)
+        low_formality_count = np.count_nonzero(rows["formality_score"] < 0.3)
         
-        if high_certainty_count > len(analyses) * 0.3:
+        if high_certainty_count > len(table) * 0.3:
             recommendations.append(
                 "Reduza afirmações categóricas excessivas adicionando qualificadores e referências a fontes"
             )
         
-        if high_emotion_count > len(analyses) * 0.2:
+        if high_emotion_count > len(table) * 0.2:
             recommendations.append(
                 "Substitua linguagem emocionalmente carregada por termos mais técnicos e neutros"
             )
         
-        if low_formality_count > len(analyses) * 0.4:
+        if low_formality_count > len(table) * 0.4:
             recommendations.append(
                 "Aumente o registro formal do texto para melhorar a credibilidade acadêmica"
             )
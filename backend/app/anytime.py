@@ -0,0 +1,227 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+from .inference_batcher import inference_executor
+from .models import BiasRecord
+from .shared_store import SharedStore, shared_store
+
+# Tempo (s) que uma análise em segundo plano fica disponível após o último acesso
+ANYTIME_JOB_TTL_SECONDS = float(os.getenv("ANYTIME_JOB_TTL_SECONDS", "600"))
+# Máximo de análises em segundo plano guardadas (as mais antigas são descartadas)
+ANYTIME_MAX_JOBS = int(os.getenv("ANYTIME_MAX_JOBS", "100"))
+
+def prioritize_spans(spans: List[Tuple[int, int]], candidates: List[BiasRecord]) -> List[Tuple[int, int]]:
+    """Ordena os trechos pelo maior score das análises baseadas em regras que
+    começam neles (decrescente); empates mantêm a ordem do texto"""
+    starts = [begin for begin, _ in spans]
+    scores = [0.0] * len(spans)
+    for analysis in candidates:
+        index = bisect.bisect_right(starts, analysis.posicao_inicio) - 1
+        if index >= 0:
+            scores[index] = max(scores[index], analysis.confianca)
+    order = sorted(range(len(spans)), key=lambda i: -scores[i])
+    return [spans[i] for i in order]
+
+class AnytimeJob:
+    """Análise trecho a trecho no pool de inferência (inference_executor), na
+    ordem de prioridade. Com o pool ocupado, a análise espera na fila dele.
+
+    As análises concluídas ficam em `analyses` na ordem em que terminaram; quem
+    já recebeu as primeiras N busca o restante a partir do índice N."""
+
+    def __init__(self, spans: List[Tuple[int, int]], analyze_span: Callable[[Tuple[int, int]], List[BiasRecord]],
+                 shared: Optional[SharedStore] = None):
+        self.token = uuid.uuid4().hex
+        self.shared = shared if shared is not None and shared.enabled else None
+        self.spans = spans
+        self.analyze_span = analyze_span
+        self.total = len(spans)
+        self.processed = 0
+        self.analyses: List[BiasRecord] = []
+        self.error = None
+        self.created = self.last_access = time.time()
+        self.cancelled = False
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        # Roda no contexto da requisição que a iniciou (trace e perfil continuam
+        # valendo para a parte em segundo plano)
+        self._context = contextvars.copy_context()
+
+    def start(self):
+        if self.shared is not None:
+            self.shared.job_start(self.token, self.total, self.created)
+        inference_executor().submit(self._context.run, self._run)
+        return self
+
+    def _run(self):
+        try:
+            for span in self.spans:
+                if self.cancelled:
+                    break
+                results = self.analyze_span(span)
+                with self._lock:
+                    first = len(self.analyses)
+                    self.analyses.extend(results)
+                    self.processed += 1
+                if self.shared is not None:
+                    self.shared.job_progress(self.token, first, results, self.processed)
+        except Exception as e:
+            self.error = str(e)
+            print(f"❌ Erro na análise em segundo plano {self.token}: {e}")
+        finally:
+            if self.shared is not None:
+                self.shared.job_finish(self.token, self.error)
+            self._done.set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda a conclusão por até `timeout` segundos; True se concluída"""
+        return self._done.wait(timeout)
+
+    def results(self, since: int = 0) -> List[BiasRecord]:
+        """Análises concluídas a partir do índice `since`"""
+        self.last_access = time.time()
+        with self._lock:
+            return self.analyses[since:]
+
+    def snapshot(self, since: int = 0) -> Tuple[bool, int, List[BiasRecord]]:
+        """(concluída, trechos processados, análises a partir de `since`). A
+        conclusão é lida antes das análises (e só é marcada depois da última),
+        então concluída=True garante que nenhuma análise ficou de fora"""
+        done = self.done
+        self.last_access = time.time()
+        with self._lock:
+            return done, self.processed, self.analyses[since:]
+
+    @property
+    def pending(self) -> int:
+        return self.total - self.processed
+
+class SharedAnytimeJob:
+    """Análise em segundo plano rodando em outro worker, lida do estado
+    compartilhado (mesma interface de leitura do AnytimeJob)"""
+
+    POLL_SECONDS = 0.1
+
+    def __init__(self, token: str, shared: SharedStore, status: Dict[str, Any]):
+        self.token = token
+        self.shared = shared
+        self._status = status
+
+    def _refresh(self):
+        status = self.shared.job_status(self.token)
+        if status is not None:
+            self._status = status
+
+    @property
+    def total(self) -> int:
+        return self._status["total"]
+
+    @property
+    def processed(self) -> int:
+        return self._status["processed"]
+
+    @property
+    def error(self) -> Optional[str]:
+        return self._status["error"]
+
+    @property
+    def done(self) -> bool:
+        return self._status["done"]
+
+    @property
+    def pending(self) -> int:
+        return self.total - self.processed
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done and (deadline is None or time.monotonic() < deadline):
+            time.sleep(self.POLL_SECONDS)
+            self._refresh()
+        return self.done
+
+    def results(self, since: int = 0) -> List[BiasRecord]:
+        # Lê o estado antes das análises: processed/done nunca adiantam em
+        # relação às análises retornadas
+        self._refresh()
+        return self.shared.job_results(self.token, since)
+
+    def snapshot(self, since: int = 0) -> Tuple[bool, int, List[BiasRecord]]:
+        """Como AnytimeJob.snapshot: o estado é lido antes das análises"""
+        self._refresh()
+        done, processed = self.done, self.processed
+        return done, processed, self.shared.job_results(self.token, since)
+
+class AnytimeJobStore:
+    """Análises em segundo plano acessíveis pelo token de continuação. Com o
+    estado compartilhado habilitado (vários workers), o progresso é gravado no
+    SQLite e qualquer worker atende a continuação."""
+
+    def __init__(self, ttl_seconds: float = ANYTIME_JOB_TTL_SECONDS, max_jobs: int = ANYTIME_MAX_JOBS,
+                 shared: SharedStore = shared_store):
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max(1, max_jobs)
+        self.shared = shared
+        self._jobs: Dict[str, AnytimeJob] = {}
+        self._lock = threading.Lock()
+
+    def start(self, spans: List[Tuple[int, int]],
+              analyze_span: Callable[[Tuple[int, int]], List[BiasRecord]]) -> AnytimeJob:
+        job = AnytimeJob(spans, analyze_span, self.shared)
+        with self._lock:
+            self._evict()
+            self._jobs[job.token] = job
+        return job.start()
+
+    def get(self, token: str):
+        with self._lock:
+            self._evict()
+            job = self._jobs.get(token)
+        if job is not None or not self.shared.enabled:
+            return job
+        # Iniciada em outro worker
+        status = self.shared.job_status(token)
+        if status is None or time.time() - status["last_access"] > self.ttl_seconds:
+            return None
+        return SharedAnytimeJob(token, self.shared, self.shared.job_status(token, touch=True) or status)
+
+    def _last_access(self, job: AnytimeJob) -> float:
+        """Último acesso considerando as continuações atendidas por outros workers"""
+        if job.shared is None:
+            return job.last_access
+        status = job.shared.job_status(job.token)
+        return max(job.last_access, status["last_access"] if status else 0.0)
+
+    def _discard(self, job: AnytimeJob):
+        job.cancelled = True
+        del self._jobs[job.token]
+        if job.shared is not None:
+            job.shared.job_delete(job.token)
+
+    def _evict(self):
+        now = time.time()
+        for job in list(self._jobs.values()):
+            if now - job.last_access > self.ttl_seconds and now - self._last_access(job) > self.ttl_seconds:
+                self._discard(job)
+        # Acima do limite, descarta as mais antigas (interrompendo as em andamento)
+        while len(self._jobs) >= self.max_jobs:
+            self._discard(min(self._jobs.values(), key=lambda job: job.created))
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "jobs": len(jobs),
+            "running": sum(1 for job in jobs if not job.done),
+            "pending_segments": sum(job.pending for job in jobs if not job.done),
+            "ttl_seconds": self.ttl_seconds,
+            "max_jobs": self.max_jobs,
+        }
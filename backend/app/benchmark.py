@@ -0,0 +1,232 @@
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import re
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .utils import normalize_text, split_text_into_chunks
+
+# Corpus sintético (CC0) e baseline versionados em backend/benchmarks
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+CORPUS_PATH = os.path.join(BENCHMARK_DIR, "corpus", "frases.txt")
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+# Tamanho aproximado (caracteres) de cada artigo gerado
+CORPUS_SIZES = {"small": 4_000, "medium": 40_000, "huge": 400_000}
+CORPUS_SEED = 1956
+# Tempo mínimo de medição por benchmark e limites de repetições
+MIN_TIME_SECONDS = float(os.getenv("BENCHMARK_MIN_TIME", "1.0"))
+MIN_RUNS = 5
+MAX_RUNS = 1000
+# Aumento relativo da mediana (p50) acima do qual o benchmark é uma regressão
+REGRESSION_THRESHOLD = float(os.getenv("BENCHMARK_REGRESSION_THRESHOLD", "0.15"))
+# Sentenças enviadas às funções do detector avançado (que processam uma por chamada)
+ADVANCED_SAMPLE = 32
+
+def load_sections(path: str = CORPUS_PATH) -> List[Tuple[str, List[str]]]:
+    """Seções do corpus: (título, sentenças)"""
+    sections = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            heading = re.fullmatch(r"==\s*(.+?)\s*==", line)
+            if heading:
+                sections.append((heading.group(1), []))
+            elif sections:
+                sections[-1][1].append(line)
+    return sections
+
+def build_article(size: str, sections: Optional[List[Tuple[str, List[str]]]] = None, seed: int = CORPUS_SEED) -> str:
+    """Artigo determinístico com ~CORPUS_SIZES[size] caracteres, no formato do
+    extrato em texto plano da Wikipedia (títulos de seção em linhas próprias).
+    As seções se repetem, com as sentenças embaralhadas, até atingir o tamanho."""
+    sections = sections or load_sections()
+    rng = random.Random(f"{seed}-{size}")
+    target = CORPUS_SIZES[size]
+    parts, length, round_number = [], 0, 1
+    while length < target:
+        for title, sentences in sections:
+            shuffled = sentences[:]
+            rng.shuffle(shuffled)
+            heading = title if round_number == 1 else f"{title} ({round_number})"
+            block = f"{heading}\n" + " ".join(shuffled)
+            parts.append(block)
+            length += len(block) + 2
+            if length >= target:
+                break
+        round_number += 1
+    return "\n\n".join(parts)
+
+def percentile(values: List[float], fraction: float) -> float:
+    # Método do posto mais próximo
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def measure(fn: Callable[[], Any], min_time: float = MIN_TIME_SECONDS) -> Dict[str, float]:
+    """Executa `fn` repetidamente (após um aquecimento) e retorna ops/s, p50,
+    p99 e o pico de memória Python alocada numa execução (tracemalloc)"""
+    fn()
+    durations = []
+    gc.collect()
+    started = time.perf_counter()
+    while len(durations) < MIN_RUNS or (time.perf_counter() - started < min_time and len(durations) < MAX_RUNS):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+
+    # Memória medida numa execução separada, para não distorcer os tempos
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "runs": len(durations),
+        "ops_per_sec": round(len(durations) / sum(durations), 3),
+        "p50_ms": round(percentile(durations, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(durations, 0.99) * 1000, 4),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+def _sentences(article: str) -> List[str]:
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+", article) if len(s.strip()) > 10]
+
+def _basic_benchmarks(articles: Dict[str, str], use_spacy: bool) -> Dict[str, Callable[[], Any]]:
+    from .bias_detector import BiasDetector
+
+    detector = BiasDetector(load_nlp=use_spacy)
+    benchmarks = {}
+    for size, article in articles.items():
+        content = normalize_text(article)
+        benchmarks[f"BiasDetector.analyze_text[{size}]"] = lambda content=content: detector.analyze_text(content)
+    # Cada _detect_* sobre todas as sentenças do artigo pequeno
+    sentences = _sentences(normalize_text(articles.get("small") or build_article("small")))
+    for name in sorted(dir(detector)):
+        if name.startswith("_detect_"):
+            method = getattr(detector, name)
+            benchmarks[f"BiasDetector.{name}[small]"] = lambda method=method: [method(s) for s in sentences]
+    return benchmarks
+
+def _advanced_benchmarks(articles: Dict[str, str]) -> Dict[str, Callable[[], Any]]:
+    try:
+        from .advanced_bias_detector import AdvancedBiasDetector
+    except ImportError as e:
+        print(f"⚠️ Detector avançado indisponível ({e}); benchmarks avançados ignorados")
+        return {}
+
+    detector = AdvancedBiasDetector()
+    sentences = _sentences(normalize_text(articles.get("small") or build_article("small")))[:ADVANCED_SAMPLE]
+    benchmarks = {}
+    for name in ("analyze_semantic_features", "analyze_syntactic_features", "detect_semantic_bias"):
+        method = getattr(detector, name)
+        benchmarks[f"AdvancedBiasDetector.{name}[{len(sentences)} sentenças]"] = (
+            lambda method=method: [method(s) for s in sentences]
+        )
+    benchmarks[f"AdvancedBiasDetector.get_bert_embeddings[{len(sentences)} sentenças]"] = (
+        lambda: detector.get_bert_embeddings(sentences)
+    )
+    return benchmarks
+
+def collect_benchmarks(sizes: List[str], advanced: bool = False, use_spacy: bool = False) -> Dict[str, Callable[[], Any]]:
+    articles = {size: build_article(size) for size in sizes}
+    benchmarks = {}
+    for size, article in articles.items():
+        benchmarks[f"normalize_text[{size}]"] = lambda article=article: normalize_text(article)
+        content = normalize_text(article)
+        benchmarks[f"split_text_into_chunks[{size}]"] = lambda content=content: split_text_into_chunks(content)
+    benchmarks.update(_basic_benchmarks(articles, use_spacy))
+    if advanced:
+        benchmarks.update(_advanced_benchmarks(articles))
+    return benchmarks
+
+def run(sizes: List[str], advanced: bool = False, use_spacy: bool = False, pattern: Optional[str] = None,
+        min_time: float = MIN_TIME_SECONDS) -> Dict[str, Any]:
+    results = {}
+    for name, fn in collect_benchmarks(sizes, advanced, use_spacy).items():
+        if pattern and not re.search(pattern, name):
+            continue
+        results[name] = measure(fn, min_time)
+        entry = results[name]
+        print(f"{name:60s} {entry['ops_per_sec']:>10.2f} ops/s  p50 {entry['p50_ms']:>10.3f} ms  "
+              f"p99 {entry['p99_ms']:>10.3f} ms  pico {entry['peak_kb']:>9.1f} KB")
+    return {"environment": environment(), "results": results}
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "corpus_seed": CORPUS_SEED,
+    }
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """Benchmarks cuja mediana piorou mais que `threshold` em relação ao baseline"""
+    regressions = []
+    for name, entry in report["results"].items():
+        reference = baseline.get("results", {}).get(name)
+        if not reference or not reference.get("p50_ms"):
+            continue
+        change = entry["p50_ms"] / reference["p50_ms"] - 1
+        marker = "❌" if change > threshold else ("✅" if change < -threshold else "  ")
+        print(f"{marker} {name:60s} p50 {reference['p50_ms']:>10.3f} → {entry['p50_ms']:>10.3f} ms ({change:+.1%})")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+if __name__ == "__main__":
+    # python -m app.benchmark                      (roda e compara com benchmarks/baseline.json)
+    # python -m app.benchmark --save-baseline      (grava o baseline desta máquina)
+    # python -m app.benchmark --sizes small,medium --advanced --filter analyze_text
+    parser = argparse.ArgumentParser(description="Micro-benchmarks dos caminhos críticos dos detectores")
+    parser.add_argument("--sizes", default="small,medium,huge", help="tamanhos do corpus (small,medium,huge)")
+    parser.add_argument("--advanced", action="store_true", help="inclui o detector avançado (carrega os modelos)")
+    parser.add_argument("--spacy", action="store_true", help="detector básico com spaCy (senão, por pontuação)")
+    parser.add_argument("--filter", help="regex sobre o nome dos benchmarks")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME_SECONDS, help="segundos de medição por benchmark")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="arquivo de baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="piora relativa tolerada do p50")
+    parser.add_argument("--save-baseline", action="store_true", help="grava os resultados como novo baseline")
+    parser.add_argument("--output", help="grava o relatório JSON neste arquivo")
+    args = parser.parse_args()
+
+    sizes = [size for size in args.sizes.split(",") if size]
+    unknown = [size for size in sizes if size not in CORPUS_SIZES]
+    if unknown:
+        parser.error(f"tamanhos desconhecidos: {', '.join(unknown)}")
+
+    # Sem baseline não há com o que comparar: falha antes de medir
+    if not args.save_baseline and not os.path.exists(args.baseline):
+        print(f"❌ Sem baseline em {args.baseline}; grave um com --save-baseline")
+        sys.exit(2)
+
+    report = run(sizes, args.advanced, args.spacy, args.filter, args.min_time)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Baseline gravado em {args.baseline}")
+        sys.exit(0)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("environment", {}).get("platform") != report["environment"]["platform"]:
+        print("⚠️ Baseline gravado em outro ambiente; as diferenças podem não ser regressões")
+    regressions = compare(report, baseline, args.threshold)
+    if regressions:
+        print(f"❌ {len(regressions)} regressão(ões) acima de {args.threshold:.0%}")
+        sys.exit(1)
+    print("✅ Nenhuma regressão acima do limite")
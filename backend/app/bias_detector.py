@@ -1,14 +1,11 @@
 import re
-import spacy
-import nltk
 from typing import List, Tuple, Dict
-from .models import BiasType, BiasAnalysis
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-import statistics
+from .models import BiasType, BiasRecord, DetectorMode
+from .metrics import count_segments, stage, timed
+from . import tracing
 
 class BiasDetector:
-    def __init__(self):
+    def __init__(self, load_nlp: bool = True):
         # Padrões mais específicos e contextualmente apropriados
         self.loaded_language_patterns = [
             # Mantém padrões realmente problemáticos
@@ -98,19 +95,31 @@ class BiasDetector:
             r'\b(?:definitivamente|certamente)\s+(?:a|o)\s+(?:melhor|única|principal)\s+(?:solução|forma|maneira)\b'
         ]
         
-        # Inicializa spacy se disponível
+        # Inicializa spacy se disponível; com load_nlp=False o carregamento fica
+        # para load_nlp() e, até lá, é usada a análise básica por pontuação
+        self.nlp = None
+        if load_nlp:
+            self.load_nlp()
+    
+    def load_nlp(self):
+        """Carrega o modelo spaCy (import adiado, pois spaCy é pesado)"""
         try:
+            import spacy
             self.nlp = spacy.load("pt_core_news_sm")
-        except OSError:
+        except (ImportError, OSError):
             print("Modelo spacy português não encontrado. Usando análise básica.")
             self.nlp = None
     
-    def analyze_text(self, content: str) -> List[BiasAnalysis]:
+    @timed("rule_detection")
+    @tracing.traced("basic.analyze_text", lambda self, content: {"chars": len(content)})
+    def analyze_text(self, content: str) -> List[BiasRecord]:
         """Analisa o texto completo e retorna lista de viés detectados com métricas"""
         analyses = []
         
         # Divide o texto em sentenças
         sentences = self._split_into_sentences(content)
+        count_segments(DetectorMode.BASIC.value, len(sentences))
+        tracing.set_attributes(tracing.current_span(), segments=len(sentences))
         
         for sentence in sentences:
             sentence_analyses = self._analyze_sentence(sentence, content)
@@ -125,7 +134,7 @@ class BiasDetector:
         
         return analyses
     
-    def _add_quantitative_metrics(self, analyses: List[BiasAnalysis], full_text: str) -> List[BiasAnalysis]:
+    def _add_quantitative_metrics(self, analyses: List[BiasRecord], full_text: str) -> List[BiasRecord]:
         """Adiciona métricas quantitativas a cada análise"""
         for analysis in analyses:
             sentence = analysis.trecho_original
@@ -193,7 +202,8 @@ class BiasDetector:
     def _calculate_syntactic_complexity(self, text: str) -> float:
         """Calcula complexidade sintática"""
         if self.nlp:
-            doc = self.nlp(text)
+            with stage("spacy_parse"), tracing.span("spacy.parse", chars=len(text)):
+                doc = self.nlp(text)
             
             # Conta subordinadas e dependências complexas
             complex_deps = ['acl', 'advcl', 'ccomp', 'xcomp']
@@ -255,7 +265,7 @@ class BiasDetector:
         
         return min(max(formal_ratio - informal_ratio + 0.5, 0.0), 1.0)
     
-    def _adjust_confidence_with_metrics(self, analysis: BiasAnalysis) -> float:
+    def _adjust_confidence_with_metrics(self, analysis: BiasRecord) -> float:
         """Ajusta confiança baseada nas métricas calculadas"""
         base_confidence = analysis.confianca
         
@@ -271,14 +281,15 @@ class BiasDetector:
     def _split_into_sentences(self, text: str) -> List[str]:
         """Divide o texto em sentenças"""
         if self.nlp:
-            doc = self.nlp(text)
+            with stage("spacy_parse"), tracing.span("spacy.parse", chars=len(text)):
+                doc = self.nlp(text)
             return [sent.text.strip() for sent in doc.sents if len(sent.text.strip()) > 10]
         else:
             # Fallback simples
             sentences = re.split(r'[.!?]+', text)
             return [s.strip() for s in sentences if len(s.strip()) > 10]
     
-    def _analyze_sentence(self, sentence: str, full_text: str) -> List[BiasAnalysis]:
+    def _analyze_sentence(self, sentence: str, full_text: str) -> List[BiasRecord]:
         """Analisa uma sentença individual com contexto melhorado"""
         analyses = []
         
@@ -328,21 +339,9 @@ class BiasDetector:
                         start_pos = full_text.find(sentence)
                         end_pos = start_pos + len(sentence) if start_pos != -1 else 0
                         
-                        analysis = BiasAnalysis(
-                            trecho_original=sentence.strip(),
-                            tipo_vies=bias_type,
-                            explicacao=explanation,
-                            reformulacao_sugerida="",
-                            posicao_inicio=start_pos,
-                            posicao_fim=end_pos,
-                            confianca=confidence,
-                            # Métricas serão adicionadas posteriormente
-                            intensidade_emocional=0.0,
-                            polaridade_sentimento=0.0,
-                            complexidade_sintatica=0.0,
-                            nivel_certeza=0.0,
-                            score_formalidade=0.0
-                        )
+                        # Métricas serão adicionadas posteriormente
+                        analysis = BiasRecord(sentence.strip(), bias_type, explanation, "",
+                                              start_pos, end_pos, confidence)
                         analyses.append(analysis)
                         
             except Exception as e:
@@ -590,7 +589,7 @@ class BiasDetector:
         
         return None, 0.0, ""
     
-    def _remove_duplicates(self, analyses: List[BiasAnalysis]) -> List[BiasAnalysis]:
+    def _remove_duplicates(self, analyses: List[BiasRecord]) -> List[BiasRecord]:
         """Remove análises duplicadas baseadas na posição"""
         seen_positions = set()
         unique_analyses = []
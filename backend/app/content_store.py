@@ -0,0 +1,83 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .models import BiasRecord
+from .metrics import cache_lookup
+from .shared_store import SharedStore, shared_store
+
+# Conteúdos de artigos mantidos para GET /article-content/{hash}
+CONTENT_STORE_SIZE = int(os.getenv("CONTENT_STORE_SIZE", "256"))
+# Caracteres de contexto antes e depois de cada trecho no perfil highlights-only
+HIGHLIGHT_CONTEXT_CHARS = int(os.getenv("HIGHLIGHT_CONTEXT_CHARS", "80"))
+
+def content_hash(content: str) -> str:
+    """Identificador do conteúdo normalizado (SHA-256)"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def highlights(content: str, analyses: List[BiasRecord], context_chars: int = HIGHLIGHT_CONTEXT_CHARS) -> List[Dict[str, Any]]:
+    """Trechos sinalizados com uma janela de contexto de cada lado"""
+    result = []
+    for analysis in analyses:
+        start, end = analysis.posicao_inicio, analysis.posicao_fim
+        if start < 0 or end <= start:
+            continue
+        result.append({
+            "posicao_inicio": start,
+            "posicao_fim": end,
+            "contexto_antes": content[max(0, start - context_chars):start],
+            "trecho": content[start:end],
+            "contexto_depois": content[end:end + context_chars],
+        })
+    return result
+
+class ContentStore:
+    """Conteúdos normalizados recentes (LRU) indexados pelo hash; com o estado
+    compartilhado habilitado, também gravados no SQLite para os demais workers"""
+
+    def __init__(self, max_entries: int = CONTENT_STORE_SIZE, shared: SharedStore = shared_store):
+        self.max_entries = max(1, max_entries)
+        self.shared = shared
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, content: str, title: str, revision_id: Optional[int] = None) -> str:
+        digest = content_hash(content)
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                return digest
+            entry = self._entries[digest] = {"titulo": title, "revisao_id": revision_id, "conteudo": content}
+            self._trim()
+        self.shared.put("article_content", digest, entry, self.max_entries)
+        return digest
+
+    def _trim(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+        if entry is None:
+            # Analisado em outro worker
+            entry = self.shared.get("article_content", digest)
+            if entry is not None:
+                with self._lock:
+                    self._entries[digest] = entry
+                    self._trim()
+        cache_lookup("article_content", entry is not None)
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self._entries.values())
+        return {
+            "entries": len(entries),
+            "max_entries": self.max_entries,
+            "chars": sum(len(entry["conteudo"]) for entry in entries),
+        }
@@ -0,0 +1,105 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+
+from .models import DetectorMode
+
+# SLO de latência (ms) da etapa de detecção no modo auto
+DETECTOR_LATENCY_SLO_MS = float(os.getenv("DETECTOR_LATENCY_SLO_MS", "8000"))
+# Acima desta fila de inferência o modo auto não usa os transformers
+AUTO_MAX_QUEUE_DEPTH = int(os.getenv("AUTO_MAX_QUEUE_DEPTH", "256"))
+# Custos iniciais (ms por 1000 caracteres) antes de haver medições
+AUTO_PRIOR_MS_PER_KCHAR = {
+    DetectorMode.BASIC: float(os.getenv("AUTO_PRIOR_BASIC_MS_PER_KCHAR", "15")),
+    DetectorMode.FAST: float(os.getenv("AUTO_PRIOR_FAST_MS_PER_KCHAR", "5")),
+    DetectorMode.ADVANCED: float(os.getenv("AUTO_PRIOR_ADVANCED_MS_PER_KCHAR", "600")),
+}
+# Fração inicial de sentenças sinalizadas pelo detector barato no modo cascata
+AUTO_PRIOR_FLAGGED_RATIO = 0.3
+# Peso de cada nova medição nas médias móveis exponenciais
+EWMA_ALPHA = 0.2
+
+class DetectorSelector:
+    """Escolhe o detector de cada requisição no modo auto.
+
+    Estima a latência de cada modo a partir do custo observado por caractere
+    (média móvel das últimas análises), do tamanho do artigo e da carga atual
+    (análises em andamento e fila de inferência) e escolhe o modo mais completo
+    que cabe no SLO: avançado, cascata (detector barato em todas as sentenças e
+    avançado só nas sinalizadas) ou básico.
+    """
+
+    def __init__(self, slo_ms: float = DETECTOR_LATENCY_SLO_MS, max_queue_depth: int = AUTO_MAX_QUEUE_DEPTH):
+        self.slo_ms = slo_ms
+        self.max_queue_depth = max_queue_depth
+        self.ms_per_kchar = dict(AUTO_PRIOR_MS_PER_KCHAR)
+        self.flagged_ratio = AUTO_PRIOR_FLAGGED_RATIO
+        self.inflight = 0
+        self.choices = {mode.value: 0 for mode in (DetectorMode.ADVANCED, DetectorMode.CASCADE, DetectorMode.BASIC)}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self):
+        """Conta a análise como em andamento durante o bloco"""
+        with self._lock:
+            self.inflight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.inflight -= 1
+
+    def estimate_ms(self, mode: DetectorMode, chars: int, cheap_mode: DetectorMode = DetectorMode.BASIC) -> float:
+        """Latência estimada de um modo para um texto de `chars` caracteres com a
+        carga atual (as análises em andamento disputam a mesma CPU)"""
+        kchars = chars / 1000
+        contention = 1 + self.inflight
+        if mode == DetectorMode.CASCADE:
+            cost = self.ms_per_kchar[cheap_mode] + self.flagged_ratio * self.ms_per_kchar[DetectorMode.ADVANCED]
+        else:
+            cost = self.ms_per_kchar[mode]
+        return cost * kchars * contention
+
+    def choose(self, chars: int, advanced_available: bool, queue_depth: int = 0,
+               cheap_mode: DetectorMode = DetectorMode.BASIC) -> Tuple[DetectorMode, str]:
+        """Modo escolhido e o motivo"""
+        if not advanced_available:
+            mode, reason = DetectorMode.BASIC, "detector avançado indisponível"
+        elif queue_depth > self.max_queue_depth:
+            mode, reason = DetectorMode.BASIC, f"fila de inferência saturada ({queue_depth} itens)"
+        else:
+            advanced_ms = self.estimate_ms(DetectorMode.ADVANCED, chars)
+            cascade_ms = self.estimate_ms(DetectorMode.CASCADE, chars, cheap_mode)
+            if advanced_ms <= self.slo_ms:
+                mode, reason = DetectorMode.ADVANCED, f"avançado estimado em {advanced_ms:.0f} ms"
+            elif cascade_ms <= self.slo_ms:
+                mode, reason = DetectorMode.CASCADE, f"avançado estimado em {advanced_ms:.0f} ms, cascata em {cascade_ms:.0f} ms"
+            else:
+                mode, reason = DetectorMode.BASIC, f"cascata estimada em {cascade_ms:.0f} ms"
+        reason += f" (SLO {self.slo_ms:.0f} ms, {self.inflight} análises em andamento)"
+        with self._lock:
+            self.choices[mode.value] += 1
+        return mode, reason
+
+    def record(self, mode: DetectorMode, chars: int, elapsed_ms: float, flagged_ratio: Optional[float] = None):
+        """Atualiza o custo por caractere do modo com uma análise concluída,
+        descontando a disputa com as demais análises em andamento"""
+        if chars <= 0:
+            return
+        with self._lock:
+            per_kchar = elapsed_ms / (chars / 1000) / max(1, self.inflight)
+            if mode in self.ms_per_kchar:
+                self.ms_per_kchar[mode] += EWMA_ALPHA * (per_kchar - self.ms_per_kchar[mode])
+            if flagged_ratio is not None:
+                self.flagged_ratio += EWMA_ALPHA * (flagged_ratio - self.flagged_ratio)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "slo_ms": self.slo_ms,
+            "max_queue_depth": self.max_queue_depth,
+            "inflight": self.inflight,
+            "ms_per_kchar": {mode.value: round(cost, 1) for mode, cost in self.ms_per_kchar.items()},
+            "cascade_flagged_ratio": round(self.flagged_ratio, 3),
+            "choices": dict(self.choices),
+        }
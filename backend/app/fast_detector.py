@@ -0,0 +1,357 @@
+import argparse
+import hashlib
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import BiasType, BiasRecord, DetectorMode
+from .metrics import count_segments
+from . import tracing
+
+# Artefato do classificador rápido (gerado por `python -m app.fast_detector train`)
+FAST_MODEL_PATH = os.getenv("FAST_MODEL_PATH", "data/fast_detector.joblib")
+# Probabilidade mínima para que um tipo de viés seja atribuído a um trecho
+FAST_MIN_PROBABILITY = float(os.getenv("FAST_MIN_PROBABILITY", "0.5"))
+
+# Mesmo limiar do detector avançado para considerar um viés significativo
+TEACHER_MIN_SCORE = 0.15
+# Mesmo tamanho mínimo de segmento do detector avançado
+MIN_SEGMENT_LENGTH = 20
+HASH_FEATURES = 2 ** 18
+ARTIFACT_VERSION = 1
+
+def split_segments(content: str) -> List[Tuple[str, int, int]]:
+    """Sentenças (texto, início, fim) por pontuação, sem spaCy"""
+    segments = []
+    for match in re.finditer(r'[^.!?]+(?:[.!?]+|$)', content):
+        text = match.group(0).strip()
+        if len(text) >= MIN_SEGMENT_LENGTH:
+            start = match.start() + match.group(0).index(text)
+            segments.append((text, start, start + len(text)))
+    return segments
+
+def teacher_lexicons(teacher) -> Dict[str, List[str]]:
+    """Léxicos do detector avançado, gravados no artefato para que o
+    classificador rápido não dependa dele em tempo de inferência"""
+    lexicons = {f"certainty_{level}": list(words) for level, words in teacher.certainty_words.items()}
+    lexicons.update({f"emotional_{group}": list(words) for group, words in teacher.emotional_lexicon.items()})
+    lexicons.update({f"frame_{frame}": list(phrases) for frame, phrases in teacher.biased_frames.items()})
+    lexicons["intensifiers"] = list(teacher.intensifiers)
+    lexicons["hedge_words"] = list(teacher.hedge_words)
+    lexicons["modal_verbs"] = list(teacher.modal_verbs)
+    lexicons["ai_polarity"] = list(teacher.ai_polarity_lexicon)
+    return lexicons
+
+class _Featurizer:
+    """n-gramas de palavras com hashing + contagens normalizadas dos léxicos"""
+
+    def __init__(self, lexicons: Dict[str, List[str]]):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.lexicons = lexicons
+        self.vectorizer = HashingVectorizer(
+            n_features=HASH_FEATURES, ngram_range=(1, 2), alternate_sign=False, norm="l2"
+        )
+        self.lexicon_patterns = [
+            re.compile(r'\b(?:' + '|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)) + r')\b')
+            for terms in lexicons.values() if terms
+        ]
+
+    def transform(self, texts: List[str]):
+        from scipy.sparse import csr_matrix, hstack
+
+        rows = []
+        for text in texts:
+            lower = text.lower()
+            words = max(len(lower.split()), 1)
+            rows.append([len(pattern.findall(lower)) / words for pattern in self.lexicon_patterns])
+        return hstack([self.vectorizer.transform(texts), csr_matrix(rows)], format="csr")
+
+class FastBiasDetector:
+    """Classificador linear multi-rótulo destilado do detector avançado.
+
+    Um SGDClassifier por tipo de viés sobre n-gramas com hashing e features de
+    léxico, treinado com os rótulos que o detector avançado atribui a cada
+    sentença de um corpus local. Roda com custo de modo básico. O artefato é
+    carregado na primeira análise.
+    """
+
+    def __init__(self, path: str = FAST_MODEL_PATH, basic_detector=None):
+        self.path = path
+        self.basic_detector = basic_detector
+        self.artifact = None
+        self.featurizer = None
+        self.error = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        """Carrega o artefato (uma vez); False se não existir ou for inválido"""
+        with self._lock:
+            if self._loaded:
+                return self.artifact is not None
+            self._loaded = True
+            if not os.path.exists(self.path):
+                self.error = f"artefato não encontrado em {self.path}"
+                return False
+            try:
+                import joblib
+
+                artifact = joblib.load(self.path)
+                if artifact.get("version") != ARTIFACT_VERSION:
+                    raise ValueError(f"versão de artefato {artifact.get('version')} incompatível")
+                self.featurizer = _Featurizer(artifact["lexicons"])
+                self.artifact = artifact
+                print(f"✓ Classificador rápido carregado ({len(artifact['classifiers'])} tipos de viés)")
+                return True
+            except Exception as e:
+                print(f"⚠️ Erro ao carregar classificador rápido: {e}")
+                self.error = str(e)
+                return False
+
+    @property
+    def available(self) -> bool:
+        return self.load()
+
+    @tracing.traced("fast.predict", lambda self, texts: {"segments": len(texts)})
+    def predict_proba(self, texts: List[str]) -> List[Dict[BiasType, float]]:
+        """Probabilidade de cada tipo de viés por texto"""
+        if not texts or not self.load():
+            return [{} for _ in texts]
+        features = self.featurizer.transform(texts)
+        probabilities = [{} for _ in texts]
+        for value, classifier in self.artifact["classifiers"].items():
+            bias_type = BiasType(value)
+            for row, probability in enumerate(classifier.predict_proba(features)[:, 1]):
+                probabilities[row][bias_type] = float(probability)
+        return probabilities
+
+    def predict(self, texts: List[str], min_probability: float = FAST_MIN_PROBABILITY) -> List[Dict[BiasType, float]]:
+        """Tipos de viés atribuídos a cada texto, com a probabilidade"""
+        return [
+            {bias_type: p for bias_type, p in probabilities.items() if p >= min_probability}
+            for probabilities in self.predict_proba(texts)
+        ]
+
+    def analyze_text(self, content: str) -> List[BiasRecord]:
+        """Analisa o texto com o classificador rápido (mesmo formato do detector básico)"""
+        segments = split_segments(content)
+        count_segments(DetectorMode.FAST.value, len(segments))
+        analyses = []
+        for (text, start, end), biases in zip(segments, self.predict([s[0] for s in segments])):
+            if not biases:
+                continue
+            bias_type, confidence = max(biases.items(), key=lambda item: item[1])
+            others = [b.value for b in biases if b != bias_type]
+            explanation = f"Classificador rápido: {bias_type.value} (probabilidade {confidence:.0%})"
+            if others:
+                explanation += f"; também indica {', '.join(others)}"
+            analyses.append(BiasRecord(text, bias_type, explanation + ".", "", start, end, confidence))
+
+        # Métricas quantitativas leves do detector básico
+        if self.basic_detector is not None and analyses:
+            analyses = self.basic_detector._add_quantitative_metrics(analyses, content)
+        return analyses
+
+    def status(self) -> Dict[str, Any]:
+        """Estado do artefato e métricas de concordância com o detector avançado"""
+        if self.artifact is None:
+            return {"loaded": False, "path": self.path, "error": self.error}
+        return {
+            "loaded": True,
+            "path": self.path,
+            "trained_at": self.artifact["trained_at"],
+            "bias_types": sorted(self.artifact["classifiers"]),
+            "agreement": self.artifact["metrics"],
+        }
+
+def _read_corpus(paths: List[str]) -> List[str]:
+    """Documentos do corpus: arquivos .txt (um artigo por arquivo) ou diretórios com eles"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(root, name)
+                for root, _, names in os.walk(path) for name in sorted(names) if name.endswith(".txt")
+            )
+        else:
+            files.append(path)
+    documents = []
+    for file in sorted(files):
+        with open(file, encoding="utf-8") as f:
+            documents.append(f.read())
+    return documents
+
+def label_with_teacher(teacher, documents: List[str]) -> List[Tuple[str, List[str], int]]:
+    """(segmento, tipos atribuídos pelo detector avançado, documento) para todos
+    os segmentos do corpus, incluindo os sem viés. Os segmentos são os de
+    split_segments, os mesmos que o classificador rápido vê na inferência; cada
+    um recebe os tipos das sentenças do detector avançado que cobrem pelo menos
+    metade dele ou que ele cobre pelo menos pela metade"""
+    from .utils import normalize_text
+
+    samples = []
+    for index, document in enumerate(documents):
+        content = normalize_text(document)
+        spans = sorted(
+            (analysis.start_pos, analysis.end_pos, [
+                bias_type.value for bias_type, score in analysis.confidence_scores.items()
+                if score > TEACHER_MIN_SCORE
+            ])
+            for analysis in teacher.analyze_text_advanced(content)
+        )
+        labeled = 0
+        first = 0
+        for text, start, end in split_segments(content):
+            # Sentenças do detector terminadas antes deste segmento não cobrem os seguintes
+            while first < len(spans) and spans[first][1] <= start:
+                first += 1
+            labels = []
+            for span_start, span_end, types in spans[first:]:
+                if span_start >= end:
+                    break
+                overlap = min(end, span_end) - max(start, span_start)
+                if overlap * 2 >= min(end - start, span_end - span_start):
+                    labels.extend(t for t in types if t not in labels)
+            labeled += bool(labels)
+            samples.append((text, labels, index))
+        print(f"  documento {index + 1}/{len(documents)}: {labeled} segmentos com viés")
+    return samples
+
+def agreement_metrics(teacher_labels: List[List[str]], student_labels: List[List[str]]) -> Dict[str, Any]:
+    """Concordância do classificador rápido com o detector avançado: F1 por tipo,
+    micro-F1, acerto exato do conjunto de rótulos e concordância em "tem viés" """
+    per_type = {}
+    total_tp = total_fp = total_fn = 0
+    for value in sorted({label for labels in teacher_labels + student_labels for label in labels}):
+        tp = sum(1 for t, s in zip(teacher_labels, student_labels) if value in t and value in s)
+        fp = sum(1 for t, s in zip(teacher_labels, student_labels) if value not in t and value in s)
+        fn = sum(1 for t, s in zip(teacher_labels, student_labels) if value in t and value not in s)
+        total_tp, total_fp, total_fn = total_tp + tp, total_fp + fp, total_fn + fn
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        per_type[value] = {
+            "precision": round(precision, 3),
+            "recall": round(recall, 3),
+            "f1": round(2 * precision * recall / (precision + recall), 3) if precision + recall else 0.0,
+            "support": tp + fn,
+        }
+    samples = len(teacher_labels)
+    micro_precision = total_tp / (total_tp + total_fp) if total_tp + total_fp else 0.0
+    micro_recall = total_tp / (total_tp + total_fn) if total_tp + total_fn else 0.0
+    return {
+        "samples": samples,
+        "micro_f1": round(2 * micro_precision * micro_recall / (micro_precision + micro_recall), 3)
+        if micro_precision + micro_recall else 0.0,
+        "exact_match": round(sum(set(t) == set(s) for t, s in zip(teacher_labels, student_labels)) / samples, 3)
+        if samples else 0.0,
+        "any_bias_agreement": round(sum(bool(t) == bool(s) for t, s in zip(teacher_labels, student_labels)) / samples, 3)
+        if samples else 0.0,
+        "per_type": per_type,
+    }
+
+def train(documents: List[str], output: str = FAST_MODEL_PATH, holdout: float = 0.2) -> Dict[str, Any]:
+    """Rotula o corpus com o detector avançado, treina um classificador por tipo
+    de viés e grava o artefato com as métricas de concordância no holdout"""
+    import joblib
+    from sklearn.linear_model import SGDClassifier
+    from .advanced_bias_detector import AdvancedBiasDetector
+
+    teacher = AdvancedBiasDetector()
+    if teacher.nlp is None:
+        raise RuntimeError("detector avançado sem modelo spaCy; não é possível rotular o corpus")
+
+    print(f"🧠 Rotulando {len(documents)} documentos com o detector avançado...")
+    samples = label_with_teacher(teacher, documents)
+
+    # Holdout por documento (determinístico), para medir a concordância em textos não vistos
+    def in_holdout(index):
+        digest = hashlib.sha256(documents[index].encode("utf-8")).digest()
+        return digest[0] / 256 < holdout
+    train_samples = [s for s in samples if not in_holdout(s[2])] or samples
+    test_samples = [s for s in samples if in_holdout(s[2])]
+
+    featurizer = _Featurizer(teacher_lexicons(teacher))
+    features = featurizer.transform([text for text, _, _ in train_samples])
+    classifiers = {}
+    for bias_type in BiasType:
+        targets = [bias_type.value in labels for _, labels, _ in train_samples]
+        if not any(targets) or all(targets):
+            continue
+        classifier = SGDClassifier(
+            loss="log_loss", penalty="elasticnet", l1_ratio=0.15, alpha=1e-5,
+            class_weight="balanced", max_iter=50, tol=1e-4, random_state=0
+        )
+        classifier.fit(features, targets)
+        # Coeficientes esparsos: o artefato guarda só os pesos não nulos
+        classifier.sparsify()
+        classifiers[bias_type.value] = classifier
+
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "lexicons": featurizer.lexicons,
+        "classifiers": classifiers,
+        "training": {"documents": len(documents), "train_samples": len(train_samples),
+                     "holdout_samples": len(test_samples)},
+        "metrics": None,
+    }
+
+    student = FastBiasDetector(output)
+    student.artifact, student.featurizer, student._loaded = artifact, featurizer, True
+    if test_samples:
+        predictions = student.predict([text for text, _, _ in test_samples])
+        artifact["metrics"] = agreement_metrics(
+            [labels for _, labels, _ in test_samples],
+            [[bias_type.value for bias_type in biases] for biases in predictions]
+        )
+
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    joblib.dump(artifact, output, compress=3)
+    print(f"✓ Artefato gravado em {output} ({os.path.getsize(output) / 1024:.0f} KB)")
+    return artifact
+
+def evaluate(documents: List[str], path: str = FAST_MODEL_PATH) -> Dict[str, Any]:
+    """Concordância de um artefato existente com o detector avançado em outro corpus"""
+    from .advanced_bias_detector import AdvancedBiasDetector
+
+    student = FastBiasDetector(path)
+    if not student.load():
+        raise RuntimeError(student.error)
+    samples = label_with_teacher(AdvancedBiasDetector(), documents)
+    predictions = student.predict([text for text, _, _ in samples])
+    return agreement_metrics(
+        [labels for _, labels, _ in samples],
+        [[bias_type.value for bias_type in biases] for biases in predictions]
+    )
+
+def _print_metrics(metrics: Optional[Dict[str, Any]]):
+    if not metrics:
+        print("Sem amostras de holdout para medir a concordância")
+        return
+    print(f"Concordância com o detector avançado ({metrics['samples']} sentenças): "
+          f"micro-F1={metrics['micro_f1']}, acerto exato={metrics['exact_match']}, "
+          f"tem viés={metrics['any_bias_agreement']}")
+    for value, entry in metrics["per_type"].items():
+        print(f"  {value:28s} P={entry['precision']:.3f} R={entry['recall']:.3f} "
+              f"F1={entry['f1']:.3f} n={entry['support']}")
+
+if __name__ == "__main__":
+    # python -m app.fast_detector train corpus/ [--output data/fast_detector.joblib]
+    # python -m app.fast_detector evaluate corpus/
+    parser = argparse.ArgumentParser(description="Classificador rápido destilado do detector avançado")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("corpus", nargs="+", help="arquivos .txt (um artigo por arquivo) ou diretórios")
+    parser.add_argument("--output", default=FAST_MODEL_PATH, help="caminho do artefato")
+    parser.add_argument("--holdout", type=float, default=0.2, help="fração de documentos para avaliação")
+    args = parser.parse_args()
+
+    corpus = _read_corpus(args.corpus)
+    if args.command == "train":
+        _print_metrics(train(corpus, args.output, args.holdout)["metrics"])
+    else:
+        _print_metrics(evaluate(corpus, args.output))
@@ -0,0 +1,217 @@
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+from transformers.modeling_outputs import BaseModelOutput, SequenceClassifierOutput
+
+# Backend de inferência dos transformers (BERT e classificador de sentimento):
+#   torch     - PyTorch eager fp32 (padrão)
+#   quantized - quantização dinâmica int8 das camadas Linear (torch)
+#   onnx      - grafo exportado para ONNX e executado no ONNX Runtime
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch").lower()
+INFERENCE_BACKENDS = ("torch", "quantized", "onnx")
+# Onde ficam os grafos ONNX exportados (reaproveitados entre execuções)
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "data/onnx")
+
+# Limites de divergência aceitáveis em relação ao fp32 no teste de paridade
+PARITY_MIN_COSINE = float(os.getenv("PARITY_MIN_COSINE", "0.99"))
+PARITY_MIN_AGREEMENT = float(os.getenv("PARITY_MIN_AGREEMENT", "0.98"))
+
+PARITY_TEXTS = [
+    "O governo anunciou ontem novas medidas econômicas para o país.",
+    "Obviamente, a inteligência artificial vai destruir todos os empregos.",
+    "Segundo especialistas, os resultados ainda são inconclusivos.",
+    "É absolutamente inaceitável que os políticos continuem ignorando o problema.",
+    "A cidade tem cerca de 200 mil habitantes e fica no litoral.",
+    "Críticos argumentam que a tecnologia revolucionária é uma ameaça terrível.",
+    "O estudo, publicado em 2020, analisou dados de doze países.",
+    "Infelizmente, a maioria das pessoas não entende a gravidade da situação.",
+]
+
+class OnnxModel:
+    """Executa um grafo ONNX com a mesma interface de chamada do modelo PyTorch
+    (kwargs com tensores, saída com .last_hidden_state ou .logits).
+
+    A sessão é criada por processo: os pools de threads do ONNX Runtime não
+    sobrevivem ao fork dos workers."""
+
+    def __init__(self, path: str, original_model, output: str):
+        self.path = path
+        self.config = original_model.config
+        self.output = output
+        self._session = None
+        self._pid = None
+        self._session_for_process()
+
+    def _session_for_process(self):
+        if self._session is None or self._pid != os.getpid():
+            import onnxruntime
+
+            options = onnxruntime.SessionOptions()
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.intra_op_num_threads = torch.get_num_threads()
+            self._session = onnxruntime.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+            self._input_names = [i.name for i in self._session.get_inputs()]
+            self._pid = os.getpid()
+        return self._session
+
+    def forward(self, **inputs):
+        session = self._session_for_process()
+        feed = {name: inputs[name].cpu().numpy() for name in self._input_names if name in inputs}
+        result = torch.from_numpy(session.run(None, feed)[0])
+        if self.output == "logits":
+            return SequenceClassifierOutput(logits=result)
+        return BaseModelOutput(last_hidden_state=result)
+
+    __call__ = forward
+
+    def eval(self):
+        return self
+
+def build_backend(model, tokenizer, backend: str = INFERENCE_BACKEND, name: Optional[str] = None,
+                  output: str = "last_hidden_state"):
+    """Retorna (modelo, backend usado) com o modelo no backend pedido, construído
+    a partir do modelo fp32 (o original não é alterado). `output` é a saída
+    principal: last_hidden_state (encoder) ou logits (classificador). Em caso
+    de erro, mantém o PyTorch eager."""
+    if backend not in INFERENCE_BACKENDS:
+        print(f"⚠️ Backend de inferência desconhecido '{backend}', usando torch")
+        return model, "torch"
+    if backend == "torch":
+        return model, "torch"
+
+    try:
+        if backend == "quantized":
+            quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            return quantized.eval(), "quantized"
+        return _build_onnx(model, tokenizer, name or model.config.name_or_path, output), "onnx"
+    except Exception as e:
+        print(f"⚠️ Backend {backend} indisponível para {name or 'modelo'} ({e}), usando torch")
+        return model, "torch"
+
+def _build_onnx(model, tokenizer, name: str, output: str) -> OnnxModel:
+    """Exporta o modelo para ONNX (uma vez, em ONNX_CACHE_DIR) e abre a sessão"""
+    path = os.path.join(ONNX_CACHE_DIR, re.sub(r"[^\w.-]", "_", name) + f".{output}.onnx")
+
+    if not os.path.exists(path):
+        os.makedirs(ONNX_CACHE_DIR, exist_ok=True)
+        sample = tokenizer("Texto de exemplo para exportação.", return_tensors="pt")
+        # Ordem posicional do forward de BERT e XLM-RoBERTa
+        input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+        dynamic_axes = {n: {0: "batch", 1: "sequence"} for n in input_names}
+        dynamic_axes[output] = {0: "batch"} if output == "logits" else {0: "batch", 1: "sequence"}
+        start = time.perf_counter()
+        with torch.no_grad():
+            torch.onnx.export(
+                model, tuple(sample[n] for n in input_names), path,
+                input_names=input_names, output_names=[output],
+                dynamic_axes=dynamic_axes, opset_version=14
+            )
+        print(f"✓ {name} exportado para ONNX em {time.perf_counter() - start:.1f}s ({path})")
+
+    return OnnxModel(path, model, output)
+
+def _encoder_embeddings(model, tokenizer, texts: List[str]) -> np.ndarray:
+    inputs = tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=512)
+    with torch.no_grad():
+        hidden = model(**inputs).last_hidden_state
+    mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+    return ((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)).numpy()
+
+def _classifier_probs(model, tokenizer, texts: List[str]) -> np.ndarray:
+    inputs = tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=512)
+    with torch.no_grad():
+        logits = model(**inputs).logits
+    return torch.softmax(logits.float(), dim=-1).numpy()
+
+def _timed(fn, repeat: int = 3):
+    """Resultado da primeira chamada e a melhor latência (ms) em `repeat` execuções"""
+    result, best = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        current = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        if result is None:
+            result = current
+        best = elapsed if best is None else min(best, elapsed)
+    return result, round(best, 1)
+
+def parity_check(texts: List[str] = PARITY_TEXTS, backends=("quantized", "onnx")) -> Dict[str, Any]:
+    """Compara cada backend com o baseline fp32 (similaridade de cosseno dos
+    embeddings BERT, divergência das probabilidades e concordância de rótulo do
+    sentimento) e indica o backend mais rápido dentro dos limites aceitáveis"""
+    from .advanced_bias_detector import AdvancedBiasDetector, SENTIMENT_MODEL_NAME
+
+    detector = AdvancedBiasDetector(load_models=False, inference_backend="torch")
+    bert = detector.models.get("bert")
+    sentiment = detector.models.get("sentiment")
+    report = {"texts": len(texts), "backends": {}}
+    if bert is None and sentiment is None:
+        report["error"] = "nenhum modelo transformer disponível"
+        return report
+
+    baseline = {}
+    if bert is not None:
+        baseline["bert"] = _timed(lambda: _encoder_embeddings(bert[1], bert[0], texts))
+    if sentiment is not None:
+        baseline["sentiment"] = _timed(lambda: _classifier_probs(sentiment.model, sentiment.tokenizer, texts))
+    report["backends"]["torch"] = {
+        "bert_ms": baseline["bert"][1] if "bert" in baseline else None,
+        "sentiment_ms": baseline["sentiment"][1] if "sentiment" in baseline else None,
+        "acceptable": True,
+    }
+
+    for backend in backends:
+        entry = {}
+        if bert is not None:
+            model, used = build_backend(bert[1], bert[0], backend, detector.bert_model_name)
+            if used == backend:
+                embeddings, entry["bert_ms"] = _timed(lambda: _encoder_embeddings(model, bert[0], texts))
+                reference = baseline["bert"][0]
+                cosine = (embeddings * reference).sum(axis=1) / (
+                    np.linalg.norm(embeddings, axis=1) * np.linalg.norm(reference, axis=1))
+                entry["bert_cosine_min"] = round(float(cosine.min()), 5)
+                entry["bert_cosine_mean"] = round(float(cosine.mean()), 5)
+        if sentiment is not None:
+            model, used = build_backend(sentiment.model, sentiment.tokenizer, backend,
+                                        SENTIMENT_MODEL_NAME, output="logits")
+            if used == backend:
+                probs, entry["sentiment_ms"] = _timed(lambda: _classifier_probs(model, sentiment.tokenizer, texts))
+                reference = baseline["sentiment"][0]
+                entry["sentiment_max_prob_drift"] = round(float(np.abs(probs - reference).max()), 5)
+                entry["sentiment_label_agreement"] = round(float((probs.argmax(1) == reference.argmax(1)).mean()), 4)
+
+        if not entry:
+            entry["error"] = "backend indisponível"
+        entry["acceptable"] = "error" not in entry and \
+            entry.get("bert_cosine_min", 1.0) >= PARITY_MIN_COSINE and \
+            entry.get("sentiment_label_agreement", 1.0) >= PARITY_MIN_AGREEMENT
+        report["backends"][backend] = entry
+
+    def total_ms(entry):
+        return (entry.get("bert_ms") or 0) + (entry.get("sentiment_ms") or 0)
+
+    acceptable = [name for name, entry in report["backends"].items() if entry["acceptable"]]
+    report["recommended"] = min(acceptable, key=lambda name: total_ms(report["backends"][name]))
+    return report
+
+if __name__ == "__main__":
+    # python -m app.inference_backends [arquivo]: paridade e latência de cada
+    # backend em relação ao fp32 (um texto por linha no arquivo, se informado)
+    texts = PARITY_TEXTS
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+
+    report = parity_check(texts)
+    if "error" in report:
+        print(f"❌ {report['error']}")
+        sys.exit(1)
+    for backend, entry in report["backends"].items():
+        details = ", ".join(f"{key}={value}" for key, value in entry.items() if key != "acceptable")
+        print(f"{'✓' if entry['acceptable'] else '✗'} {backend:10s} {details}")
+    print(f"Backend recomendado: {report['recommended']}")
@@ -0,0 +1,170 @@
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from . import tracing
+from .metrics import QUEUE_DEPTH
+from .profiling import current_profile
+
+# Tamanho máximo de um lote e espera máxima (ms) para completá-lo
+INFERENCE_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", "32"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+
+# Threads que alimentam os batchers fora das requisições (análises em segundo
+# plano); por padrão, o suficiente para completar um lote
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(INFERENCE_BATCH_SIZE)))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+def inference_executor() -> ThreadPoolExecutor:
+    """Pool limitado (INFERENCE_WORKERS threads) para o trabalho de inferência
+    em segundo plano, compartilhado pelo processo: o excedente espera na fila
+    do pool em vez de abrir uma thread por tarefa. Recriado em processos filhos
+    de fork, que não herdam as threads."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=max(1, INFERENCE_WORKERS), thread_name_prefix="inference")
+            _executor_pid = os.getpid()
+        return _executor
+
+# Item na fila. O lote roda na thread do batcher: o perfil e o span da
+# requisição (se houver) vão junto para receber o tempo de espera e do lote
+_Pending = namedtuple("_Pending", "item future enqueued profile link")
+
+class InferenceBatcher:
+    """Agrupa chamadas de inferência de todas as requisições em andamento.
+
+    Cada chamada entra numa fila; uma thread dedicada forma lotes de até
+    `max_batch_size` itens, esperando no máximo `max_wait_ms` após o primeiro
+    item, executa `batch_fn` uma vez por lote e resolve o Future de cada
+    chamador. `batch_fn` recebe a lista de itens e retorna os resultados na
+    mesma ordem.
+    """
+
+    def __init__(self, name: str, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = INFERENCE_BATCH_SIZE, max_wait_ms: float = INFERENCE_MAX_WAIT_MS):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"items": 0, "batches": 0, "errors": 0, "max_queue_depth": 0,
+                       "total_wait_ms": 0.0, "total_batch_ms": 0.0}
+        # Histograma de tamanhos de lote em faixas de potências de 2
+        self._histogram = {}
+
+    def submit(self, item) -> Future:
+        """Enfileira um item e retorna o Future com o seu resultado"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put(_Pending(item, future, time.perf_counter(), current_profile(), tracing.current_link()))
+        QUEUE_DEPTH.labels(self.name).inc()
+        depth = self._queue.qsize()
+        if depth > self._stats["max_queue_depth"]:
+            self._stats["max_queue_depth"] = depth
+        return future
+
+    def __call__(self, item):
+        """Executa a inferência de um item, aguardando o lote do qual faz parte"""
+        return self.submit(item).result()
+
+    def map(self, items: List[Any]) -> List[Any]:
+        """Enfileira vários itens de uma vez e aguarda todos os resultados"""
+        futures = [self.submit(item) for item in items]
+        return [future.result() for future in futures]
+
+    def _ensure_worker(self):
+        # A thread é criada sob demanda (e recriada em processos filhos de fork)
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"batcher-{self.name}", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_Pending]):
+        QUEUE_DEPTH.labels(self.name).dec(len(batch))
+        items = [pending.item for pending in batch]
+        started = time.perf_counter()
+        error = None
+        # Span do lote ligado aos spans das requisições que têm itens nele
+        links = list({p.link.context.span_id: p.link for p in batch if p.link is not None}.values())
+        with tracing.span(f"{self.name}.batch", links=links, batch_size=len(batch),
+                          max_queue_wait_ms=round((started - batch[0].enqueued) * 1000, 2)) as batch_span:
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise ValueError(f"{self.name}: {len(results)} resultados para {len(items)} itens")
+            except Exception as e:
+                error = e
+                self._stats["errors"] += 1
+                tracing.set_attributes(batch_span, error=str(e))
+
+        finished = time.perf_counter()
+        self._stats["items"] += len(batch)
+        self._stats["batches"] += 1
+        self._stats["total_wait_ms"] += sum(started - pending.enqueued for pending in batch) * 1000
+        self._stats["total_batch_ms"] += (finished - started) * 1000
+        bucket = 1
+        while bucket < len(batch):
+            bucket *= 2
+        self._histogram[bucket] = self._histogram.get(bucket, 0) + 1
+        # Antes de resolver os Futures, para que o tempo entre no perfil antes
+        # de a requisição terminar
+        self._record_profiles(batch, started, finished)
+
+        if error is not None:
+            for pending in batch:
+                pending.future.set_exception(error)
+        else:
+            for pending, result in zip(batch, results):
+                pending.future.set_result(result)
+
+    def _record_profiles(self, batch: List[_Pending], started: float, finished: float):
+        """Espera na fila de cada item e duração do lote (uma vez por requisição)"""
+        profiles = {}
+        for pending in batch:
+            if pending.profile is not None:
+                pending.profile.add_stage(f"{self.name}_queue_wait", started - pending.enqueued)
+                profiles[id(pending.profile)] = pending.profile
+        for profile in profiles.values():
+            profile.add_stage(self.name, finished - started)
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidade da fila, histograma de tamanhos de lote e latências médias"""
+        stats = dict(self._stats)
+        batches, items = stats["batches"], stats["items"]
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": stats["max_queue_depth"],
+            "items": items,
+            "batches": batches,
+            "errors": stats["errors"],
+            "avg_batch_size": round(items / batches, 2) if batches else 0.0,
+            "avg_wait_ms": round(stats["total_wait_ms"] / items, 2) if items else 0.0,
+            "avg_batch_ms": round(stats["total_batch_ms"] / batches, 2) if batches else 0.0,
+            "batch_size_histogram": {f"<={size}": count for size, count in sorted(self._histogram.items())},
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
@@ -0,0 +1,459 @@
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+from .benchmark import BENCHMARK_DIR, CORPUS_SIZES, build_article, percentile
+
+# Respostas gravadas da API do MediaWiki, uma por arquivo (ver `record`)
+RECORDINGS_DIR = os.path.join(BENCHMARK_DIR, "loadtest", "wikipedia")
+UPSTREAM_WIKIPEDIA_URL = "https://pt.wikipedia.org"
+# Artigos sem gravação são gerados a partir do corpus sintético dos benchmarks
+DEFAULT_TITLES = ["Inteligência artificial", "Aprendizado de máquina", "Redes neurais artificiais"]
+DEFAULT_ARTICLE_SIZE = "medium"
+
+# Simulador da OpenAI: latência (ms) de cada chamada e injeção de erros
+OPENAI_LATENCY_MS = float(os.getenv("LOADTEST_OPENAI_LATENCY_MS", "800"))
+OPENAI_JITTER_MS = float(os.getenv("LOADTEST_OPENAI_JITTER_MS", "400"))
+OPENAI_ERROR_RATE = float(os.getenv("LOADTEST_OPENAI_ERROR_RATE", "0"))
+OPENAI_ERROR_STATUS = int(os.getenv("LOADTEST_OPENAI_ERROR_STATUS", "429"))
+
+# Endpoints exercitados e o corpo de cada requisição
+ENDPOINTS = {
+    "analyze": ("/analyze", lambda title: {"titulo_artigo": title}),
+    "analyze-advanced": ("/analyze-advanced", lambda title: {"titulo_artigo": title}),
+    "analyze-detailed": ("/analyze-detailed", lambda title: {"title": title}),
+}
+PERCENTILES = (0.50, 0.90, 0.99)
+# Prazo para o servidor ficar pronto (carregamento dos modelos)
+READY_TIMEOUT = float(os.getenv("LOADTEST_READY_TIMEOUT", "600"))
+
+class _StandIn(BaseHTTPRequestHandler):
+    """Base dos servidores substitutos: respostas JSON e sem log por requisição"""
+
+    def _send_json(self, status: int, body: Any):
+        payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def _recording_key(params: Dict[str, str]) -> str:
+    # Parâmetros da consulta em ordem canônica (o formato é sempre json)
+    canonical = json.dumps({k: v for k, v in sorted(params.items()) if k != "format"}, ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+class WikipediaReplay(_StandIn):
+    """Substituto de /w/api.php: responde com as gravações de `recordings_dir`;
+    consultas sem gravação recebem um artigo sintético (ou, com `upstream`,
+    são repassadas à Wikipedia e gravadas)"""
+
+    recordings_dir = RECORDINGS_DIR
+    upstream: Optional[str] = None
+    article_size = DEFAULT_ARTICLE_SIZE
+    stats = Counter()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != "/w/api.php":
+            self._send_json(404, {"error": {"code": "notfound", "info": url.path}})
+            return
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = os.path.join(self.recordings_dir, _recording_key(params) + ".json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                recording = json.load(f)
+            self._count("replayed")
+            self._send_json(recording["status"], recording["body"])
+        elif self.upstream:
+            self._send_json(*self._record(params, path))
+        else:
+            self._count("synthetic")
+            self._send_json(200, self._synthetic(params))
+
+    def _count(self, key: str):
+        with self.lock:
+            self.stats[key] += 1
+
+    def _record(self, params: Dict[str, str], path: str):
+        response = requests.get(f"{self.upstream}/w/api.php", params=params, timeout=30,
+                                headers={"User-Agent": "bias-detector-loadtest/1.0"})
+        body = response.json()
+        if response.ok:
+            os.makedirs(self.recordings_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"params": params, "status": response.status_code, "body": body}, f,
+                          ensure_ascii=False, indent=1)
+            self._count("recorded")
+        return response.status_code, body
+
+    def _synthetic(self, params: Dict[str, str]) -> Dict[str, Any]:
+        if params.get("list") == "search":
+            return {"query": {"search": [{"ns": 0, "title": params.get("srsearch", "")}]}}
+        title = params.get("titles", "")
+        page_id = int(hashlib.sha1(title.encode("utf-8")).hexdigest()[:6], 16)
+        return {"query": {"pages": {str(page_id): {
+            "pageid": page_id, "ns": 0, "title": title,
+            "extract": build_article(self.article_size),
+            "revisions": [{"revid": page_id, "parentid": 0}],
+        }}}}
+
+_TRECHO = re.compile(r'TRECHO (\d+):\s*TEXTO ORIGINAL: "(.*?)"', re.S)
+_ORIGINAL = re.compile(r'TEXTO ORIGINAL: "(.*?)"', re.S)
+
+class OpenAISimulator(_StandIn):
+    """Substituto de POST /v1/chat/completions com latência configurável e
+    erros injetados; reformulações e resumos são respostas determinísticas
+    no formato que o TextReformulator espera"""
+
+    latency_ms = OPENAI_LATENCY_MS
+    jitter_ms = OPENAI_JITTER_MS
+    error_rate = OPENAI_ERROR_RATE
+    error_status = OPENAI_ERROR_STATUS
+    stats = Counter()
+    lock = threading.Lock()
+
+    def do_POST(self):
+        if urlsplit(self.path).path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": f"Rota desconhecida: {self.path}", "type": "invalid_request_error"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.lock:
+            self.stats["calls"] += 1
+        if request.get("stream"):
+            self._send_json(400, {"error": {"message": "stream não suportado pelo simulador", "type": "invalid_request_error"}})
+            return
+
+        time.sleep(max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+        if random.random() < self.error_rate:
+            with self.lock:
+                self.stats[f"injected_{self.error_status}"] += 1
+            error_type = "rate_limit_error" if self.error_status == 429 else "server_error"
+            self._send_json(self.error_status, {"error": {"message": "Erro injetado pelo simulador", "type": error_type}})
+            return
+
+        prompt = request.get("messages", [{}])[-1].get("content", "")
+        content = self._completion(prompt, json_mode=(request.get("response_format") or {}).get("type") == "json_object")
+        prompt_tokens = sum(len(m.get("content", "")) for m in request.get("messages", [])) // 4
+        completion_tokens = len(content) // 4
+        self._send_json(200, {
+            "id": f"chatcmpl-loadtest-{random.getrandbits(48):012x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o-mini"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+    @staticmethod
+    def _completion(prompt: str, json_mode: bool) -> str:
+        if json_mode:
+            return json.dumps({"reformulacoes": [
+                {"id": int(i), "texto": f"Segundo algumas fontes, {text[:1].lower()}{text[1:]}"}
+                for i, text in _TRECHO.findall(prompt)
+            ]}, ensure_ascii=False)
+        original = _ORIGINAL.search(prompt)
+        if original:
+            text = original.group(1)
+            return f"Segundo algumas fontes, {text[:1].lower()}{text[1:]}"
+        return ("O artigo apresenta trechos com linguagem avaliativa e afirmações pouco qualificadas. "
+                "Recomenda-se atribuir as opiniões às suas fontes e moderar previsões categóricas.")
+
+def start_stand_in(handler, port: int = 0) -> ThreadingHTTPServer:
+    """Sobe o servidor numa thread própria (porta 0 escolhe uma porta livre)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"standin-{handler.__name__}", daemon=True).start()
+    return server
+
+def stand_in_env(wikipedia: ThreadingHTTPServer, openai_server: ThreadingHTTPServer) -> Dict[str, str]:
+    """Variáveis que apontam o WikipediaClient e o TextReformulator para os
+    substitutos. O cache de reformulações fica num diretório temporário: um
+    cache aquecido por execuções anteriores esconderia as chamadas à OpenAI"""
+    cache_dir = tempfile.mkdtemp(prefix="bias-loadtest-")
+    return {
+        "WIKIPEDIA_URL": f"http://127.0.0.1:{wikipedia.server_address[1]}",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_server.server_address[1]}/v1",
+        "OPENAI_API_KEY": "loadtest",
+        "REFORMULATION_OFFLINE": "false",
+        "REFORMULATION_CACHE_PATH": os.path.join(cache_dir, "reformulation_cache.sqlite3"),
+    }
+
+def start_api(port: int, env: Dict[str, str], workers: int = 1) -> subprocess.Popen:
+    """Sobe a API como em produção (gunicorn.conf.py, WEB_CONCURRENCY workers)
+    em backend/, com o ambiente dos substitutos"""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"]
+    env = {**os.environ, **env, "BIND": f"127.0.0.1:{port}", "WEB_CONCURRENCY": str(workers)}
+    return subprocess.Popen(command, cwd=backend_dir, env=env)
+
+def wait_ready(target: str, process: Optional[subprocess.Popen] = None, timeout: float = READY_TIMEOUT):
+    """Aguarda /ready responder 200 (modelos carregados). Com MODEL_LOADING=lazy
+    os modelos só carregam na primeira requisição que precisa deles e /ready
+    segue 503: basta a API responder"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"API encerrou durante a inicialização (código {process.returncode})")
+        try:
+            response = requests.get(f"{target}/ready", timeout=5)
+            if response.status_code == 200:
+                return
+            body = response.json()
+            if body.get("model_loading") == "lazy" and body.get("advanced_detector", {}).get("state") == "pending":
+                print("⚠️ MODEL_LOADING=lazy: os modelos carregam durante o teste (primeiras requisições mais lentas)")
+                return
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(1)
+    raise TimeoutError(f"API não ficou pronta em {timeout:.0f}s")
+
+def process_tree_rss_bytes(pid: int) -> Optional[int]:
+    """RSS somado do processo e dos seus descendentes (workers), via /proc"""
+    children = defaultdict(list)
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # O nome do processo (2º campo) pode conter espaços
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children[ppid].append(int(entry))
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            if current == pid:
+                return None
+        pending.extend(children.get(current, []))
+    return total
+
+class RssSampler:
+    """Amostra periodicamente o RSS da API durante o teste"""
+
+    def __init__(self, pid: int, interval: float = 1.0):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def start(self) -> "RssSampler":
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            rss = process_tree_rss_bytes(self.pid)
+            if rss is not None:
+                self.samples.append((round(time.perf_counter() - self._started, 1), round(rss / 1024 / 1024, 1)))
+            if self._stop.wait(self.interval):
+                return
+
+async def drive(target: str, endpoints: List[str], titles: List[str], concurrency: int,
+                duration: float, max_requests: Optional[int] = None, timeout: float = 300) -> Dict[str, Any]:
+    """Dispara as requisições com `concurrency` clientes simultâneos por
+    `duration` segundos (ou até `max_requests`) e retorna o relatório"""
+    import httpx
+
+    jobs = itertools.cycle([(endpoint, title) for title in titles for endpoint in endpoints])
+    results = defaultdict(list)
+    issued = 0
+    started = time.perf_counter()
+
+    async def client_loop(client):
+        nonlocal issued
+        while time.perf_counter() - started < duration and (max_requests is None or issued < max_requests):
+            issued += 1
+            endpoint, title = next(jobs)
+            path, body = ENDPOINTS[endpoint]
+            request_start = time.perf_counter()
+            try:
+                response = await client.post(path, json=body(title))
+                outcome = response.status_code
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            results[endpoint].append((time.perf_counter() - request_start, outcome))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    report = {name: _summarize(entries, elapsed) for name, entries in results.items()}
+    report["total"] = _summarize([entry for entries in results.values() for entry in entries], elapsed)
+    return {"elapsed_s": round(elapsed, 1), "concurrency": concurrency, "endpoints": report}
+
+def _summarize(entries, elapsed: float) -> Dict[str, Any]:
+    latencies = [latency for latency, _ in entries]
+    errors = Counter(str(outcome) for _, outcome in entries if not (isinstance(outcome, int) and outcome < 400))
+    summary = {
+        "requests": len(entries),
+        "throughput_rps": round(len(entries) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(sum(errors.values()) / len(entries), 4) if entries else 0.0,
+        "errors": dict(errors),
+    }
+    if latencies:
+        for fraction in PERCENTILES:
+            summary[f"p{int(fraction * 100)}_ms"] = round(percentile(latencies, fraction) * 1000, 1)
+        summary["max_ms"] = round(max(latencies) * 1000, 1)
+    return summary
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n📊 {report['elapsed_s']}s com {report['concurrency']} clientes simultâneos")
+    for name, entry in report["endpoints"].items():
+        latency = "  ".join(f"p{int(f * 100)} {entry.get(f'p{int(f * 100)}_ms', 0):>8.0f} ms" for f in PERCENTILES)
+        print(f"{name:18s} {entry['requests']:>6d} req  {entry['throughput_rps']:>7.2f} req/s  {latency}  "
+              f"erros {entry['error_rate']:.1%} {entry['errors'] or ''}")
+    rss = report.get("rss_mb")
+    if rss:
+        values = [mb for _, mb in rss]
+        print(f"🧠 RSS da API: início {values[0]:.0f} MB, pico {max(values):.0f} MB, fim {values[-1]:.0f} MB")
+    print(f"🛰️ Substitutos: wikipedia {report['stand_ins']['wikipedia']}, openai {report['stand_ins']['openai']}")
+
+def record(titles: List[str], directory: str = RECORDINGS_DIR, upstream: str = UPSTREAM_WIKIPEDIA_URL):
+    """Grava as respostas da Wikipedia para os títulos, passando o próprio
+    WikipediaClient pelo substituto em modo de gravação"""
+    from .wikipedia_client import WikipediaClient
+
+    WikipediaReplay.recordings_dir = directory
+    WikipediaReplay.upstream = upstream
+    server = start_stand_in(WikipediaReplay)
+    client = WikipediaClient(url=f"http://127.0.0.1:{server.server_address[1]}")
+    for title in titles:
+        article = client.get_article_content(title)
+        print(f"{'💾' if article else '⚠️'} {title}: "
+              f"{len(article['content']) if article else 0} caracteres")
+    server.shutdown()
+    print(f"📁 {WikipediaReplay.stats['recorded']} respostas novas em {directory}")
+
+if __name__ == "__main__":
+    # python -m app.loadtest run                          (sobe substitutos e API, 60 s, 8 clientes)
+    # python -m app.loadtest run --endpoints analyze --concurrency 32 --openai-error-rate 0.05
+    # python -m app.loadtest stand-ins                    (só os substitutos, para uma API externa)
+    # python -m app.loadtest record "Inteligência artificial" "ChatGPT"
+    parser = argparse.ArgumentParser(description="Teste de carga com substitutos locais da Wikipedia e da OpenAI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def stand_in_options(command):
+        command.add_argument("--recordings", default=RECORDINGS_DIR, help="diretório das respostas gravadas")
+        command.add_argument("--article-size", choices=list(CORPUS_SIZES), default=DEFAULT_ARTICLE_SIZE,
+                             help="tamanho dos artigos sintéticos (títulos sem gravação)")
+        command.add_argument("--openai-latency-ms", type=float, default=OPENAI_LATENCY_MS)
+        command.add_argument("--openai-jitter-ms", type=float, default=OPENAI_JITTER_MS)
+        command.add_argument("--openai-error-rate", type=float, default=OPENAI_ERROR_RATE, help="fração de chamadas com erro")
+        command.add_argument("--openai-error-status", type=int, default=OPENAI_ERROR_STATUS)
+
+    run_command = commands.add_parser("run", help="executa o teste de carga")
+    stand_in_options(run_command)
+    run_command.add_argument("--target", help="URL de uma API já em execução (configurada com o ambiente de `stand-ins`)")
+    run_command.add_argument("--pid", type=int, help="PID da API externa, para acompanhar o RSS")
+    run_command.add_argument("--port", type=int, default=8100, help="porta da API iniciada pelo teste")
+    run_command.add_argument("--workers", type=int, default=1, help="workers do gunicorn (WEB_CONCURRENCY)")
+    run_command.add_argument("--endpoints", default=",".join(ENDPOINTS), help="endpoints exercitados")
+    run_command.add_argument("--titles", default=",".join(DEFAULT_TITLES), help="títulos dos artigos, separados por vírgula")
+    run_command.add_argument("--concurrency", type=int, default=8, help="clientes simultâneos")
+    run_command.add_argument("--duration", type=float, default=60, help="duração do teste (s)")
+    run_command.add_argument("--requests", type=int, help="encerra após este total de requisições")
+    run_command.add_argument("--rss-interval", type=float, default=1.0, help="intervalo (s) das amostras de RSS")
+    run_command.add_argument("--output", help="grava o relatório JSON neste arquivo")
+
+    stand_ins_command = commands.add_parser("stand-ins", help="sobe apenas os substitutos e mostra o ambiente da API")
+    stand_in_options(stand_ins_command)
+
+    record_command = commands.add_parser("record", help="grava respostas da Wikipedia real para os títulos")
+    record_command.add_argument("titles", nargs="+")
+    record_command.add_argument("--recordings", default=RECORDINGS_DIR)
+    record_command.add_argument("--upstream", default=UPSTREAM_WIKIPEDIA_URL)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.titles, args.recordings, args.upstream)
+        sys.exit(0)
+
+    WikipediaReplay.recordings_dir = args.recordings
+    WikipediaReplay.article_size = args.article_size
+    OpenAISimulator.latency_ms = args.openai_latency_ms
+    OpenAISimulator.jitter_ms = args.openai_jitter_ms
+    OpenAISimulator.error_rate = args.openai_error_rate
+    OpenAISimulator.error_status = args.openai_error_status
+    wikipedia_server = start_stand_in(WikipediaReplay)
+    openai_server = start_stand_in(OpenAISimulator)
+    env = stand_in_env(wikipedia_server, openai_server)
+
+    if args.command == "stand-ins":
+        print("🛰️ Substitutos no ar; inicie a API com:")
+        print(" ".join(f"{key}={value}" for key, value in env.items()))
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            sys.exit(0)
+
+    endpoints = [name for name in args.endpoints.split(",") if name]
+    unknown = [name for name in endpoints if name not in ENDPOINTS]
+    if unknown:
+        parser.error(f"endpoints desconhecidos: {', '.join(unknown)}")
+    titles = [title.strip() for title in args.titles.split(",") if title.strip()]
+
+    api_process = None
+    target, pid = args.target, args.pid
+    if target is None:
+        print(f"🚀 Iniciando a API na porta {args.port} ({args.workers} worker(s))")
+        api_process = start_api(args.port, env, args.workers)
+        target, pid = f"http://127.0.0.1:{args.port}", api_process.pid
+    try:
+        wait_ready(target, api_process)
+        print(f"✅ API pronta; {args.concurrency} clientes por {args.duration:.0f}s em {', '.join(endpoints)}")
+        sampler = RssSampler(pid, args.rss_interval).start() if pid else None
+        try:
+            report = asyncio.run(drive(target, endpoints, titles, args.concurrency, args.duration, args.requests))
+        finally:
+            if sampler is not None:
+                sampler.stop()
+        report["rss_mb"] = sampler.samples if sampler is not None else []
+        report["stand_ins"] = {"wikipedia": dict(WikipediaReplay.stats), "openai": dict(OpenAISimulator.stats)}
+        report["config"] = {"titles": titles, "article_size": args.article_size,
+                            "openai_latency_ms": args.openai_latency_ms, "openai_jitter_ms": args.openai_jitter_ms,
+                            "openai_error_rate": args.openai_error_rate, "workers": args.workers}
+        print_report(report)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+    finally:
+        if api_process is not None:
+            api_process.terminate()
+            api_process.wait(timeout=30)
+        wikipedia_server.shutdown()
+        openai_server.shutdown()
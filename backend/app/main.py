@@ -1,40 +1,73 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
 import uvicorn
+try:
+    # Serializador JSON rápido para respostas grandes (opcional)
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:
+    FastJSONResponse = JSONResponse
 import os
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import time
 import asyncio
+import hmac
+import json
 
-from .models import AnalyzeRequest, AnalyzeResponse, ErrorResponse, BiasAnalysis, AnalysisRequest, AnalysisResponse
-from .wikipedia_client import WikipediaClient
-from .bias_detector import BiasDetector
-from .reformulator import TextReformulator
-from .utils import validate_article_title, normalize_text, truncate_text
+from .startup import import_timer, IMPORT_TIMES, BackgroundModelLoader, MODEL_LOADING
 
-# Import condicional do detector avançado
-try:
-    from .advanced_bias_detector import AdvancedBiasDetector
-    ADVANCED_DETECTOR_AVAILABLE = True
-    print("✅ Detector avançado disponível")
-except ImportError as e:
-    ADVANCED_DETECTOR_AVAILABLE = False
-    print(f"⚠️ Detector avançado não disponível: {e}")
-    print("💡 Usando apenas detector básico")
+# Os módulos leves são importados aqui (com tempo medido); o detector avançado,
+# que traz torch/transformers/sklearn, é importado pelo BackgroundModelLoader
+with import_timer("app.models"):
+    from .models import AnalyzeRequest, AnalyzeResponse, ErrorResponse, BiasRecord, DetectorMode, AnalysisRequest, AnalysisResponse
+    from .models import SampleRequest, SampleResponse, ContinuationResponse, ExpandRequest, ResponseProfile
+with import_timer("app.metrics"):
+    from .metrics import stage, fallback, render as render_metrics, CONTENT_TYPE_LATEST
+    from .metrics import MODEL_MEMORY, PROCESS_MEMORY, start_gauge_updater
+    from .model_registry import process_rss_bytes
+with import_timer("app.profiling"):
+    from .profiling import ProfileStore, PROFILING_ENABLED, PROFILING_ADMIN_TOKEN
+with import_timer("app.tracing"):
+    from . import tracing
+with import_timer("app.wikipedia_client"):
+    from .wikipedia_client import WikipediaClient
+with import_timer("app.bias_detector"):
+    from .bias_detector import BiasDetector
+with import_timer("app.fast_detector"):
+    from .fast_detector import FastBiasDetector
+    from .detector_selection import DetectorSelector
+with import_timer("app.segment_table"):
+    from .segment_table import SegmentTable, SegmentTableCache, BIAS_TYPES
+with import_timer("app.sampling"):
+    from .sampling import StratifiedSampler, SAMPLING_TARGET_WIDTH, SAMPLING_MAX_SEGMENTS
+with import_timer("app.content_store"):
+    from .content_store import ContentStore, highlights
+with import_timer("app.anytime"):
+    from .anytime import AnytimeJobStore, AnytimeJob, prioritize_spans
+with import_timer("app.reformulator"):
+    from .reformulator import TextReformulator, REFORMULATION_OFFLINE
+with import_timer("app.utils"):
+    from .utils import validate_article_title, normalize_text, truncate_text
+
+# Tempo máximo (s) que uma requisição aguarda o carregamento do detector avançado
+ADVANCED_DETECTOR_WAIT_SECONDS = float(os.getenv("ADVANCED_DETECTOR_WAIT_SECONDS", "60"))
 
 # Configuração da API OpenAI a partir de variável de ambiente
+# (dispensável no modo offline, que reformula apenas por substituição)
 API_KEY_OPENAI = os.getenv("OPENAI_API_KEY")
-if not API_KEY_OPENAI:
+if not API_KEY_OPENAI and not REFORMULATION_OFFLINE:
     raise ValueError("Variável de ambiente OPENAI_API_KEY não encontrada. Configure sua chave da API OpenAI.")
-print("✅ Chave OpenAI carregada da variável de ambiente")
+if API_KEY_OPENAI:
+    print("✅ Chave OpenAI carregada da variável de ambiente")
 
 # Inicialização da aplicação
 app = FastAPI(
     title="Detector de Viés em Artigos da Wikipedia",
     description="API para detectar e reformular viés textual em artigos da Wikipedia sobre IA",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Configuração do CORS
@@ -55,22 +88,104 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Inicialização dos componentes
+# Inicialização dos componentes (o spaCy do detector básico e os modelos do
+# detector avançado são carregados pelo advanced_model_loader)
 wikipedia_client = WikipediaClient()
-bias_detector = BiasDetector()
+bias_detector = BiasDetector(load_nlp=False)
+fast_bias_detector = FastBiasDetector(basic_detector=bias_detector)
+detector_selector = DetectorSelector()
+anytime_jobs = AnytimeJobStore()
+advanced_analysis_cache = SegmentTableCache()
+content_store = ContentStore()
+profile_store = ProfileStore()
 text_reformulator = TextReformulator(API_KEY_OPENAI)
+advanced_model_loader = BackgroundModelLoader(bias_detector)
 
-# Inicialização condicional do detector avançado
-if ADVANCED_DETECTOR_AVAILABLE:
-    try:
-        advanced_bias_detector = AdvancedBiasDetector()
-        print("✅ Detector avançado inicializado")
-    except Exception as e:
-        print(f"⚠️ Erro ao inicializar detector avançado: {e}")
-        advanced_bias_detector = None
-        ADVANCED_DETECTOR_AVAILABLE = False
-else:
-    advanced_bias_detector = None
+def _is_admin(token: Optional[str]) -> bool:
+    return PROFILING_ENABLED and token is not None and hmac.compare_digest(token, PROFILING_ADMIN_TOKEN)
+
+def _profiling_requested(request: Request) -> bool:
+    """Cabeçalho X-Profile: 1 (ou ?profile=1) com X-Admin-Token válido"""
+    flag = request.headers.get("x-profile") or request.query_params.get("profile")
+    return flag in ("1", "true", "yes") and _is_admin(request.headers.get("x-admin-token"))
+
+if PROFILING_ENABLED:
+    # Registrado só com PROFILING_ADMIN_TOKEN: sem ele, nenhum custo por requisição
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        """Perfila a requisição marcada e devolve o id do perfil em X-Profile-Id"""
+        if not _profiling_requested(request):
+            return await call_next(request)
+        profile = profile_store.begin(f"{request.method} {request.url.path}")
+        if profile is None:
+            return await call_next(request)
+        try:
+            response = await call_next(request)
+        except Exception:
+            await asyncio.to_thread(profile_store.finish, profile)
+            raise
+        response.headers["X-Profile-Id"] = profile.id
+        body = response.body_iterator
+        
+        async def body_then_finish():
+            # O perfil cobre também o corpo das respostas em streaming
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                await asyncio.to_thread(profile_store.finish, profile)
+        
+        response.body_iterator = body_then_finish()
+        return response
+
+if tracing.TRACING_ENABLED:
+    @app.middleware("http")
+    async def trace_request(request: Request, call_next):
+        """Span raiz da requisição; o trace id volta no cabeçalho X-Trace-Id"""
+        request_span, token = tracing.start_request_span(
+            f"{request.method} {request.url.path}", **{"http.method": request.method, "http.target": request.url.path}
+        )
+        try:
+            response = await call_next(request)
+        except Exception as e:
+            tracing.end_request_span(request_span, error=e)
+            raise
+        finally:
+            tracing.detach(token)
+        response.headers["X-Trace-Id"] = tracing.trace_id(request_span)
+        body = response.body_iterator
+        
+        async def body_then_end():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                tracing.end_request_span(request_span, status_code=response.status_code)
+        
+        response.body_iterator = body_then_end()
+        return response
+
+if MODEL_LOADING in ("eager", "preload"):
+    advanced_model_loader.load_now(warmup=MODEL_LOADING == "eager")
+
+@app.on_event("startup")
+async def start_model_loading():
+    """A API fica disponível imediatamente; os modelos carregam em segundo plano"""
+    if MODEL_LOADING == "background":
+        advanced_model_loader.start()
+    # Roda em cada worker (inclusive os criados por fork no preload)
+    start_gauge_updater(_update_memory_gauges)
+
+# Modos que precisam do detector avançado; os demais (e o auto) não esperam o
+# carregamento dos modelos e respondem de imediato
+ADVANCED_MODES = (DetectorMode.ADVANCED, DetectorMode.CASCADE)
+
+async def _get_advanced_detector(wait: bool = True):
+    """Retorna o detector avançado pronto ou None. Se o carregamento estiver em
+    andamento e `wait`, aguarda (sem bloquear o event loop) até ADVANCED_DETECTOR_WAIT_SECONDS."""
+    if not wait or advanced_model_loader.finished:
+        return advanced_model_loader.get(timeout=0)
+    return await asyncio.to_thread(advanced_model_loader.get, ADVANCED_DETECTOR_WAIT_SECONDS)
 
 # New models for detailed progress tracking
 class AnalysisStep(BaseModel):
@@ -99,7 +214,8 @@ async def root():
         "status": "ativo",
         "endpoints": {
             "analyze": "/analyze - Analisa viés em artigo da Wikipedia",
-            "health": "/health - Verifica saúde da API"
+            "health": "/health - Verifica saúde da API",
+            "ready": "/ready - Prontidão e estado de carregamento dos modelos"
         }
     }
 
@@ -115,6 +231,279 @@ async def health_check():
         }
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """Prontidão: estado de carregamento de cada modelo e custo de import dos módulos.
+    Retorna 503 enquanto os modelos ainda estão carregando."""
+    loader_status = advanced_model_loader.status()
+    body = {
+        "ready": advanced_model_loader.finished,
+        "model_loading": MODEL_LOADING,
+        "advanced_detector": loader_status,
+        "import_times_ms": IMPORT_TIMES
+    }
+    return JSONResponse(status_code=200 if advanced_model_loader.finished else 503, content=body)
+
+def _load_article(titulo_artigo: str):
+    """Valida o título, busca o artigo, verifica relevância para IA e normaliza o conteúdo.
+    Retorna (article_data, normalized_content) ou lança HTTPException."""
+    # Validação do título
+    if not validate_article_title(titulo_artigo):
+        raise HTTPException(
+            status_code=400,
+            detail="Título do artigo inválido. Use apenas caracteres alfanuméricos e espaços."
+        )
+    
+    # Busca o artigo na Wikipedia
+    print(f"Buscando artigo: {titulo_artigo}")
+    article_data = wikipedia_client.get_article_content(titulo_artigo)
+    
+    if not article_data:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Artigo '{titulo_artigo}' não encontrado na Wikipedia portuguesa."
+        )
+    
+    # Verifica se o artigo é relacionado à IA
+    if not wikipedia_client.is_ai_related(article_data['title'], article_data['content']):
+        raise HTTPException(
+            status_code=400,
+            detail="Este artigo não parece ser relacionado à Inteligência Artificial ou áreas correlatas."
+        )
+    
+    # Normaliza o conteúdo
+    with stage("normalize"):
+        normalized_content = normalize_text(article_data['content'])
+    
+    if len(normalized_content) < 100:
+        raise HTTPException(
+            status_code=400,
+            detail="Artigo muito curto para análise de viés."
+        )
+    
+    return article_data, normalized_content
+
+def _sentence_spans(normalized_content: str, advanced_bias_detector=None) -> Optional[List[Tuple[int, int]]]:
+    """Sentenças [início, fim) segundo o spaCy do detector avançado (None sem
+    ele). Um único parse serve à contagem e à análise com prazo"""
+    if advanced_bias_detector is not None and advanced_bias_detector.nlp:
+        return advanced_bias_detector.sentence_spans(normalized_content)
+    return None
+
+def _count_segments(normalized_content: str, spans: Optional[List[Tuple[int, int]]] = None) -> int:
+    """Calcula total de segmentos analisados (sentenças)"""
+    if spans is not None:
+        return sum(1 for start, end in spans if len(normalized_content[start:end].strip()) >= 20)
+    # Fallback: estima baseado em pontuação
+    return len([s.strip() for s in normalized_content.split('.') if len(s.strip()) >= 20])
+
+def _resolve_detector_mode(modo_detector: Optional[DetectorMode], usar_detector_avancado: bool) -> DetectorMode:
+    """Modo pedido: modo_detector, se informado, senão o booleano legado"""
+    if modo_detector is not None:
+        return modo_detector
+    return DetectorMode.ADVANCED if usar_detector_avancado else DetectorMode.BASIC
+
+def _select_detector_mode(modo: DetectorMode, normalized_content: str, advanced_bias_detector=None,
+                          chars: Optional[int] = None) -> Tuple[DetectorMode, Optional[str]]:
+    """Resolve o modo auto para avançado, cascata ou básico conforme o tamanho
+    do texto analisado (`chars`, por padrão o artigo inteiro) e a carga atual;
+    os demais modos são mantidos"""
+    if modo != DetectorMode.AUTO:
+        return modo, None
+    queue_depth = 0
+    if advanced_bias_detector is not None:
+        queue_depth = sum(stats["queue_depth"] for stats in advanced_bias_detector.inference_stats().values())
+    _, cheap_mode = _cheap_detector()
+    modo, motivo = detector_selector.choose(
+        len(normalized_content) if chars is None else chars, advanced_bias_detector is not None,
+        queue_depth, cheap_mode
+    )
+    print(f"🎚️ Modo auto: {modo.value} ({motivo})")
+    return modo, motivo
+
+def _cheap_detector():
+    """Detector barato da cascata: o classificador rápido, se treinado, senão o básico"""
+    if fast_bias_detector.available:
+        return fast_bias_detector, DetectorMode.FAST
+    return bias_detector, DetectorMode.BASIC
+
+def _advanced_to_basic(advanced_analyses) -> List[BiasRecord]:
+    """Converte análises avançadas para formato básico, com o tipo de viés de
+    maior confiança de cada segmento e a explicação desse tipo (colunas lidas
+    de uma vez da tabela; as explicações detalhadas seguem sob demanda)"""
+    table = SegmentTable.from_analyses(advanced_analyses)
+    if not len(table):
+        return []
+    best_type, best_confidence = table.best_bias()
+    best_type, best_confidence = best_type.tolist(), best_confidence.tolist()
+    rows = table.rows
+    columns = zip(
+        table.texts, best_type, best_confidence, table.bias_explanations(best_type, best_confidence),
+        rows["start_pos"].tolist(), rows["end_pos"].tolist(), rows["emotional_intensity"].tolist(),
+        rows["sentiment_polarity"].tolist(), rows["dependency_complexity"].tolist(),
+        rows["certainty_level"].tolist(), rows["formality_score"].tolist()
+    )
+    return [
+        BiasRecord(text, BIAS_TYPES[bias_index], explanation, "", start_pos, end_pos, confidence,
+                   emotional, polarity, complexity, certainty, formality)
+        for (text, bias_index, confidence, explanation, start_pos, end_pos,
+             emotional, polarity, complexity, certainty, formality) in columns
+    ]
+
+def _content_fields(profile: Optional[ResponseProfile], article_data: Dict[str, Any], normalized_content: str,
+                    analyses: List[BiasRecord]) -> Dict[str, Any]:
+    """Campos de conteúdo do AnalyzeResponse conforme o perfil: full traz o
+    texto, slim só o hash e a revisão (texto em GET /article-content/{hash}) e
+    highlights-only os trechos sinalizados com contexto"""
+    profile = profile or ResponseProfile.FULL
+    fields = {
+        "hash_conteudo": content_store.put(normalized_content, article_data['title'], article_data.get('revision_id')),
+        "revisao_id": article_data.get('revision_id'),
+        "perfil_resposta": profile,
+    }
+    if profile == ResponseProfile.FULL:
+        fields["conteudo_original"] = normalized_content
+    elif profile == ResponseProfile.HIGHLIGHTS:
+        fields["destaques"] = highlights(normalized_content, analyses)
+    return fields
+
+def _detailed_content_fields(profile: Optional[ResponseProfile], article_data: Dict[str, Any], content: str,
+                             analyses: List[BiasRecord]) -> Dict[str, Any]:
+    """Equivalente de _content_fields para o AnalysisResponse (o perfil full
+    mantém a prévia de 500 caracteres)"""
+    fields = _content_fields(profile, article_data, content, analyses)
+    preview = content[:500] + "..." if len(content) > 500 else content
+    return {
+        "article_content": preview if "conteudo_original" in fields else None,
+        "content_hash": fields["hash_conteudo"],
+        "revision_id": fields["revisao_id"],
+        "highlights": fields.get("destaques"),
+    }
+
+def _model_response(model: BaseModel) -> JSONResponse:
+    """Serializa o modelo de resposta uma única vez, sem a revalidação que o
+    FastAPI faz do valor retornado contra o response_model"""
+    with stage("serialization"):
+        return FastJSONResponse(model.model_dump())
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+def _detect_bias(normalized_content: str, modo: DetectorMode,
+                 advanced_bias_detector=None) -> Tuple[List[BiasRecord], DetectorMode]:
+    """Escolhe o detector baseado na preferência e disponibilidade e retorna as
+    análises junto com o modo que efetivamente rodou. O tempo de cada detector
+    alimenta as estimativas do modo auto."""
+    with detector_selector.track():
+        return _run_detector(normalized_content, modo, advanced_bias_detector)
+
+def _run_detector(normalized_content: str, modo: DetectorMode,
+                  advanced_bias_detector=None) -> Tuple[List[BiasRecord], DetectorMode]:
+    chars = len(normalized_content)
+    
+    if modo == DetectorMode.FAST:
+        if fast_bias_detector.available:
+            print("⚡ Usando classificador rápido...")
+            start = time.perf_counter()
+            bias_analyses = fast_bias_detector.analyze_text(normalized_content)
+            detector_selector.record(DetectorMode.FAST, chars, _elapsed_ms(start))
+            return bias_analyses, DetectorMode.FAST
+        print(f"⚠️ Classificador rápido indisponível ({fast_bias_detector.error}), usando básico")
+    
+    if modo == DetectorMode.CASCADE and advanced_bias_detector is not None:
+        print("🪜 Usando cascata (detector barato + avançado nos trechos sinalizados)...")
+        try:
+            cheap_detector, cheap_mode = _cheap_detector()
+            start = time.perf_counter()
+            candidates = cheap_detector.analyze_text(normalized_content)
+            detector_selector.record(cheap_mode, chars, _elapsed_ms(start))
+            
+            spans = sorted({(a.posicao_inicio, a.posicao_fim) for a in candidates if a.posicao_inicio >= 0})
+            flagged_chars = sum(end - begin for begin, end in spans)
+            start = time.perf_counter()
+            advanced_analyses = advanced_bias_detector.analyze_spans_advanced(normalized_content, spans)
+            if flagged_chars:
+                detector_selector.record(DetectorMode.ADVANCED, flagged_chars, _elapsed_ms(start),
+                                         flagged_ratio=flagged_chars / max(chars, 1))
+            return _advanced_to_basic(advanced_analyses), DetectorMode.CASCADE
+        except Exception as e:
+            print(f"Erro na cascata, usando básico: {e}")
+            fallback("detector_basic")
+            return bias_detector.analyze_text(normalized_content), DetectorMode.BASIC
+    
+    if modo == DetectorMode.ADVANCED and advanced_bias_detector is not None:
+        print("🧠 Usando detector avançado...")
+        try:
+            start = time.perf_counter()
+            advanced_analyses = advanced_bias_detector.analyze_text_advanced(normalized_content)
+            detector_selector.record(DetectorMode.ADVANCED, chars, _elapsed_ms(start))
+            return _advanced_to_basic(advanced_analyses), DetectorMode.ADVANCED
+                    
+        except Exception as e:
+            print(f"Erro no detector avançado, usando básico: {e}")
+            fallback("detector_basic")
+            return bias_detector.analyze_text(normalized_content), DetectorMode.BASIC
+    
+    if modo != DetectorMode.BASIC:
+        # Rápido sem artefato treinado ou avançado/cascata sem os modelos carregados
+        fallback("detector_basic")
+    print("📝 Usando detector básico melhorado...")
+    start = time.perf_counter()
+    bias_analyses = bias_detector.analyze_text(normalized_content)
+    detector_selector.record(DetectorMode.BASIC, chars, _elapsed_ms(start))
+    return bias_analyses, DetectorMode.BASIC
+
+def _detect_bias_until(normalized_content: str, modo: DetectorMode, advanced_bias_detector=None,
+                       deadline_ms: Optional[int] = None, started: Optional[float] = None,
+                       sentence_spans: Optional[List[Tuple[int, int]]] = None
+                       ) -> Tuple[List[BiasRecord], DetectorMode, Optional[AnytimeJob]]:
+    """Como _detect_bias, mas com prazo para o detector avançado: as sentenças
+    são analisadas em ordem de prioridade (maior score do detector por regras
+    primeiro) e, no prazo, retorna as análises já concluídas junto com a
+    análise em segundo plano que segue com o restante (None se concluiu).
+
+    O prazo conta a partir de `started` (time.perf_counter() na chegada da
+    requisição); `sentence_spans` reaproveita o parse já feito para a contagem"""
+    if deadline_ms is None or modo != DetectorMode.ADVANCED or \
+            advanced_bias_detector is None or not advanced_bias_detector.nlp:
+        bias_analyses, modo_usado = _detect_bias(normalized_content, modo, advanced_bias_detector)
+        return bias_analyses, modo_usado, None
+    
+    deadline = (started if started is not None else time.perf_counter()) + deadline_ms / 1000
+    candidates = bias_detector.analyze_text(normalized_content)
+    if sentence_spans is None:
+        sentence_spans = advanced_bias_detector.sentence_spans(normalized_content)
+    spans = prioritize_spans(sentence_spans, candidates)
+    
+    def analyze_span(span):
+        with detector_selector.track():
+            return _advanced_to_basic(advanced_bias_detector.analyze_spans_advanced(normalized_content, [span]))
+    
+    job = anytime_jobs.start(spans, analyze_span)
+    job.wait(max(0.0, deadline - time.perf_counter()))
+    # A resposta leva exatamente as primeiras N análises; a continuação parte de N.
+    # Concluída só se já estava antes da leitura (senão análises do intervalo se perderiam)
+    done, processed, results = job.snapshot()
+    bias_analyses = sorted(results, key=lambda a: a.posicao_inicio)
+    if done and not job.error:
+        return bias_analyses, DetectorMode.ADVANCED, None
+    print(f"⏱️ Prazo de {deadline_ms} ms: {processed}/{job.total} sentenças, restante em segundo plano ({job.token})")
+    return bias_analyses, DetectorMode.ADVANCED, job
+
+def _reject_deadline(deadline_ms: Optional[int]):
+    """deadline_ms só é suportado em /analyze e /analyze/stream: nos demais
+    endpoints a análise seria silenciosamente completa"""
+    if deadline_ms is not None:
+        raise HTTPException(
+            status_code=400,
+            detail="deadline_ms é suportado apenas em /analyze e /analyze/stream."
+        )
+
+def _continuation_fields(job: Optional[AnytimeJob]) -> Dict[str, Any]:
+    if job is None:
+        return {}
+    return {"analise_parcial": True, "token_continuacao": job.token, "trechos_pendentes": job.pending}
+
 @app.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_article(request: AnalyzeRequest):
     """
@@ -129,85 +518,24 @@ async def analyze_article(request: AnalyzeRequest):
     Raises:
         HTTPException: Em caso de erro no processamento
     """
+    # O deadline_ms conta a partir da chegada da requisição
+    started = time.perf_counter()
     try:
-        # Validação do título
-        if not validate_article_title(request.titulo_artigo):
-            raise HTTPException(
-                status_code=400,
-                detail="Título do artigo inválido. Use apenas caracteres alfanuméricos e espaços."
-            )
-        
-        # Busca o artigo na Wikipedia
-        print(f"Buscando artigo: {request.titulo_artigo}")
-        article_data = wikipedia_client.get_article_content(request.titulo_artigo)
-        
-        if not article_data:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Artigo '{request.titulo_artigo}' não encontrado na Wikipedia portuguesa."
-            )
-        
-        # Verifica se o artigo é relacionado à IA
-        if not wikipedia_client.is_ai_related(article_data['title'], article_data['content']):
-            raise HTTPException(
-                status_code=400,
-                detail="Este artigo não parece ser relacionado à Inteligência Artificial ou áreas correlatas."
-            )
-        
-        # Normaliza o conteúdo
-        normalized_content = normalize_text(article_data['content'])
-        
-        if len(normalized_content) < 100:
-            raise HTTPException(
-                status_code=400,
-                detail="Artigo muito curto para análise de viés."
-            )
+        article_data, normalized_content = await asyncio.to_thread(_load_article, request.titulo_artigo)
+        modo = _resolve_detector_mode(request.modo_detector, request.usar_detector_avancado)
+        # Só os modos avançado e cascata esperam o carregamento dos modelos
+        advanced_bias_detector = await _get_advanced_detector(wait=modo in ADVANCED_MODES)
+        modo, motivo_modo = _select_detector_mode(modo, normalized_content, advanced_bias_detector)
         
         # Calcula total de segmentos analisados (sentenças)
-        total_segments_analyzed = 0
-        if ADVANCED_DETECTOR_AVAILABLE and advanced_bias_detector and advanced_bias_detector.nlp:
-            doc = advanced_bias_detector.nlp(normalized_content)
-            total_segments_analyzed = len([sent for sent in doc.sents if len(sent.text.strip()) >= 20])
-        else:
-            # Fallback: estima baseado em pontuação
-            total_segments_analyzed = len([s.strip() for s in normalized_content.split('.') if len(s.strip()) >= 20])
+        sentence_spans = await asyncio.to_thread(_sentence_spans, normalized_content, advanced_bias_detector)
+        total_segments_analyzed = _count_segments(normalized_content, sentence_spans)
         
-        # Escolhe o detector baseado na preferência e disponibilidade
-        if request.usar_detector_avancado and ADVANCED_DETECTOR_AVAILABLE and advanced_bias_detector:
-            print("🧠 Usando detector avançado...")
-            try:
-                advanced_analyses = advanced_bias_detector.analyze_text_advanced(normalized_content)
-                
-                # Converte análises avançadas para formato básico
-                bias_analyses = []
-                for adv_analysis in advanced_analyses:
-                    if adv_analysis.confidence_scores:
-                        # Seleciona o tipo de viés com maior confiança
-                        best_bias_type = max(adv_analysis.confidence_scores.items(), key=lambda x: x[1])
-                        bias_type, confidence = best_bias_type
-                        
-                        basic_analysis = BiasAnalysis(
-                            trecho_original=adv_analysis.text_segment,
-                            tipo_vies=bias_type,
-                            explicacao=adv_analysis.explanation,
-                            reformulacao_sugerida="",
-                            posicao_inicio=adv_analysis.start_pos,
-                            posicao_fim=adv_analysis.end_pos,
-                            confianca=confidence,
-                            intensidade_emocional=adv_analysis.semantic_features.emotional_intensity,
-                            polaridade_sentimento=adv_analysis.semantic_features.sentiment_polarity,
-                            complexidade_sintatica=adv_analysis.syntactic_features.dependency_complexity,
-                            nivel_certeza=adv_analysis.semantic_features.certainty_level,
-                            score_formalidade=adv_analysis.semantic_features.formality_score
-                        )
-                        bias_analyses.append(basic_analysis)
-                        
-            except Exception as e:
-                print(f"Erro no detector avançado, usando básico: {e}")
-                bias_analyses = bias_detector.analyze_text(normalized_content)
-        else:
-            print("📝 Usando detector básico melhorado...")
-            bias_analyses = bias_detector.analyze_text(normalized_content)
+        # Em thread, para que requisições concorrentes compartilhem os lotes de inferência
+        bias_analyses, modo_usado, job = await asyncio.to_thread(
+            _detect_bias_until, normalized_content, modo, advanced_bias_detector, request.deadline_ms,
+            started, sentence_spans
+        )
         
         # Calcula métricas agregadas
         metricas_gerais = {}
@@ -228,9 +556,9 @@ async def analyze_article(request: AnalyzeRequest):
         
         if not bias_analyses:
             # Retorna resposta mesmo sem viés detectado
-            return AnalyzeResponse(
+            return _model_response(AnalyzeResponse(
                 titulo=article_data['title'],
-                conteudo_original=normalized_content,
+                **await asyncio.to_thread(_content_fields, request.perfil_resposta, article_data, normalized_content, []),
                 url_wikipedia=article_data['url'],
                 analises_vies=[],
                 resumo_geral=f"Nenhum viés significativo foi detectado no artigo '{article_data['title']}'. O artigo foi analisado em {total_segments_analyzed} segmentos e nenhum apresentou viés detectável.",
@@ -239,18 +567,20 @@ async def analyze_article(request: AnalyzeRequest):
                 score_polaridade_geral=0.0,
                 score_emocional_geral=0.0,
                 score_complexidade_geral=0.0,
-                distribuicao_tipos_vies={}
+                distribuicao_tipos_vies={},
+                modo_detector=modo_usado,
+                motivo_modo_detector=motivo_modo,
+                **_continuation_fields(job)
+            ))
+        
+        # Reformula os trechos com viés e gera o resumo geral concorrentemente
+        # (o resumo depende apenas dos tipos de viés, não das reformulações)
+        print("Reformulando trechos com viés e gerando resumo geral expandido...")
+        reformulated_analyses, resumo_base = await asyncio.gather(
+            text_reformulator.reformulate_analyses_async(bias_analyses, request.orcamento_reformulacao_ms),
+            text_reformulator.generate_general_summary_async(
+                bias_analyses, article_data['title'], request.orcamento_reformulacao_ms
             )
-        
-        # Reformula os trechos com viés
-        print("Reformulando trechos com viés...")
-        reformulated_analyses = text_reformulator.reformulate_analyses(bias_analyses)
-        
-        # Gera resumo geral expandido
-        print("Gerando resumo geral expandido...")
-        resumo_base = text_reformulator.generate_general_summary(
-            reformulated_analyses, 
-            article_data['title']
         )
         
         # Adiciona estatísticas ao resumo
@@ -272,23 +602,24 @@ async def analyze_article(request: AnalyzeRequest):
         
         response = AnalyzeResponse(
             titulo=article_data['title'],
-            conteudo_original=normalized_content,
+            **await asyncio.to_thread(_content_fields, request.perfil_resposta, article_data, normalized_content,
+                                      reformulated_analyses),
             url_wikipedia=article_data['url'],
-            analises_vies=reformulated_analyses,
+            analises_vies=[analysis.to_model() for analysis in reformulated_analyses],
             resumo_geral=resumo_expandido,
             total_trechos_analisados=total_segments_analyzed,
             total_trechos_com_vies=total_com_vies,
             score_polaridade_geral=metricas_gerais.get('polaridade_media', 0.0),
             score_emocional_geral=metricas_gerais.get('intensidade_emocional_media', 0.0),
             score_complexidade_geral=metricas_gerais.get('complexidade_media', 0.0),
-            distribuicao_tipos_vies=distribuicao_tipos
+            distribuicao_tipos_vies=distribuicao_tipos,
+            modo_detector=modo_usado,
+            motivo_modo_detector=motivo_modo,
+            **_continuation_fields(job)
         )
         
-        print(f"DEBUG: Modelo criado com campos: {list(response.model_dump().keys())}")
-        
-        detector_usado = "avançado" if (request.usar_detector_avancado and ADVANCED_DETECTOR_AVAILABLE) else "básico melhorado"
-        print(f"Análise concluída ({detector_usado}): {len(reformulated_analyses)} trechos com viés detectados")
-        return response
+        print(f"Análise concluída ({modo_usado.value}): {len(reformulated_analyses)} trechos com viés detectados")
+        return _model_response(response)
         
     except HTTPException:
         # Re-lança HTTPExceptions
@@ -300,6 +631,232 @@ async def analyze_article(request: AnalyzeRequest):
             detail=f"Erro interno do servidor: {str(e)}"
         )
 
+def _sse_event(event: str, data: Any) -> str:
+    """Formata um evento Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/analyze/stream")
+async def analyze_article_stream(request: AnalyzeRequest):
+    """
+    Analisa um artigo e envia reformulações e resumo via Server-Sent Events,
+    token a token, à medida que chegam da OpenAI.
+    
+    Eventos: 'analises' (trechos detectados, sem reformulação), 'reformulacao'
+    ({id, delta}), 'reformulacao_fim' ({id, texto}), 'resumo' ({delta}),
+    'resumo_fim' ({texto}), 'erro' e 'fim'.
+    
+    Erros de validação e de busca do artigo são retornados como HTTPException
+    antes de o stream começar.
+    """
+    # O deadline_ms conta a partir da chegada da requisição
+    started = time.perf_counter()
+    article_data, normalized_content = await asyncio.to_thread(_load_article, request.titulo_artigo)
+    modo = _resolve_detector_mode(request.modo_detector, request.usar_detector_avancado)
+    advanced_bias_detector = await _get_advanced_detector(wait=modo in ADVANCED_MODES)
+    modo, motivo_modo = _select_detector_mode(modo, normalized_content, advanced_bias_detector)
+    sentence_spans = await asyncio.to_thread(_sentence_spans, normalized_content, advanced_bias_detector)
+    total_segments_analyzed = _count_segments(normalized_content, sentence_spans)
+    bias_analyses, modo_usado, job = await asyncio.to_thread(
+        _detect_bias_until, normalized_content, modo, advanced_bias_detector, request.deadline_ms,
+        started, sentence_spans
+    )
+    
+    async def event_stream():
+        yield _sse_event("analises", {
+            "titulo": article_data['title'],
+            "url_wikipedia": article_data['url'],
+            "total_trechos_analisados": total_segments_analyzed,
+            "total_trechos_com_vies": len(bias_analyses),
+            "modo_detector": modo_usado.value,
+            "motivo_modo_detector": motivo_modo,
+            **_continuation_fields(job),
+            "analises_vies": [
+                {"id": i, **analysis.to_dict(exclude=("reformulacao_sugerida",))}
+                for i, analysis in enumerate(bias_analyses)
+            ]
+        })
+        
+        # Cada produtor escreve seus eventos na fila; None sinaliza término
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def produce_reformulation(segment_id: int, analysis: BiasRecord):
+            parts = []
+            try:
+                async for delta in text_reformulator.stream_reformulation(
+                    analysis.trecho_original, analysis.tipo_vies, analysis.explicacao
+                ):
+                    parts.append(delta)
+                    await queue.put(("reformulacao", {"id": segment_id, "delta": delta}))
+                await queue.put(("reformulacao_fim", {"id": segment_id, "texto": "".join(parts)}))
+            except Exception as e:
+                await queue.put(("erro", {"id": segment_id, "detalhes": str(e)}))
+            finally:
+                await queue.put(None)
+        
+        async def produce_summary():
+            parts = []
+            try:
+                async for delta in text_reformulator.stream_general_summary(bias_analyses, article_data['title']):
+                    parts.append(delta)
+                    await queue.put(("resumo", {"delta": delta}))
+                await queue.put(("resumo_fim", {"texto": "".join(parts)}))
+            except Exception as e:
+                await queue.put(("erro", {"detalhes": str(e)}))
+            finally:
+                await queue.put(None)
+        
+        producers = [asyncio.create_task(produce_reformulation(i, a)) for i, a in enumerate(bias_analyses)]
+        producers.append(asyncio.create_task(produce_summary()))
+        
+        try:
+            remaining = len(producers)
+            while remaining:
+                item = await queue.get()
+                if item is None:
+                    remaining -= 1
+                    continue
+                yield _sse_event(*item)
+            yield _sse_event("fim", {"total_trechos_com_vies": len(bias_analyses)})
+        finally:
+            # Cliente desconectou: cancela as chamadas em andamento
+            for producer in producers:
+                producer.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/analyze/continuation/{token}", response_model=ContinuationResponse)
+async def analyze_continuation(token: str, desde: int = 0, aguardar_ms: int = 0,
+                               orcamento_reformulacao_ms: Optional[int] = None):
+    """
+    Análises concluídas em segundo plano depois do prazo (deadline_ms) de uma
+    análise parcial. `desde` é o número de análises que o cliente já tem (na
+    primeira consulta, o total de analises_vies da resposta parcial; depois,
+    proximo_indice). Com aguardar_ms, espera até esse tempo pela conclusão.
+    """
+    job = await asyncio.to_thread(anytime_jobs.get, token)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Token de continuação desconhecido ou expirado.")
+    if aguardar_ms > 0 and not job.done:
+        await asyncio.to_thread(job.wait, aguardar_ms / 1000)
+    
+    # Estado lido antes das análises: concluida=True nunca deixa análises de fora
+    concluida, processados, novas = await asyncio.to_thread(job.snapshot, max(0, desde))
+    reformuladas = await text_reformulator.reformulate_analyses_async(novas, orcamento_reformulacao_ms)
+    return _model_response(ContinuationResponse(
+        token_continuacao=token,
+        concluida=concluida,
+        trechos_processados=processados,
+        trechos_pendentes=job.total - processados,
+        analises_vies=[a.to_model() for a in sorted(reformuladas, key=lambda a: a.posicao_inicio)],
+        proximo_indice=max(0, desde) + len(novas),
+        erro=job.error
+    ))
+
+def _span_analyzer(normalized_content: str, modo: DetectorMode, advanced_bias_detector=None):
+    """Função que analisa uma lista de trechos [início, fim) com o detector do
+    modo e retorna as análises de cada trecho (lista vazia se sem viés)"""
+    if modo == DetectorMode.FAST and not fast_bias_detector.available:
+        modo = DetectorMode.BASIC
+    if modo in (DetectorMode.ADVANCED, DetectorMode.CASCADE) and advanced_bias_detector is None:
+        modo = DetectorMode.BASIC
+    
+    def analyze_each(detector, spans):
+        results = []
+        for begin, end in spans:
+            analyses = detector.analyze_text(normalized_content[begin:end])
+            for analysis in analyses:
+                # Posições relativas ao trecho -> posições no artigo
+                analysis.posicao_inicio += begin
+                analysis.posicao_fim += begin
+            results.append(analyses)
+        return results
+    
+    def analyze_advanced(spans):
+        by_start = {}
+        for analysis in _advanced_to_basic(advanced_bias_detector.analyze_spans_advanced(normalized_content, spans)):
+            by_start.setdefault(analysis.posicao_inicio, []).append(analysis)
+        return [by_start.get(begin, []) for begin, _ in spans]
+    
+    def analyze_cascade(spans):
+        cheap_detector, _ = _cheap_detector()
+        flagged = [span for span, analyses in zip(spans, analyze_each(cheap_detector, spans)) if analyses]
+        advanced = dict(zip(flagged, analyze_advanced(flagged)))
+        return [advanced.get(span, []) for span in spans]
+    
+    if modo == DetectorMode.ADVANCED:
+        return analyze_advanced, modo
+    if modo == DetectorMode.CASCADE:
+        return analyze_cascade, modo
+    if modo == DetectorMode.FAST:
+        return (lambda spans: analyze_each(fast_bias_detector, spans)), modo
+    return (lambda spans: analyze_each(bias_detector, spans)), DetectorMode.BASIC
+
+def _run_sampling(sampler: StratifiedSampler, analyze_spans) -> Dict[str, Any]:
+    with detector_selector.track():
+        return sampler.run(analyze_spans)
+
+@app.post("/analyze/sample", response_model=SampleResponse)
+async def analyze_article_sample(request: SampleRequest):
+    """
+    Estima as métricas agregadas do artigo (overall_bias_score, proporção de
+    trechos com viés, distribuição dos tipos e métricas quantitativas) a partir
+    de uma amostra estratificada por seção e tamanho, com intervalos de
+    confiança de 95%. A amostra cresce até a largura dos intervalos ficar
+    abaixo de largura_alvo_ic ou até max_trechos, então o custo não depende do
+    tamanho do artigo. Não retorna os trechos nem reformulações.
+    """
+    article_data, normalized_content = await asyncio.to_thread(_load_article, request.titulo_artigo)
+    sampler = StratifiedSampler(
+        normalized_content,
+        raw_content=article_data['content'],
+        target_width=request.largura_alvo_ic or SAMPLING_TARGET_WIDTH,
+        max_segments=request.max_trechos or SAMPLING_MAX_SEGMENTS,
+        seed=request.semente
+    )
+    
+    modo = request.modo_detector or DetectorMode.ADVANCED
+    advanced_bias_detector = await _get_advanced_detector(wait=modo in ADVANCED_MODES)
+    # No auto, o custo é limitado pela amostra, não pelo artigo inteiro
+    sample_chars = min(len(normalized_content),
+                       sampler.max_segments * len(normalized_content) // max(sampler.population, 1))
+    modo, _ = _select_detector_mode(modo, normalized_content, advanced_bias_detector, sample_chars)
+    analyze_spans, modo_usado = _span_analyzer(normalized_content, modo, advanced_bias_detector)
+    
+    try:
+        estimate = await asyncio.to_thread(_run_sampling, sampler, analyze_spans)
+    except Exception as e:
+        print(f"Erro na amostragem: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
+    
+    print(f"🎲 Amostragem ({modo_usado.value}): {estimate['trechos_amostrados']}/{estimate['total_trechos']} "
+          f"trechos em {estimate.get('rodadas', 0)} rodada(s), precisão atingida: {estimate['precisao_atingida']}")
+    return _model_response(SampleResponse(
+        titulo=article_data['title'],
+        url_wikipedia=article_data['url'],
+        modo_detector=modo_usado,
+        **estimate
+    ))
+
+@app.get("/article-content/{content_hash}")
+async def article_content(content_hash: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Conteúdo normalizado de um artigo analisado recentemente, pelo hash
+    retornado nos perfis slim e highlights-only. O hash é o ETag: o conteúdo
+    é imutável, então clientes com cache recebem 304.
+    """
+    etag = f'"{content_hash}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    entry = await asyncio.to_thread(content_store.get, content_hash)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Conteúdo desconhecido ou expirado. Refaça a análise com perfil full.")
+    return FastJSONResponse({"hash_conteudo": content_hash, **entry}, headers=headers)
+
 @app.get("/test-wikipedia/{title}")
 async def test_wikipedia_search(title: str):
     """Endpoint de teste para buscar artigos na Wikipedia"""
@@ -353,12 +910,14 @@ async def test_bias_detection():
         return {"error": str(e)}
 
 @app.post("/analyze-advanced", response_model=dict)
-async def analyze_article_advanced(request: AnalyzeRequest):
+async def analyze_article_advanced(request: AnalyzeRequest, expandir: bool = False):
     """
     Analisa um artigo da Wikipedia usando técnicas avançadas de NLP
     
     Args:
         request: Objeto contendo o título do artigo
+        expandir: Inclui explicação, evidências e sugestões de todos os
+            segmentos (por padrão, obtidas sob demanda pelo analysis_id)
         
     Returns:
         Dict: Análise avançada completa com métricas detalhadas
@@ -366,50 +925,22 @@ async def analyze_article_advanced(request: AnalyzeRequest):
     Raises:
         HTTPException: Em caso de erro no processamento
     """
-    # Verifica se o detector avançado está disponível
-    if not ADVANCED_DETECTOR_AVAILABLE or advanced_bias_detector is None:
+    _reject_deadline(request.deadline_ms)
+    # Verifica se o detector avançado está disponível (aguardando o carregamento)
+    advanced_bias_detector = await _get_advanced_detector()
+    if advanced_bias_detector is None:
         raise HTTPException(
             status_code=503,
             detail="Detector avançado não disponível. Dependências de NLP não instaladas. Use o endpoint /analyze para análise básica."
         )
     
     try:
-        # Validação do título
-        if not validate_article_title(request.titulo_artigo):
-            raise HTTPException(
-                status_code=400,
-                detail="Título do artigo inválido. Use apenas caracteres alfanuméricos e espaços."
-            )
-        
-        # Busca o artigo na Wikipedia
-        print(f"🔍 Buscando artigo (análise avançada): {request.titulo_artigo}")
-        article_data = wikipedia_client.get_article_content(request.titulo_artigo)
-        
-        if not article_data:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Artigo '{request.titulo_artigo}' não encontrado na Wikipedia portuguesa."
-            )
-        
-        # Verifica se o artigo é relacionado à IA
-        if not wikipedia_client.is_ai_related(article_data['title'], article_data['content']):
-            raise HTTPException(
-                status_code=400,
-                detail="Este artigo não parece ser relacionado à Inteligência Artificial ou áreas correlatas."
-            )
-        
-        # Normaliza o conteúdo
-        normalized_content = normalize_text(article_data['content'])
-        
-        if len(normalized_content) < 100:
-            raise HTTPException(
-                status_code=400,
-                detail="Artigo muito curto para análise de viés."
-            )
+        print("🔍 Análise avançada solicitada")
+        article_data, normalized_content = await asyncio.to_thread(_load_article, request.titulo_artigo)
         
         # Análise avançada de viés
         print("🧠 Executando análise avançada de viés...")
-        advanced_analyses = advanced_bias_detector.analyze_text_advanced(normalized_content)
+        advanced_analyses = await asyncio.to_thread(advanced_bias_detector.analyze_text_advanced, normalized_content)
         
         if not advanced_analyses:
             return {
@@ -423,66 +954,47 @@ async def analyze_article_advanced(request: AnalyzeRequest):
         
         # Gera relatório abrangente
         print("📊 Gerando relatório abrangente...")
-        comprehensive_report = advanced_bias_detector.generate_comprehensive_report(advanced_analyses)
-        
-        # Converte analyses para formato compatível
-        converted_analyses = []
-        for analysis in advanced_analyses:
-            converted_analysis = {
-                "text_segment": analysis.text_segment,
-                "start_pos": analysis.start_pos,
-                "end_pos": analysis.end_pos,
-                "bias_types": [bt.value for bt in analysis.bias_types],
-                "confidence_scores": {bt.value: score for bt, score in analysis.confidence_scores.items()},
-                "overall_bias_score": analysis.overall_bias_score,
-                "explanation": analysis.explanation,
-                "evidence": analysis.evidence,
-                "reformulation_suggestions": analysis.reformulation_suggestions,
-                "semantic_features": {
-                    "sentiment_polarity": analysis.semantic_features.sentiment_polarity,
-                    "sentiment_confidence": analysis.semantic_features.sentiment_confidence,
-                    "subjectivity_score": analysis.semantic_features.subjectivity_score,
-                    "emotional_intensity": analysis.semantic_features.emotional_intensity,
-                    "certainty_level": analysis.semantic_features.certainty_level,
-                    "formality_score": analysis.semantic_features.formality_score
-                },
-                "syntactic_features": {
-                    "dependency_complexity": analysis.syntactic_features.dependency_complexity,
-                    "pos_diversity": analysis.syntactic_features.pos_diversity,
-                    "modal_verb_ratio": analysis.syntactic_features.modal_verb_ratio,
-                    "passive_voice_ratio": analysis.syntactic_features.passive_voice_ratio,
-                    "hedge_word_ratio": analysis.syntactic_features.hedge_word_ratio,
-                    "intensifier_ratio": analysis.syntactic_features.intensifier_ratio
-                }
-            }
-            converted_analyses.append(converted_analysis)
+        comprehensive_report = await asyncio.to_thread(advanced_bias_detector.generate_comprehensive_report, advanced_analyses)
         
-        # Reformula trechos usando análise avançada
+        # Segmentos compactos (id, posição, tipos e scores); explicação, evidências
+        # e sugestões são geradas só para os ids pedidos em /analyze-advanced/{analysis_id}/expand
+        analysis_id = await asyncio.to_thread(advanced_analysis_cache.put, advanced_analyses)
+        converted_analyses = advanced_analyses.compact()
+        if expandir:
+            for compact, expanded in zip(converted_analyses, advanced_analyses.expand(range(len(advanced_analyses)))):
+                compact.update(expanded)
+        
+        # Reformula trechos usando análise avançada (chamadas concorrentes)
         print("✏️ Reformulando trechos com IA...")
+        top_analyses = advanced_analyses[:5]  # Limita a 5 para não sobrecarregar a API
+        top_rows = top_analyses.rows
+        top_scores = top_rows["overall_bias_score"].tolist()
+        temp_analyses = [
+            # Registro temporário para o reformulador
+            BiasRecord(text, BIAS_TYPES[primary], top_analyses.explanations[i], "",
+                       start, end, top_scores[i])
+            for i, (text, primary, start, end) in enumerate(zip(
+                top_analyses.texts, top_analyses.primary_bias().tolist(),
+                top_rows["start_pos"].tolist(), top_rows["end_pos"].tolist()
+            ))
+        ]
+        
         advanced_reformulations = []
-        for analysis in advanced_analyses[:5]:  # Limita a 5 para não sobrecarregar a API
-            try:
-                # Cria BiasAnalysis temporário para o reformulador
-                temp_analysis = BiasAnalysis(
-                    trecho_original=analysis.text_segment,
-                    tipo_vies=analysis.bias_types[0] if analysis.bias_types else BiasType.LOADED_LANGUAGE,
-                    explicacao=analysis.explanation,
-                    reformulacao_sugerida="",
-                    posicao_inicio=analysis.start_pos,
-                    posicao_fim=analysis.end_pos,
-                    confianca=analysis.overall_bias_score
-                )
-                
-                reformulated = text_reformulator.reformulate_analyses([temp_analysis])
-                if reformulated:
-                    advanced_reformulations.append({
-                        "original": analysis.text_segment,
-                        "reformulated": reformulated[0].reformulacao_sugerida,
-                        "confidence": analysis.overall_bias_score,
-                        "bias_types": [bt.value for bt in analysis.bias_types]
-                    })
-            except Exception as e:
-                print(f"Erro na reformulação: {e}")
+        try:
+            reformulated = await text_reformulator.reformulate_analyses_async(
+                temp_analyses, request.orcamento_reformulacao_ms
+            )
+            for text, score, types, temp_analysis in zip(top_analyses.texts, top_scores,
+                                                         top_analyses.bias_type_values(), reformulated):
+                advanced_reformulations.append({
+                    "original": text,
+                    "reformulated": temp_analysis.reformulacao_sugerida,
+                    "provisional": temp_analysis.reformulacao_provisoria,
+                    "confidence": score,
+                    "bias_types": types
+                })
+        except Exception as e:
+            print(f"Erro na reformulação: {e}")
         
         # Monta resposta avançada
         response = {
@@ -492,6 +1004,7 @@ async def analyze_article_advanced(request: AnalyzeRequest):
             "url": article_data['url'],
             "content_length": len(normalized_content),
             "total_biased_segments": len(advanced_analyses),
+            "analysis_id": analysis_id,
             "advanced_analyses": converted_analyses,
             "comprehensive_report": comprehensive_report,
             "reformulations": advanced_reformulations,
@@ -526,6 +1039,16 @@ async def analyze_article_advanced(request: AnalyzeRequest):
             detail=f"Erro interno do servidor na análise avançada: {str(e)}"
         )
 
+@app.post("/analyze-advanced/{analysis_id}/expand")
+async def expand_advanced_analysis(analysis_id: str, request: ExpandRequest):
+    """Texto, explicação, evidências, sugestões de reformulação e features dos
+    segmentos indicados de uma análise avançada recente"""
+    table = await asyncio.to_thread(advanced_analysis_cache.get, analysis_id, await _get_advanced_detector())
+    if table is None:
+        raise HTTPException(status_code=404, detail="Análise desconhecida ou expirada. Refaça a análise avançada.")
+    segments = await asyncio.to_thread(table.expand, request.ids)
+    return {"analysis_id": analysis_id, "segments": segments}
+
 @app.get("/test-metrics")
 async def test_metrics():
     """Endpoint de teste para verificar se métricas aparecem"""
@@ -551,36 +1074,120 @@ async def check_models_status():
             "description": "Detector básico baseado em regex"
         },
         "advanced_detector": {
-            "loaded": ADVANCED_DETECTOR_AVAILABLE and advanced_bias_detector is not None,
-            "available": ADVANCED_DETECTOR_AVAILABLE
+            "loaded": advanced_model_loader.state == "ready",
+            "available": advanced_model_loader.available,
+            "loading_state": advanced_model_loader.state
         },
+        "fast_detector": fast_bias_detector.status(),
+        "detector_selection": detector_selector.status(),
+        "anytime": anytime_jobs.status(),
+        "advanced_analysis_cache": advanced_analysis_cache.stats(),
+        "content_store": content_store.stats(),
+        "profiling": profile_store.status(),
         "reformulator": {
-            "openai_integration": "disponível",
-                            "model": "gpt-4o-mini"
+            "openai_integration": "offline" if text_reformulator.offline else "disponível",
+                            "model": "gpt-4o-mini",
+            "cache": await asyncio.to_thread(text_reformulator.cache.stats)
         }
     }
     
     # Adiciona detalhes do detector avançado se disponível
-    if ADVANCED_DETECTOR_AVAILABLE and advanced_bias_detector is not None:
+    advanced_bias_detector = advanced_model_loader.detector
+    if advanced_bias_detector is not None:
         try:
+            # Lê o estado do registro em vez dos atributos, que recarregariam
+            # modelos descarregados por ociosidade
+            model_status = advanced_bias_detector.model_status
+            availability = {
+                "ready": "disponível",
+                "unloaded": "descarregado (recarregado sob demanda)",
+                "loading": "carregando",
+                "pending": "pendente",
+            }
             status["advanced_detector"].update({
-                "spacy_model": "disponível" if advanced_bias_detector.nlp else "não disponível",
-                "bert_model": "disponível" if advanced_bias_detector.bert_model else "não disponível", 
-                "sentiment_analyzer": "disponível" if advanced_bias_detector.sentiment_analyzer else "não disponível"
+                "spacy_model": availability.get(model_status["spacy"]["state"], "não disponível"),
+                "bert_model": availability.get(model_status["bert"]["state"], "não disponível"),
+                "sentiment_analyzer": availability.get(model_status["sentiment"]["state"], "não disponível"),
+                "models": advanced_model_loader.status()["models"],
+                "memory": advanced_bias_detector.models.summary(),
+                "inference": advanced_bias_detector.inference_stats(),
+                "inference_backends": {
+                    "requested": advanced_bias_detector.inference_backend,
+                    **advanced_bias_detector.inference_backends
+                }
             })
         except Exception as e:
             status["advanced_detector"]["error"] = str(e)
+    elif not advanced_model_loader.finished:
+        status["advanced_detector"]["message"] = "Modelos ainda em carregamento"
     else:
         status["advanced_detector"]["message"] = "Dependências avançadas não instaladas"
     
     return status
 
+def _update_memory_gauges():
+    """Memória do processo e dos modelos deste worker (chamada pelo timer de
+    cada worker e na coleta; a fila é atualizada pelos próprios batchers)"""
+    PROCESS_MEMORY.set(process_rss_bytes())
+    advanced_bias_detector = advanced_model_loader.detector
+    if advanced_bias_detector is None:
+        return
+    for name, entry in advanced_bias_detector.models.status().items():
+        MODEL_MEMORY.labels(name).set(entry["rss_mb"] * 1024 * 1024 if entry["state"] == "ready" else 0)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Métricas no formato de exposição do Prometheus: duração por etapa,
+    caches, trechos por detector, tokens OpenAI, fallbacks, filas e memória"""
+    content = render_metrics([_update_memory_gauges])
+    if content is None:
+        raise HTTPException(status_code=404, detail="Métricas desabilitadas ou prometheus_client não instalado.")
+    return PlainTextResponse(content, media_type=CONTENT_TYPE_LATEST)
+
+def _stored_profile(profile_id: str, x_admin_token: Optional[str]) -> Dict[str, Any]:
+    if not _is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Acesso restrito (X-Admin-Token).")
+    summary = profile_store.get(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado.")
+    return summary
+
+def _stored_stacks(profile_id: str) -> Optional[str]:
+    path = profile_store.path(profile_id, ".collapsed")
+    if path is None:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Tempo por etapa de uma requisição perfilada (somente administradores)"""
+    return await asyncio.to_thread(_stored_profile, profile_id, x_admin_token)
+
+@app.get("/profiles/{profile_id}/stacks")
+async def get_profile_stacks(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Pilhas amostradas em formato collapsed (flamegraph.pl, speedscope)"""
+    await asyncio.to_thread(_stored_profile, profile_id, x_admin_token)
+    stacks = await asyncio.to_thread(_stored_stacks, profile_id)
+    if stacks is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado.")
+    return PlainTextResponse(stacks)
+
+@app.get("/reformulation-cache/stats")
+async def reformulation_cache_stats():
+    """Estatísticas do cache de reformulações (acertos, falhas e taxa de acerto)"""
+    return await asyncio.to_thread(text_reformulator.cache.stats)
+
 @app.post("/analyze-detailed", response_model=DetailedAnalysisResponse)
 async def analyze_article_detailed(request: AnalysisRequest):
     """
     Analyze Wikipedia article with detailed step-by-step progress tracking
     """
+    _reject_deadline(request.deadline_ms)
     start_total_time = time.time()
+    # Com use_advanced=False o detector avançado não é usado nem aguardado
+    advanced_bias_detector = await _get_advanced_detector() if request.use_advanced is not False else None
+    advanced_available = advanced_bias_detector is not None
     
     # Initialize all steps
     steps = [
@@ -635,7 +1242,7 @@ async def analyze_article_detailed(request: AnalysisRequest):
         current_step.start_time = time.time()
         current_step.details = [
             f"Validando título: '{request.title}'",
-            f"Modo avançado: {'Disponível' if ADVANCED_DETECTOR_AVAILABLE else 'Não disponível'}",
+            f"Modo avançado: {'Disponível' if advanced_available else 'Não disponível'}",
             "Verificando parâmetros de entrada..."
         ]
         
@@ -653,7 +1260,7 @@ async def analyze_article_detailed(request: AnalysisRequest):
         current_step.metrics = {
             "título_válido": True,
             "caracteres": len(request.title),
-            "modo_avançado": ADVANCED_DETECTOR_AVAILABLE
+            "modo_avançado": advanced_available
         }
         
         # Step 2: Wikipedia Search
@@ -740,7 +1347,7 @@ async def analyze_article_detailed(request: AnalysisRequest):
         current_step.status = "running"
         current_step.start_time = time.time()
         
-        if ADVANCED_DETECTOR_AVAILABLE:
+        if advanced_available:
             current_step.details = [
                 "Carregando modelos avançados (spaCy, BERT)...",
                 "Análise semântica profunda...",
@@ -750,27 +1357,11 @@ async def analyze_article_detailed(request: AnalysisRequest):
             ]
             await asyncio.sleep(1.0)  # Advanced analysis takes longer
             
-            advanced_analyses = advanced_bias_detector.analyze_text_advanced(content)
+            advanced_analyses = await asyncio.to_thread(advanced_bias_detector.analyze_text_advanced, content)
             analysis_method = "Avançado (spaCy + BERT + XLM-RoBERTa)"
             
-            # Converter AdvancedBiasAnalysis para BiasAnalysis básico para compatibilidade
-            bias_analyses = []
-            for adv_analysis in advanced_analyses:
-                # Seleciona o tipo de viés com maior confiança
-                if adv_analysis.confidence_scores:
-                    best_bias_type = max(adv_analysis.confidence_scores.items(), key=lambda x: x[1])
-                    bias_type, confidence = best_bias_type
-                    
-                    basic_analysis = BiasAnalysis(
-                        trecho_original=adv_analysis.text_segment,
-                        tipo_vies=bias_type,
-                        explicacao=adv_analysis.explanation,
-                        reformulacao_sugerida="",  # Será preenchido depois
-                        posicao_inicio=adv_analysis.start_pos,
-                        posicao_fim=adv_analysis.end_pos,
-                        confianca=confidence
-                    )
-                    bias_analyses.append(basic_analysis)
+            # Converter AdvancedBiasAnalysis para registros básicos para compatibilidade
+            bias_analyses = _advanced_to_basic(advanced_analyses)
         else:
             current_step.details = [
                 "Analisando padrões de linguagem tendenciosa...",
@@ -822,10 +1413,12 @@ async def analyze_article_detailed(request: AnalysisRequest):
         await asyncio.sleep(0.8)
         
         reformulated_text = ""
-        if ADVANCED_DETECTOR_AVAILABLE and analysis_result.bias_detected:
+        if analysis_result.bias_detected:
             try:
                 # Reformula usando o método correto da classe TextReformulator
-                reformulated_analyses = text_reformulator.reformulate_analyses(bias_analyses)
+                reformulated_analyses = await text_reformulator.reformulate_analyses_async(
+                    bias_analyses, request.reformulation_budget_ms
+                )
                 reformulated_text = "\n\n".join([f"Trecho original: {analysis.trecho_original}\nVersão reformulada: {analysis.reformulacao_sugerida}" for analysis in reformulated_analyses[:3]])  # Limita a 3 exemplos
             except Exception as e:
                 print(f"Reformulation error: {e}")
@@ -855,11 +1448,12 @@ async def analyze_article_detailed(request: AnalysisRequest):
         # Calculate quantitative metrics for any text (even without bias)
         metricas_quantitativas = {}
         
-        if ADVANCED_DETECTOR_AVAILABLE and advanced_bias_detector is not None:
+        if advanced_available:
             # Calculate basic semantic and syntactic features for the entire text
             try:
-                semantic_features = advanced_bias_detector.analyze_semantic_features(content[:1000])  # Use first 1000 chars
-                syntactic_features = advanced_bias_detector.analyze_syntactic_features(content[:1000])
+                # Texto inteiro: os transformers processam textos longos em janelas
+                semantic_features = await asyncio.to_thread(advanced_bias_detector.analyze_semantic_features, content)
+                syntactic_features = await asyncio.to_thread(advanced_bias_detector.analyze_syntactic_features, content)
                 
                 metricas_quantitativas = {
                     "polaridade_media": semantic_features.sentiment_polarity,
@@ -872,7 +1466,7 @@ async def analyze_article_detailed(request: AnalysisRequest):
                 
                 # Always try to aggregate metrics from any analyses
                 if advanced_analyses:
-                    comprehensive_report = advanced_bias_detector.generate_comprehensive_report(advanced_analyses)
+                    comprehensive_report = await asyncio.to_thread(advanced_bias_detector.generate_comprehensive_report, advanced_analyses)
                     if 'semantic_profile' in comprehensive_report:
                         semantic_profile = comprehensive_report['semantic_profile']
                         metricas_quantitativas.update({
@@ -912,7 +1506,7 @@ async def analyze_article_detailed(request: AnalysisRequest):
 
         # Calculate total segments analyzed (same as in /analyze endpoint)
         total_segments_analyzed = 0
-        if ADVANCED_DETECTOR_AVAILABLE and advanced_bias_detector and advanced_bias_detector.nlp:
+        if advanced_available and advanced_bias_detector.nlp:
             doc = advanced_bias_detector.nlp(content)
             total_segments_analyzed = len([sent for sent in doc.sents if len(sent.text.strip()) >= 20])
             print(f"DEBUG DETAILED: spaCy encontrou {total_segments_analyzed} segmentos válidos")
@@ -928,7 +1522,8 @@ async def analyze_article_detailed(request: AnalysisRequest):
         final_result = AnalysisResponse(
             article_title=request.title,
             article_url=wikipedia_result["url"],
-            article_content=content[:500] + "..." if len(content) > 500 else content,
+            **await asyncio.to_thread(_detailed_content_fields, request.response_profile, wikipedia_result, content,
+                                      bias_analyses),
             ai_related=ai_relevance,
             bias_detected=analysis_result.bias_detected,
             overall_bias_score=analysis_result.overall_bias_score,
@@ -0,0 +1,191 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from .profiling import record_stage
+
+try:
+    # Com vários workers (gunicorn), PROMETHEUS_MULTIPROC_DIR deve estar definido
+    # antes desta importação para que as métricas de todos os processos sejam somadas
+    from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+                                   generate_latest, multiprocess)
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    Counter = Gauge = Histogram = None
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Desliga a coleta (as métricas viram no-ops e /metrics responde 404)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Intervalo (s) da atualização dos medidores de memória em cada worker
+METRICS_MEMORY_INTERVAL_SECONDS = float(os.getenv("METRICS_MEMORY_INTERVAL_SECONDS", "15"))
+
+# Etapas do pipeline medidas em bias_stage_duration_seconds
+STAGES = (
+    "wikipedia_search", "wikipedia_extract", "normalize", "spacy_parse", "sentiment", "bert",
+    "rule_detection", "reformulation", "summary", "serialization",
+)
+# Faixas (s) dos histogramas: de alguns ms (regras, serialização) a dezenas de s (artigo inteiro)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class _NoopMetric:
+    """Substituto das métricas sem prometheus_client ou com METRICS_ENABLED=false"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+def _metric(factory, *args, **kwargs):
+    if not (PROMETHEUS_AVAILABLE and METRICS_ENABLED):
+        return _NoopMetric()
+    return factory(*args, **kwargs)
+
+STAGE_SECONDS = _metric(
+    Histogram, "bias_stage_duration_seconds",
+    "Duração de cada etapa da análise", ["stage"], buckets=STAGE_BUCKETS,
+)
+CACHE_REQUESTS = _metric(
+    Counter, "bias_cache_requests_total",
+    "Consultas aos caches por resultado (hit/miss)", ["cache", "result"],
+)
+SEGMENTS_PROCESSED = _metric(
+    Counter, "bias_segments_processed_total",
+    "Trechos analisados por detector", ["detector"],
+)
+OPENAI_TOKENS = _metric(
+    Counter, "bias_openai_tokens_total",
+    "Tokens consumidos na API OpenAI", ["operation", "kind"],
+)
+FALLBACKS = _metric(
+    Counter, "bias_fallback_activations_total",
+    "Ativações de fallback (detector básico, reformulação por substituição, resumo padrão)", ["reason"],
+)
+# Medidores atualizados por cada worker: a fila ao entrar e sair dos lotes e a
+# memória por um timer (ver start_gauge_updater). Com vários workers, a fila é
+# somada e a memória é exposta por processo (rótulo pid)
+QUEUE_DEPTH = _metric(
+    Gauge, "bias_inference_queue_depth",
+    "Itens aguardando nas filas de inferência em lote", ["batcher"], multiprocess_mode="livesum",
+)
+MODEL_MEMORY = _metric(
+    Gauge, "bias_model_memory_bytes",
+    "Memória residente dos modelos carregados", ["model"], multiprocess_mode="liveall",
+)
+PROCESS_MEMORY = _metric(
+    Gauge, "bias_process_rss_bytes",
+    "Memória residente do processo", multiprocess_mode="liveall",
+)
+
+# Séries zeradas para todas as etapas desde a primeira coleta
+for _name in STAGES:
+    STAGE_SECONDS.labels(_name)
+
+@contextmanager
+def stage(name: str):
+    """Mede a duração do bloco no histograma da etapa (e no perfil da
+    requisição, se estiver sendo perfilada)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(name).observe(elapsed)
+        record_stage(name, elapsed)
+
+def timed(name: str):
+    """Decorador equivalente a `stage` para funções e corrotinas"""
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+def count_segments(detector: str, count: int):
+    if count:
+        SEGMENTS_PROCESSED.labels(detector).inc(count)
+
+def count_openai_tokens(operation: str, usage):
+    """Soma o `usage` de uma resposta da API (em streaming, o do último chunk)"""
+    if usage is None:
+        return
+    OPENAI_TOKENS.labels(operation, "prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    OPENAI_TOKENS.labels(operation, "completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+def fallback(reason: str, count: int = 1):
+    if count:
+        FALLBACKS.labels(reason).inc(count)
+
+_updater = None
+_updater_pid = None
+_updater_lock = threading.Lock()
+
+def start_gauge_updater(update: Callable[[], None], interval: float = METRICS_MEMORY_INTERVAL_SECONDS):
+    """Chama `update` a cada `interval` segundos numa thread do processo atual
+    (idempotente; em um worker criado por fork, inicia uma thread própria)"""
+    global _updater, _updater_pid
+    if not (PROMETHEUS_AVAILABLE and METRICS_ENABLED) or interval <= 0:
+        return
+    with _updater_lock:
+        if _updater is not None and _updater_pid == os.getpid():
+            return
+
+        def run():
+            while True:
+                try:
+                    update()
+                except Exception as e:
+                    print(f"⚠️ Erro ao atualizar métricas: {e}")
+                time.sleep(interval)
+
+        _updater = threading.Thread(target=run, name="metrics-gauges", daemon=True)
+        _updater_pid = os.getpid()
+        _updater.start()
+
+def render(collect: Optional[List[Callable[[], None]]] = None) -> Optional[bytes]:
+    """Exposição no formato texto do Prometheus (None se desabilitado).
+    `collect` atualiza os medidores antes da leitura."""
+    if not (PROMETHEUS_AVAILABLE and METRICS_ENABLED):
+        return None
+    for update in collect or []:
+        try:
+            update()
+        except Exception as e:
+            print(f"⚠️ Erro ao atualizar métricas: {e}")
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
+def mark_process_dead(pid: int):
+    """Descarta os medidores de um worker encerrado (hook child_exit do gunicorn)"""
+    if PROMETHEUS_AVAILABLE and PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,240 @@
+import ctypes
+import gc
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Orçamento de memória (MB) para os modelos carregados; 0 desativa o descarregamento
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+# Tempo sem uso (s) a partir do qual um modelo pode ser descarregado
+MODEL_IDLE_SECONDS = float(os.getenv("MODEL_IDLE_SECONDS", "600"))
+# Intervalo (s) entre verificações do orçamento
+MODEL_REAPER_INTERVAL = float(os.getenv("MODEL_REAPER_INTERVAL", "60"))
+
+def process_rss_bytes() -> int:
+    """RSS atual do processo (Linux via /proc; nos demais, o pico do getrusage)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss é em KB no Linux e em bytes no macOS
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+def process_memory_breakdown(pid: Optional[int] = None) -> Dict[str, Optional[float]]:
+    """RSS, PSS e memória privada/compartilhada do processo (o atual, ou `pid`) em MB (Linux).
+
+    Com workers criados por fork após o carregamento dos modelos, a memória
+    privada (USS) é o custo incremental de cada worker; os pesos aparecem
+    como compartilhados enquanto nenhuma página for escrita."""
+    fields = {"Rss": "rss_mb", "Pss": "pss_mb", "Shared_Clean": "shared_mb", "Shared_Dirty": "shared_mb",
+              "Private_Clean": "private_mb", "Private_Dirty": "private_mb"}
+    breakdown = {"rss_mb": None, "pss_mb": None, "shared_mb": None, "private_mb": None}
+    try:
+        with open(f"/proc/{pid or 'self'}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                key = fields.get(parts[0].rstrip(":"))
+                if key:
+                    breakdown[key] = (breakdown[key] or 0) + int(parts[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        if pid is None:
+            breakdown["rss_mb"] = process_rss_bytes() / (1024 * 1024)
+    return {key: round(value, 1) if value is not None else None for key, value in breakdown.items()}
+
+def release_freed_memory():
+    """Coleta lixo e devolve ao sistema a memória liberada pelo malloc (glibc)"""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+class _ModelEntry:
+    """Estado de um modelo registrado"""
+
+    def __init__(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]]):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.model = None
+        self.state = "pending"  # pending, loading, ready, unloaded, unavailable, failed
+        self.error = None
+        self.rss_bytes = 0
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.load_count = 0
+        self.warmed_up = False
+        self.last_used = None
+        self.lock = threading.Lock()
+
+class ModelRegistry:
+    """Ciclo de vida dos modelos: carregamento sob demanda com warm-up, medição
+    de memória e descarregamento dos ociosos quando o orçamento é excedido.
+
+    A memória de cada modelo é a variação do RSS do processo durante o seu
+    carregamento e warm-up, uma aproximação que basta para decidir o que
+    descarregar.
+    """
+
+    def __init__(self, memory_budget_mb: float = MODEL_MEMORY_BUDGET_MB,
+                 idle_seconds: float = MODEL_IDLE_SECONDS):
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self.idle_seconds = idle_seconds
+        self._entries: Dict[str, _ModelEntry] = {}
+        self._reaper = None
+        self._stop_reaper = threading.Event()
+
+    def register(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None):
+        """Registra um modelo. O loader retorna o modelo ou None se indisponível."""
+        self._entries[name] = _ModelEntry(name, loader, warmup)
+
+    def get(self, name: str):
+        """Retorna o modelo, carregando-o se necessário (None se indisponível)"""
+        entry = self._entries[name]
+        entry.last_used = time.time()
+        model = entry.model
+        if model is not None:
+            return model
+        if entry.state in ("unavailable", "failed"):
+            return None
+        return self.load(name)
+
+    def load(self, name: str, warmup: bool = True):
+        """Carrega e aquece o modelo (idempotente). Com warmup=False o warm-up
+        fica para warmup_all, p.ex. em cada worker após o fork."""
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.model is not None or entry.state in ("unavailable", "failed"):
+                return entry.model
+
+            if entry.state == "unloaded":
+                print(f"♻️ Recarregando modelo {name} sob demanda")
+            entry.state = "loading"
+            rss_before = process_rss_bytes()
+            start = time.perf_counter()
+            try:
+                model = entry.loader()
+            except Exception as e:
+                print(f"❌ Erro ao carregar modelo {name}: {e}")
+                entry.state = "failed"
+                entry.error = str(e)
+                return None
+            entry.load_seconds = round(time.perf_counter() - start, 3)
+
+            if model is None:
+                entry.state = "unavailable"
+                return None
+
+            if warmup:
+                self._warmup(entry, model)
+
+            entry.rss_bytes = max(process_rss_bytes() - rss_before, 0)
+            entry.model = model
+            entry.state = "ready"
+            entry.load_count += 1
+            entry.last_used = time.time()
+            return model
+
+    def _warmup(self, entry: _ModelEntry, model):
+        """A primeira inferência inicializa kernels, pools de threads e caches"""
+        if entry.warmup is not None:
+            start = time.perf_counter()
+            try:
+                entry.warmup(model)
+            except Exception as e:
+                print(f"⚠️ Warm-up do modelo {entry.name} falhou: {e}")
+            entry.warmup_seconds = round(time.perf_counter() - start, 3)
+        entry.warmed_up = True
+
+    def warmup_all(self):
+        """Aquece os modelos carregados que ainda não passaram pelo warm-up"""
+        for entry in self._entries.values():
+            with entry.lock:
+                if entry.model is not None and not entry.warmed_up:
+                    self._warmup(entry, entry.model)
+
+    def unload(self, name: str) -> bool:
+        """Descarrega o modelo; ele será recarregado no próximo uso"""
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.model is None:
+                return False
+            entry.model = None
+            entry.warmed_up = False
+            entry.state = "unloaded"
+        release_freed_memory()
+        print(f"💤 Modelo {name} descarregado (ocioso)")
+        return True
+
+    def loaded_bytes(self) -> int:
+        """Memória estimada dos modelos carregados"""
+        return sum(e.rss_bytes for e in self._entries.values() if e.model is not None)
+
+    def enforce_budget(self, now: Optional[float] = None) -> list:
+        """Descarrega modelos ociosos, do menos recentemente usado ao mais recente,
+        enquanto a memória dos modelos exceder o orçamento"""
+        if self.memory_budget_bytes <= 0:
+            return []
+        now = now or time.time()
+        idle = sorted(
+            (e for e in self._entries.values()
+             if e.model is not None and e.last_used is not None and now - e.last_used >= self.idle_seconds),
+            key=lambda e: e.last_used
+        )
+        unloaded = []
+        for entry in idle:
+            if self.loaded_bytes() <= self.memory_budget_bytes:
+                break
+            if self.unload(entry.name):
+                unloaded.append(entry.name)
+        return unloaded
+
+    def start_reaper(self, interval: float = MODEL_REAPER_INTERVAL):
+        """Inicia a thread que aplica o orçamento periodicamente (idempotente)"""
+        if self.memory_budget_bytes <= 0 or (self._reaper is not None and self._reaper.is_alive()):
+            return
+        self._stop_reaper.clear()
+
+        def reap():
+            while not self._stop_reaper.wait(interval):
+                try:
+                    self.enforce_budget()
+                except Exception as e:
+                    print(f"Erro ao aplicar orçamento de memória dos modelos: {e}")
+
+        self._reaper = threading.Thread(target=reap, name="model-reaper", daemon=True)
+        self._reaper.start()
+
+    def stop_reaper(self):
+        self._stop_reaper.set()
+
+    def status(self) -> Dict[str, Any]:
+        """Estado, memória e uso de cada modelo"""
+        now = time.time()
+        return {
+            name: {
+                "state": e.state,
+                "error": e.error,
+                "rss_mb": round(e.rss_bytes / (1024 * 1024), 1),
+                "load_seconds": e.load_seconds,
+                "warmup_seconds": e.warmup_seconds,
+                "load_count": e.load_count,
+                "idle_seconds": round(now - e.last_used, 1) if e.last_used else None,
+            }
+            for name, e in self._entries.items()
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Memória total do processo e dos modelos, com o orçamento configurado"""
+        return {
+            "pid": os.getpid(),
+            "process_rss_mb": round(process_rss_bytes() / (1024 * 1024), 1),
+            "process_memory": process_memory_breakdown(),
+            "models_rss_mb": round(self.loaded_bytes() / (1024 * 1024), 1),
+            "memory_budget_mb": round(self.memory_budget_bytes / (1024 * 1024), 1) or None,
+            "idle_seconds": self.idle_seconds,
+        }
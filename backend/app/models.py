@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
+from dataclasses import dataclass, fields
 from enum import Enum
 
 class BiasType(str, Enum):
@@ -22,6 +23,24 @@ class BiasType(str, Enum):
     TEMPORAL_BIAS = "vies_temporal"
     AUTHORITY_BIAS = "vies_autoridade"
 
+class DetectorMode(str, Enum):
+    BASIC = "basico"
+    ADVANCED = "avancado"
+    # Classificador linear destilado do detector avançado
+    FAST = "rapido"
+    # Detector barato em todas as sentenças e avançado só nas sinalizadas
+    CASCADE = "cascata"
+    # Escolhe entre avançado, cascata e básico conforme tamanho do artigo e carga
+    AUTO = "auto"
+
+class ResponseProfile(str, Enum):
+    # Conteúdo completo do artigo na resposta
+    FULL = "full"
+    # Conteúdo substituído por hash e revisão (GET /article-content/{hash})
+    SLIM = "slim"
+    # Sem o conteúdo: só os trechos sinalizados com uma janela de contexto
+    HIGHLIGHTS = "highlights-only"
+
 class BiasAnalysis(BaseModel):
     trecho_original: str
     tipo_vies: BiasType
@@ -36,19 +55,82 @@ class BiasAnalysis(BaseModel):
     complexidade_sintatica: Optional[float] = 0.0
     nivel_certeza: Optional[float] = 0.0
     score_formalidade: Optional[float] = 0.0
+    # True quando a reformulação veio do fallback por estouro do orçamento de latência
+    reformulacao_provisoria: Optional[bool] = False
+
+@dataclass(slots=True)
+class BiasRecord:
+    """Detecção interna dos detectores (sem validação). Tem os mesmos campos
+    de BiasAnalysis e é convertida uma única vez, ao montar a resposta."""
+    trecho_original: str
+    tipo_vies: BiasType
+    explicacao: str
+    reformulacao_sugerida: str
+    posicao_inicio: int
+    posicao_fim: int
+    confianca: float
+    intensidade_emocional: float = 0.0
+    polaridade_sentimento: float = 0.0
+    complexidade_sintatica: float = 0.0
+    nivel_certeza: float = 0.0
+    score_formalidade: float = 0.0
+    reformulacao_provisoria: bool = False
+
+    def to_dict(self, exclude: tuple = ()) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in BIAS_RECORD_FIELDS if name not in exclude}
+
+    def to_model(self) -> BiasAnalysis:
+        # Os campos já têm os tipos do modelo: dispensa a validação
+        return BiasAnalysis.model_construct(**self.to_dict())
+
+BIAS_RECORD_FIELDS = tuple(f.name for f in fields(BiasRecord))
 
 class AnalyzeRequest(BaseModel):
     titulo_artigo: str
     usar_detector_avancado: Optional[bool] = True
+    # Tem precedência sobre usar_detector_avancado quando informado
+    modo_detector: Optional[DetectorMode] = None
+    # Orçamento de latência da reformulação em ms (None usa o padrão do servidor)
+    orcamento_reformulacao_ms: Optional[int] = None
+    # Prazo da detecção avançada em ms: retorna o que estiver pronto e continua
+    # em segundo plano (None analisa o artigo inteiro). Suportado apenas em
+    # /analyze e /analyze/stream; /analyze-advanced responde 400
+    deadline_ms: Optional[int] = None
+    perfil_resposta: Optional[ResponseProfile] = ResponseProfile.FULL
+
+class SampleRequest(BaseModel):
+    titulo_artigo: str
+    modo_detector: Optional[DetectorMode] = None
+    # Largura máxima do IC 95% (None usa SAMPLING_TARGET_WIDTH)
+    largura_alvo_ic: Optional[float] = None
+    # Teto de trechos analisados (None usa SAMPLING_MAX_SEGMENTS)
+    max_trechos: Optional[int] = None
+    # Semente do sorteio, para amostras reproduzíveis
+    semente: Optional[int] = None
 
 class AnalysisRequest(BaseModel):
     title: str
     use_advanced: Optional[bool] = True
+    reformulation_budget_ms: Optional[int] = None
+    response_profile: Optional[ResponseProfile] = ResponseProfile.FULL
+    # Não suportado aqui (responde 400): o prazo vale para /analyze e /analyze/stream
+    deadline_ms: Optional[int] = None
+
+class Highlight(BaseModel):
+    posicao_inicio: int
+    posicao_fim: int
+    contexto_antes: str
+    trecho: str
+    contexto_depois: str
 
 class AnalysisResponse(BaseModel):
     article_title: str
     article_url: str
-    article_content: str
+    # Omitido nos perfis slim e highlights-only
+    article_content: Optional[str] = None
+    content_hash: Optional[str] = None
+    revision_id: Optional[int] = None
+    highlights: Optional[List[Highlight]] = None
     ai_related: bool
     bias_detected: bool
     overall_bias_score: float
@@ -63,7 +145,13 @@ class AnalysisResponse(BaseModel):
 
 class AnalyzeResponse(BaseModel):
     titulo: str
-    conteudo_original: str
+    # Omitido nos perfis slim e highlights-only (hash_conteudo/revisao_id o identificam)
+    conteudo_original: Optional[str] = None
+    hash_conteudo: Optional[str] = None
+    revisao_id: Optional[int] = None
+    perfil_resposta: Optional[ResponseProfile] = ResponseProfile.FULL
+    # Perfil highlights-only: trechos sinalizados com contexto
+    destaques: Optional[List[Highlight]] = None
     url_wikipedia: str
     analises_vies: List[BiasAnalysis]
     resumo_geral: str
@@ -74,7 +162,55 @@ class AnalyzeResponse(BaseModel):
     score_emocional_geral: Optional[float] = 0.0
     score_complexidade_geral: Optional[float] = 0.0
     distribuicao_tipos_vies: Optional[Dict[str, int]] = None
-    
+    # Detector que efetivamente rodou e, no modo auto, o motivo da escolha
+    modo_detector: Optional[DetectorMode] = None
+    motivo_modo_detector: Optional[str] = None
+    # Com deadline_ms: resultado parcial e token para buscar o restante
+    analise_parcial: Optional[bool] = False
+    token_continuacao: Optional[str] = None
+    trechos_pendentes: Optional[int] = 0
+
+class ContinuationResponse(BaseModel):
+    token_continuacao: str
+    concluida: bool
+    trechos_processados: int
+    trechos_pendentes: int
+    # Análises concluídas a partir de `desde`, já reformuladas
+    analises_vies: List[BiasAnalysis]
+    # Valor de `desde` na próxima consulta
+    proximo_indice: int
+    erro: Optional[str] = None
+
+class ExpandRequest(BaseModel):
+    # Ids dos segmentos (campo "id" em advanced_analyses) a expandir
+    ids: List[int]
+
+class Estimate(BaseModel):
+    valor: float
+    ic_inferior: float
+    ic_superior: float
+    largura: float
+
+class SampleResponse(BaseModel):
+    titulo: str
+    url_wikipedia: str
+    modo_detector: DetectorMode
+    total_trechos: int       # Trechos do artigo (população)
+    trechos_amostrados: int
+    secoes: int = 1
+    estratos: int = 0
+    rodadas: int = 0
+    amostragem_completa: bool
+    precisao_atingida: bool
+    largura_alvo_ic: Optional[float] = None
+    nivel_confianca: float = 0.95
+    # Estimativas com intervalo de confiança
+    overall_bias_score: Optional[Estimate] = None
+    proporcao_trechos_com_vies: Optional[Estimate] = None
+    total_trechos_com_vies: Optional[Estimate] = None
+    distribuicao_tipos_vies: Dict[str, Estimate] = {}
+    metricas_quantitativas: Dict[str, Estimate] = {}
+
 class ErrorResponse(BaseModel):
     erro: str
     detalhes: Optional[str] = None 
\ No newline at end of file
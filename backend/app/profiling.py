@@ -0,0 +1,208 @@
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+# Token exigido no cabeçalho X-Admin-Token para perfilar uma requisição
+# (vazio desativa o profiling: o middleware nem é registrado)
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN", "")
+# Fração das requisições marcadas que são de fato perfiladas
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "1.0"))
+# Intervalo (ms) entre amostras das pilhas
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+# Diretório dos perfis e quantidade máxima guardada (os mais antigos são apagados)
+PROFILING_DIR = os.getenv("PROFILING_DIR", "data/profiles")
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "50"))
+# Perfis simultâneos por processo (o amostrador lê as pilhas de todas as threads)
+PROFILING_MAX_CONCURRENT = int(os.getenv("PROFILING_MAX_CONCURRENT", "1"))
+
+PROFILING_ENABLED = bool(PROFILING_ADMIN_TOKEN)
+
+# Folhas de pilha de threads ociosas (esperando fila, lock ou socket), contadas à parte
+IDLE_LEAVES = {
+    ("threading.py", "wait"), ("queue.py", "get"), ("selectors.py", "select"), ("thread.py", "_worker"),
+}
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$")
+
+# Perfil da requisição em andamento (propagado para asyncio.to_thread)
+_current: ContextVar[Optional["Profile"]] = ContextVar("profile", default=None)
+
+def current_profile() -> Optional["Profile"]:
+    return _current.get()
+
+def record_stage(name: str, seconds: float):
+    """Soma a duração da etapa ao perfil da requisição atual, se houver"""
+    profile = _current.get()
+    if profile is not None:
+        profile.add_stage(name, seconds)
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class Profile:
+    """Perfil por amostragem de uma requisição: pilhas de todas as threads a
+    cada `interval_ms` (formato collapsed, para flamegraph.pl/speedscope) e o
+    tempo de cada etapa do pipeline executada no contexto da requisição."""
+
+    def __init__(self, label: str, interval_ms: float = PROFILING_INTERVAL_MS):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.label = label
+        self.interval = max(interval_ms, 1.0) / 1000
+        self.stages = defaultdict(lambda: {"count": 0, "total_ms": 0.0})
+        self.stacks = Counter()
+        self.samples = self.idle_samples = 0
+        self.started = time.time()
+        self.wall_ms = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name=f"profiler-{self.id[-8:]}", daemon=True)
+        self._token = None
+
+    def start(self) -> "Profile":
+        self._start = time.perf_counter()
+        self._token = _current.set(self)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.wall_ms = (time.perf_counter() - self._start) * 1000
+        if self._token is not None:
+            try:
+                _current.reset(self._token)
+            except ValueError:
+                # Encerrado em outro contexto (fim de uma resposta em streaming)
+                pass
+
+    def add_stage(self, name: str, seconds: float):
+        with self._lock:
+            stage = self.stages[name]
+            stage["count"] += 1
+            stage["total_ms"] += seconds * 1000
+
+    def _sample(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+                    self.idle_samples += 1
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                name: {"count": s["count"], "total_ms": round(s["total_ms"], 2)}
+                for name, s in sorted(self.stages.items(), key=lambda item: -item[1]["total_ms"])
+            }
+        return {
+            "profile_id": self.id,
+            "label": self.label,
+            "started_at": self.started,
+            "wall_ms": round(self.wall_ms, 2),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+            "stages": stages,
+            "pid": os.getpid(),
+        }
+
+class ProfileStore:
+    """Perfis gravados em disco (<id>.json com as etapas e <id>.collapsed com
+    as pilhas), limitados a `max_profiles`"""
+
+    def __init__(self, directory: str = PROFILING_DIR, max_profiles: int = PROFILING_MAX_PROFILES,
+                 sample_rate: float = PROFILING_SAMPLE_RATE, max_concurrent: int = PROFILING_MAX_CONCURRENT):
+        self.directory = directory
+        self.max_profiles = max(1, max_profiles)
+        self.sample_rate = sample_rate
+        self.max_concurrent = max(1, max_concurrent)
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def begin(self, label: str) -> Optional[Profile]:
+        """Inicia um perfil, respeitando a taxa de amostragem e o limite de
+        perfis simultâneos; None se a requisição não for perfilada"""
+        if random.random() >= self.sample_rate:
+            return None
+        with self._lock:
+            if self._running >= self.max_concurrent:
+                return None
+            self._running += 1
+        return Profile(label).start()
+
+    def finish(self, profile: Profile):
+        profile.stop()
+        with self._lock:
+            self._running -= 1
+        try:
+            self._save(profile)
+        except OSError as e:
+            print(f"⚠️ Erro ao gravar perfil {profile.id}: {e}")
+            return
+        print(f"🔬 Perfil {profile.id} ({profile.label}): {profile.wall_ms:.0f} ms, {profile.samples} amostras")
+
+    def _save(self, profile: Profile):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, f"{profile.id}.collapsed"), "w", encoding="utf-8") as f:
+            for stack, count in profile.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(os.path.join(self.directory, f"{profile.id}.json"), "w", encoding="utf-8") as f:
+            json.dump(profile.summary(), f, ensure_ascii=False, indent=2)
+        self._prune()
+
+    def _prune(self):
+        summaries = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in summaries[:max(0, len(summaries) - self.max_profiles)]:
+            for suffix in (".json", ".collapsed"):
+                try:
+                    os.remove(os.path.join(self.directory, entry.name[:-5] + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def path(self, profile_id: str, suffix: str) -> Optional[str]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = os.path.join(self.directory, profile_id + suffix)
+        return path if os.path.exists(path) else None
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        path = self.path(profile_id, ".json")
+        if path is None:
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def status(self) -> Dict[str, Any]:
+        profiles = 0
+        if os.path.isdir(self.directory):
+            profiles = sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+        return {
+            "enabled": PROFILING_ENABLED,
+            "directory": self.directory,
+            "profiles": profiles,
+            "max_profiles": self.max_profiles,
+            "sample_rate": self.sample_rate,
+            "running": self._running,
+        }
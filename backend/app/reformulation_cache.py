@@ -0,0 +1,139 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from .models import BiasType
+
+REFORMULATION_CACHE_PATH = os.getenv("REFORMULATION_CACHE_PATH", "data/reformulation_cache.sqlite3")
+REFORMULATION_CACHE_MEMORY_SIZE = int(os.getenv("REFORMULATION_CACHE_MEMORY_SIZE", "2048"))
+
+class ReformulationCache:
+    """Cache de reformulações em SQLite com uma frente LRU em memória.
+
+    A chave é o hash do texto original, do tipo de viés, do modelo e da versão
+    do template de prompt; mudar qualquer um deles invalida a entrada.
+    """
+
+    def __init__(self, path: Optional[str] = REFORMULATION_CACHE_PATH,
+                 memory_size: int = REFORMULATION_CACHE_MEMORY_SIZE):
+        self.path = path or None
+        self.memory_size = max(0, memory_size)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+        self._conn = None
+        self._connect()
+
+    def _connect(self):
+        """Abre (ou cria) o banco SQLite do cache"""
+        if self.path:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    """CREATE TABLE IF NOT EXISTS reformulations (
+                        key TEXT PRIMARY KEY,
+                        bias_type TEXT NOT NULL,
+                        model TEXT NOT NULL,
+                        prompt_version TEXT NOT NULL,
+                        reformulation TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )"""
+                )
+                self._conn.commit()
+                print(f"✓ Cache de reformulações em {self.path}")
+            except sqlite3.Error as e:
+                print(f"⚠️ Cache de reformulações em disco indisponível ({e}), usando apenas memória")
+                self._conn = None
+
+    def reopen(self):
+        """Reabre a conexão em um processo filho: conexões SQLite não podem ser
+        compartilhadas entre processos criados por fork"""
+        with self._lock:
+            self._conn = None
+            self._connect()
+
+    @staticmethod
+    def make_key(original_text: str, bias_type: BiasType, model: str, prompt_version: str) -> str:
+        """Hash estável de (texto, tipo de viés, modelo, versão do prompt)"""
+        raw = "\x1f".join([model, prompt_version, bias_type.value, original_text.strip()])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, original_text: str, bias_type: BiasType, model: str, prompt_version: str) -> Optional[str]:
+        """Retorna a reformulação em cache ou None"""
+        key = self.make_key(original_text, bias_type, model, prompt_version)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[0]
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT reformulation, created_at FROM reformulations WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    print(f"Erro ao ler cache de reformulações: {e}")
+                    row = None
+                if row is not None:
+                    self._remember(key, row[0], row[1])
+                    self._stats["disk_hits"] += 1
+                    return row[0]
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, original_text: str, bias_type: BiasType, model: str, prompt_version: str, reformulation: str):
+        """Armazena uma reformulação gerada pelo LLM junto com o timestamp"""
+        key = self.make_key(original_text, bias_type, model, prompt_version)
+        created_at = time.time()
+
+        with self._lock:
+            self._remember(key, reformulation, created_at)
+            self._stats["writes"] += 1
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO reformulations VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, bias_type.value, model, prompt_version, reformulation, created_at)
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    print(f"Erro ao gravar cache de reformulações: {e}")
+
+    def _remember(self, key: str, reformulation: str, created_at: float):
+        """Insere na frente LRU, descartando a entrada menos usada quando cheia"""
+        if self.memory_size == 0:
+            return
+        self._memory[key] = (reformulation, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas de uso e taxa de acerto"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = None
+            if self._conn is not None:
+                try:
+                    stats["disk_entries"] = self._conn.execute("SELECT COUNT(*) FROM reformulations").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        stats["path"] = self.path if self._conn is not None else None
+        return stats
@@ -1,13 +1,216 @@
 import openai
-from typing import List
-from .models import BiasAnalysis, BiasType
+from typing import AsyncIterator, List, Optional
+from .models import BiasRecord, BiasType
+from .reformulation_cache import ReformulationCache
+from .substitution import SubstitutionEngine
+from .metrics import cache_lookup, count_openai_tokens, fallback, timed
+from . import tracing
+import asyncio
 import json
+import os
+import random
 import re
+import time
+
+# Configuração do caminho assíncrono de reformulação
+REFORMULATION_MAX_CONCURRENCY = int(os.getenv("REFORMULATION_MAX_CONCURRENCY", "5"))
+REFORMULATION_TIMEOUT = float(os.getenv("REFORMULATION_TIMEOUT", "20"))
+REFORMULATION_MAX_RETRIES = int(os.getenv("REFORMULATION_MAX_RETRIES", "2"))
+REFORMULATION_BACKOFF_BASE = float(os.getenv("REFORMULATION_BACKOFF_BASE", "0.5"))
+# Número de trechos enviados num único prompt (1 desativa o modo em lote)
+REFORMULATION_BATCH_SIZE = int(os.getenv("REFORMULATION_BATCH_SIZE", "8"))
+# Orçamento de latência padrão da etapa de reformulação por requisição (0 desativa)
+REFORMULATION_BUDGET_MS = float(os.getenv("REFORMULATION_BUDGET_MS", "10000"))
+# Modo offline: nenhuma chamada à API, apenas a reformulação por substituição
+REFORMULATION_OFFLINE = os.getenv("REFORMULATION_OFFLINE", "false").lower() in ("1", "true", "yes")
+# Endereço alternativo da API compatível com a OpenAI (ex.: o simulador do teste de carga)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+REFORMULATION_MODEL = "gpt-4o-mini"
+# Incrementar ao alterar os prompts de reformulação, invalidando o cache
+REFORMULATION_PROMPT_VERSION = "1"
+REFORMULATION_SYSTEM_PROMPT = "Você é um especialista em escrita neutra e objetiva para textos acadêmicos e científicos. Sempre responda em português brasileiro."
+SUMMARY_SYSTEM_PROMPT = "Você é um especialista em análise de texto e neutralidade editorial. Sempre responda em português brasileiro de forma clara e objetiva."
+
+# Prefixos que o modelo às vezes coloca antes da reformulação
+REFORMULATION_PREFIXES = [
+    "TEXTO REFORMULADO:",
+    "Reformulação:",
+    "Versão neutra:",
+    "Texto reformulado:"
+]
+
+class _StreamingCleaner:
+    """Aplica incrementalmente a limpeza de _clean_reformulation sobre tokens em streaming.
+
+    Retém o início da resposta até saber se é um prefixo conhecido e retém
+    espaços finais até saber se ainda vem texto. Uma resposta que começa com
+    aspa é retida inteira: as aspas só são removidas se ela também terminar
+    com aspa, como em _clean_reformulation.
+    """
+
+    _MAX_PREFIX = max(len(prefix) for prefix in REFORMULATION_PREFIXES)
+
+    def __init__(self):
+        self._head = ""
+        self._started = False
+        self._tail = ""
+
+    def feed(self, delta: str) -> str:
+        """Recebe um delta do modelo e retorna o texto já seguro para enviar"""
+        if self._started:
+            return self._emit(delta)
+
+        self._head += delta
+        text = self._strip_prefixes(self._head.lstrip())
+        if not text or text.startswith('"') or (len(text) < self._MAX_PREFIX and
+                        any(prefix.startswith(text) for prefix in REFORMULATION_PREFIXES)):
+            return ""
+
+        self._started = True
+        return self._emit(text)
+
+    def finish(self) -> str:
+        """Descarrega o que restou retido; espaços finais são descartados"""
+        if not self._started:
+            text = self._strip_prefixes(self._head.strip())
+            if text.startswith('"') and text.endswith('"'):
+                text = text[1:-1]
+            return text
+        return ""
+
+    def _emit(self, text: str) -> str:
+        text = self._tail + text
+        trailing = re.search(r'\s*$', text)
+        self._tail = trailing.group(0)
+        return text[:trailing.start()]
+
+    @staticmethod
+    def _strip_prefixes(text: str) -> str:
+        for prefix in REFORMULATION_PREFIXES:
+            if text.startswith(prefix):
+                text = text[len(prefix):].lstrip()
+        return text
+
+# Tabelas do modo de fallback/offline. As chaves são termos literais
+# (comparados sem diferenciar maiúsculas e com limites de palavra).
+FALLBACK_REPLACEMENTS = {
+    # Linguagem carregada - apenas substituições seguras
+    "obviamente": "de acordo com os dados",
+    "claramente": "conforme observado",
+    "certamente": "segundo evidências",
+    "definitivamente": "com base em",
+    "absolutamente": "segundo análises",
+    
+    # Termos exagerados
+    "revolucionário": "inovador",
+    "extraordinário": "notável",
+    "fantástico": "significativo",
+    "incrível": "relevante",
+    "terrível": "problemático",
+    "horrível": "inadequado",
+    
+    # Intensificadores e advérbios problemáticos
+    "significativamente": "de forma considerável",
+    "drasticamente": "de maneira acentuada",
+    "extremamente": "muito",
+    "tremendamente": "consideravelmente",
+    "incrivelmente": "notavelmente",
+    
+    # Termos que implicam julgamento
+    "controverso": "objeto de debate",
+    "polêmico": "que gera discussão",
+    "questionável": "passível de análise",
+    "duvidoso": "incerto",
+    "suspeito": "que requer verificação",
+    
+    # Absolutos problemáticos
+    "sempre": "frequentemente",
+    "nunca": "raramente",
+    "todos": "a maioria dos",
+    "ninguém": "poucos",
+    "completamente": "amplamente",
+    "totalmente": "substancialmente",
+    
+    # Marcadores de opinião
+    "deve ser": "pode ser considerado",
+    "precisa ser": "seria recomendável que seja",
+    "é essencial": "é considerado importante",
+    "é fundamental": "é relevante",
+    
+    # Expressões de certeza excessiva
+    "sem dúvida": "segundo análises",
+    "com certeza": "provavelmente",
+    "é óbvio que": "indica que",
+    "é claro que": "sugere que"
+}
+
+# Padrões específicos para linguagem emocional
+EMOTIONAL_NEUTRALIZATIONS = {
+    # Transformações contextuais para textos políticos/estatísticos
+    "caíram significativamente": "apresentaram redução",
+    "tiveram ganhos reais": "registraram crescimento",
+    "se expandiram": "aumentaram",
+    "melhorias significativas": "melhorias observadas",
+    "avanços consideráveis": "progressos registrados",
+    "progressos extraordinários": "progressos notáveis",
+}
+
+# Padrões específicos para linguagem carregada
+LOADED_NEUTRALIZATIONS = {
+    # Julgamentos legais e políticos
+    "em um julgamento controverso": "em um julgamento que gerou debate",
+    "operação controversa": "operação que foi objeto de discussão",
+    "decisão polêmica": "decisão que dividiu opiniões",
+    "medida questionável": "medida que gerou questionamentos",
+    "atitude suspeita": "atitude que levantou questões",
+    
+    # Qualificações excessivas
+    "completamente inadequado": "inadequado",
+    "totalmente inaceitável": "inaceitável",
+    "absolutamente necessário": "necessário",
+}
+
+def _trace_usage(call_span, response):
+    """Tokens da chamada como atributos do span"""
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        tracing.set_attributes(call_span, prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
 
 class TextReformulator:
-    def __init__(self, api_key: str):
-        openai.api_key = api_key
-        self.client = openai.OpenAI(api_key=api_key)
+    def __init__(self, api_key: str, max_concurrency: int = REFORMULATION_MAX_CONCURRENCY,
+                 timeout: float = REFORMULATION_TIMEOUT, max_retries: int = REFORMULATION_MAX_RETRIES,
+                 batch_size: int = REFORMULATION_BATCH_SIZE, cache: ReformulationCache = None,
+                 budget_ms: float = REFORMULATION_BUDGET_MS, offline: bool = REFORMULATION_OFFLINE):
+        self.offline = offline
+        if offline:
+            self.client = None
+            self.async_client = None
+            print("📴 Reformulador em modo offline (sem chamadas à OpenAI)")
+        else:
+            openai.api_key = api_key
+            self.client = openai.OpenAI(api_key=api_key, base_url=OPENAI_BASE_URL)
+            # Cliente assíncrono; os retries ficam a cargo de _call_with_retry
+            self.async_client = openai.AsyncOpenAI(api_key=api_key, base_url=OPENAI_BASE_URL, max_retries=0)
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.batch_size = max(1, batch_size)
+        self.cache = cache if cache is not None else ReformulationCache()
+        self.budget_ms = budget_ms
+        # Chamadas que estouraram o orçamento continuam em segundo plano e
+        # alimentam o cache para as próximas requisições
+        self._background_tasks = set()
+        
+        # Tabelas de substituição compiladas uma única vez (uma regex por tipo de viés)
+        self._emotional_engine = SubstitutionEngine(EMOTIONAL_NEUTRALIZATIONS)
+        self._loaded_engine = SubstitutionEngine(LOADED_NEUTRALIZATIONS)
+        self._fallback_engines = {
+            None: SubstitutionEngine(FALLBACK_REPLACEMENTS),
+            BiasType.EMOTIONAL_LANGUAGE: SubstitutionEngine({**FALLBACK_REPLACEMENTS, **EMOTIONAL_NEUTRALIZATIONS}),
+            BiasType.LOADED_LANGUAGE: SubstitutionEngine({**FALLBACK_REPLACEMENTS, **LOADED_NEUTRALIZATIONS}),
+        }
+        self._semaphore = None
         
         self.bias_type_descriptions = {
             BiasType.LOADED_LANGUAGE: "linguagem carregada ou tendenciosa",
@@ -17,7 +220,9 @@ class TextReformulator:
             BiasType.EMOTIONAL_LANGUAGE: "linguagem emocionalmente carregada"
         }
     
-    def reformulate_analyses(self, analyses: List[BiasAnalysis]) -> List[BiasAnalysis]:
+    @timed("reformulation")
+    @tracing.traced("reformulator.reformulate", lambda self, analyses, *args, **kwargs: {"segments": len(analyses)})
+    def reformulate_analyses(self, analyses: List[BiasRecord]) -> List[BiasRecord]:
         """Reformula todos os trechos com viés detectado"""
         reformulated_analyses = []
         
@@ -41,15 +246,342 @@ class TextReformulator:
         
         return reformulated_analyses
     
+    @timed("reformulation")
+    @tracing.traced("reformulator.reformulate", lambda self, analyses, *args, **kwargs: {"segments": len(analyses)})
+    async def reformulate_analyses_async(self, analyses: List[BiasRecord],
+                                         budget_ms: Optional[float] = None) -> List[BiasRecord]:
+        """Reformula todos os trechos concorrentemente, limitado por max_concurrency.
+        Com batch_size > 1 os trechos são agrupados em prompts com vários segmentos.
+        Trechos já presentes no cache não geram chamadas à API.
+        
+        Trechos cuja resposta não chega dentro do orçamento (budget_ms, ou o padrão
+        da instância) recebem a reformulação de fallback e são marcados com
+        reformulacao_provisoria; a chamada segue em segundo plano e grava no cache."""
+        if self.offline:
+            for analysis in analyses:
+                analysis.reformulacao_sugerida = self._fallback_reformulation(analysis.trecho_original, analysis.tipo_vies)
+            return list(analyses)
+        
+        pending = []
+        # Consultas ao SQLite numa thread, fora do event loop
+        cached_texts = await asyncio.to_thread(
+            lambda: [self._get_cached(analysis.trecho_original, analysis.tipo_vies) for analysis in analyses]
+        )
+        for analysis, cached in zip(analyses, cached_texts):
+            if cached is not None:
+                analysis.reformulacao_sugerida = cached
+            else:
+                pending.append(analysis)
+        
+        tracing.set_attributes(tracing.current_span(), cached=len(analyses) - len(pending))
+        if not pending:
+            return list(analyses)
+        
+        if self.batch_size > 1 and len(pending) > 1:
+            groups = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+        else:
+            groups = [[analysis] for analysis in pending]
+        
+        tasks = [asyncio.ensure_future(self._reformulate_group_async(group)) for group in groups]
+        timeout = self._budget_seconds(budget_ms)
+        done, not_done = await asyncio.wait(tasks, timeout=timeout)
+        
+        for group, task in zip(groups, tasks):
+            if task in done:
+                try:
+                    results = task.result()
+                except Exception as e:
+                    print(f"Erro ao reformular texto: {e}")
+                    # Mantém o texto original se houver erro
+                    results = [analysis.trecho_original for analysis in group]
+                for analysis, result in zip(group, results):
+                    analysis.reformulacao_sugerida = result
+            else:
+                for analysis in group:
+                    analysis.reformulacao_sugerida = self._fallback_reformulation(analysis.trecho_original, analysis.tipo_vies)
+                    analysis.reformulacao_provisoria = True
+                self._keep_in_background(task)
+        
+        if not_done:
+            provisional = sum(len(group) for group, task in zip(groups, tasks) if task in not_done)
+            print(f"⏱️ Orçamento de reformulação esgotado: {provisional} trecho(s) com reformulação provisória")
+            tracing.set_attributes(tracing.current_span(), provisional=provisional)
+        
+        return list(analyses)
+    
+    async def _reformulate_group_async(self, group: List[BiasRecord]) -> List[str]:
+        """Reformula um grupo de trechos: chamada individual ou em lote"""
+        if len(group) == 1:
+            analysis = group[0]
+            return [await self._reformulate_single_text_async(
+                analysis.trecho_original, analysis.tipo_vies, analysis.explicacao, check_cache=False
+            )]
+        return await self._reformulate_batch_async(group)
+    
+    def _budget_seconds(self, budget_ms: Optional[float]) -> Optional[float]:
+        """Converte o orçamento em segundos; None significa sem prazo"""
+        budget = self.budget_ms if budget_ms is None else budget_ms
+        return budget / 1000 if budget and budget > 0 else None
+    
+    def _keep_in_background(self, task: asyncio.Task):
+        """Mantém referência à tarefa até terminar, para que não seja coletada"""
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    @tracing.traced("reformulator.batch", lambda self, batch, *args, **kwargs: {"segments": len(batch)})
+    async def _reformulate_batch_async(self, batch: List[BiasRecord]) -> List[str]:
+        """Reformula vários trechos numa única chamada com saída JSON estruturada.
+        Itens ausentes ou inválidos na resposta são refeitos individualmente."""
+        reformulations = {}
+        
+        try:
+            response = await self._call_with_retry(
+                model=REFORMULATION_MODEL,
+                messages=self._reformulation_messages(self._build_batch_prompt(batch)),
+                max_tokens=min(500 * len(batch), 4000),
+                temperature=0.3,
+                response_format={"type": "json_object"}
+            )
+            count_openai_tokens("reformulation", response.usage)
+            reformulations = self._parse_batch_response(response.choices[0].message.content, len(batch))
+            await asyncio.to_thread(lambda: [
+                self._set_cached(batch[i].trecho_original, batch[i].tipo_vies, reformulated)
+                for i, reformulated in reformulations.items()
+            ])
+        except Exception as e:
+            print(f"Erro na reformulação em lote ({len(batch)} trechos): {e}")
+        
+        missing = [i for i in range(len(batch)) if i not in reformulations]
+        if missing:
+            print(f"⚠️ {len(missing)} de {len(batch)} trechos sem reformulação válida no lote, refazendo individualmente")
+            retried = await asyncio.gather(
+                *(self._reformulate_single_text_async(batch[i].trecho_original, batch[i].tipo_vies, batch[i].explicacao,
+                                                      check_cache=False)
+                  for i in missing)
+            )
+            reformulations.update(zip(missing, retried))
+        
+        return [reformulations[i] for i in range(len(batch))]
+    
+    @tracing.traced("reformulator.single", lambda self, original_text, *args, **kwargs: {"chars": len(original_text)})
     def _reformulate_single_text(self, original_text: str, bias_type: BiasType, explanation: str) -> str:
         """Reformula um único trecho de texto"""
         
+        if self.offline:
+            return self._fallback_reformulation(original_text, bias_type)
+        
+        cached = self._get_cached(original_text, bias_type)
+        if cached is not None:
+            return cached
+        
+        prompt = self._build_reformulation_prompt(original_text, bias_type, explanation)
+
+        try:
+            with tracing.span("openai.chat_completion", model=REFORMULATION_MODEL, max_tokens=500) as call_span:
+                response = self.client.chat.completions.create(
+                    model=REFORMULATION_MODEL,
+                    messages=self._reformulation_messages(prompt),
+                    max_tokens=500,
+                    temperature=0.3
+                )
+                _trace_usage(call_span, response)
+            
+            count_openai_tokens("reformulation", response.usage)
+            reformulated = self._clean_reformulation(response.choices[0].message.content)
+            self._set_cached(original_text, bias_type, reformulated)
+            return reformulated
+            
+        except Exception as e:
+            print(f"Erro na API da OpenAI: {e}")
+            return self._fallback_reformulation(original_text, bias_type)
+    
+    @tracing.traced("reformulator.single", lambda self, original_text, *args, **kwargs: {"chars": len(original_text)})
+    async def _reformulate_single_text_async(self, original_text: str, bias_type: BiasType, explanation: str,
+                                             check_cache: bool = True) -> str:
+        """Versão assíncrona de _reformulate_single_text com timeout e retry"""
+        
+        if check_cache:
+            cached = await self._get_cached_async(original_text, bias_type)
+            if cached is not None:
+                return cached
+        
+        prompt = self._build_reformulation_prompt(original_text, bias_type, explanation)
+        
+        try:
+            response = await self._call_with_retry(
+                model=REFORMULATION_MODEL,
+                messages=self._reformulation_messages(prompt),
+                max_tokens=500,
+                temperature=0.3
+            )
+            
+            count_openai_tokens("reformulation", response.usage)
+            reformulated = self._clean_reformulation(response.choices[0].message.content)
+            await self._set_cached_async(original_text, bias_type, reformulated)
+            return reformulated
+            
+        except Exception as e:
+            print(f"Erro na API da OpenAI: {e}")
+            return self._fallback_reformulation(original_text, bias_type)
+    
+    def _get_cached(self, original_text: str, bias_type: BiasType):
+        """Consulta o cache de reformulações"""
+        cached = self.cache.get(original_text, bias_type, REFORMULATION_MODEL, REFORMULATION_PROMPT_VERSION)
+        cache_lookup("reformulation", cached is not None)
+        return cached
+    
+    def _set_cached(self, original_text: str, bias_type: BiasType, reformulated: str):
+        """Armazena no cache uma reformulação vinda do LLM (nunca as de fallback)"""
+        if reformulated:
+            self.cache.set(original_text, bias_type, REFORMULATION_MODEL, REFORMULATION_PROMPT_VERSION, reformulated)
+    
+    async def _get_cached_async(self, original_text: str, bias_type: BiasType):
+        """_get_cached numa thread: a consulta ao SQLite não bloqueia o event loop"""
+        return await asyncio.to_thread(self._get_cached, original_text, bias_type)
+    
+    async def _set_cached_async(self, original_text: str, bias_type: BiasType, reformulated: str):
+        """_set_cached numa thread (a gravação no SQLite faz commit)"""
+        if reformulated:
+            await asyncio.to_thread(self._set_cached, original_text, bias_type, reformulated)
+    
+    async def _call_with_retry(self, **request_kwargs):
+        """Chama a API assíncrona respeitando o limite de concorrência, com timeout por
+        chamada e retry com backoff exponencial com jitter"""
+        semaphore = self._get_semaphore()
+        
+        with tracing.span("openai.chat_completion", model=request_kwargs.get("model"),
+                          max_tokens=request_kwargs.get("max_tokens")) as call_span:
+            attempt = 0
+            semaphore_wait = 0.0
+            while True:
+                try:
+                    queued = time.perf_counter()
+                    async with semaphore:
+                        # Espera por uma vaga no limite de concorrência (somada entre tentativas)
+                        semaphore_wait += time.perf_counter() - queued
+                        tracing.set_attributes(call_span, attempts=attempt + 1,
+                                               semaphore_wait_ms=round(semaphore_wait * 1000, 2))
+                        response = await asyncio.wait_for(
+                            self.async_client.chat.completions.create(**request_kwargs),
+                            timeout=self.timeout
+                        )
+                    _trace_usage(call_span, response)
+                    return response
+                except (asyncio.TimeoutError, openai.APIConnectionError, openai.RateLimitError,
+                        openai.InternalServerError) as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    # Full jitter: espera aleatória entre 0 e base * 2^tentativa
+                    delay = random.uniform(0, REFORMULATION_BACKOFF_BASE * (2 ** attempt))
+                    print(f"⚠️ Chamada OpenAI falhou ({type(e).__name__}), nova tentativa em {delay:.2f}s")
+                    attempt += 1
+                    await asyncio.sleep(delay)
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Semáforo que limita as chamadas simultâneas à API"""
+        if self._semaphore is None:
+            # Criado sob demanda para ficar associado ao event loop em execução
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+    
+    async def _stream_completion(self, operation: str, **request_kwargs) -> AsyncIterator[str]:
+        """Gera os deltas de texto de uma chamada em streaming; a vaga no limite de
+        concorrência fica ocupada até o fim do stream. O uso de tokens vem no
+        último chunk (sem choices) e é contabilizado em `operation`"""
+        async with self._get_semaphore():
+            stream = await asyncio.wait_for(
+                self.async_client.chat.completions.create(
+                    stream=True, stream_options={"include_usage": True}, **request_kwargs
+                ),
+                timeout=self.timeout
+            )
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    count_openai_tokens(operation, chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    
+    async def stream_reformulation(self, original_text: str, bias_type: BiasType, explanation: str) -> AsyncIterator[str]:
+        """Reformula um trecho enviando os tokens à medida que chegam.
+        Prefixos e aspas são removidos incrementalmente; em caso de erro antes do
+        primeiro token é enviada a reformulação de fallback."""
+        if self.offline:
+            yield self._fallback_reformulation(original_text, bias_type)
+            return
+        
+        cached = await self._get_cached_async(original_text, bias_type)
+        if cached is not None:
+            yield cached
+            return
+        
+        cleaner = _StreamingCleaner()
+        emitted = []
+        try:
+            async for delta in self._stream_completion(
+                "reformulation",
+                model=REFORMULATION_MODEL,
+                messages=self._reformulation_messages(
+                    self._build_reformulation_prompt(original_text, bias_type, explanation)
+                ),
+                max_tokens=500,
+                temperature=0.3
+            ):
+                text = cleaner.feed(delta)
+                if text:
+                    emitted.append(text)
+                    yield text
+            text = cleaner.finish()
+            if text:
+                emitted.append(text)
+                yield text
+        except Exception as e:
+            print(f"Erro na API da OpenAI (streaming): {e}")
+            if not emitted:
+                yield self._fallback_reformulation(original_text, bias_type)
+            return
+        
+        await self._set_cached_async(original_text, bias_type, "".join(emitted))
+    
+    async def stream_general_summary(self, analyses: List[BiasRecord], article_title: str) -> AsyncIterator[str]:
+        """Versão em streaming de generate_general_summary"""
+        if not analyses:
+            yield f"Nenhum viés significativo foi detectado no artigo '{article_title}'."
+            return
+        
+        bias_counts = self._count_bias_types(analyses)
+        if self.offline:
+            yield self._fallback_summary(bias_counts, len(analyses), article_title)
+            return
+        
+        emitted = False
+        try:
+            async for delta in self._stream_completion(
+                "summary",
+                model=REFORMULATION_MODEL,
+                messages=self._summary_messages(self._build_summary_prompt(bias_counts, len(analyses), article_title)),
+                max_tokens=400,
+                temperature=0.4
+            ):
+                if not emitted:
+                    delta = delta.lstrip()
+                    if not delta:
+                        continue
+                emitted = True
+                yield delta
+        except Exception as e:
+            print(f"Erro ao gerar resumo (streaming): {e}")
+            if not emitted:
+                yield self._fallback_summary(bias_counts, len(analyses), article_title)
+    
+    def _build_reformulation_prompt(self, original_text: str, bias_type: BiasType, explanation: str) -> str:
+        """Monta o prompt de reformulação para um trecho"""
+        
         bias_description = self.bias_type_descriptions.get(bias_type, "texto tendencioso")
         
         # Cria prompt específico baseado no tipo de viés
         specific_instructions = self._get_specific_instructions(bias_type)
         
-        prompt = f"""Você é um especialista em escrita neutra e objetiva. Sua tarefa é reformular textos para remover viés e torná-los mais neutros e factuais.
+        return f"""Você é um especialista em escrita neutra e objetiva. Sua tarefa é reformular textos para remover viés e torná-los mais neutros e factuais.
 
 TEXTO ORIGINAL:
 "{original_text}"
@@ -75,167 +607,124 @@ INSTRUÇÕES ESPECÍFICAS PARA ESTE TIPO DE VIÉS:
 IMPORTANTE: Você DEVE modificar o texto. NÃO retorne o texto original inalterado. Faça as mudanças necessárias para torná-lo mais neutro.
 
 TEXTO REFORMULADO:"""
+    
+    def _build_batch_prompt(self, batch: List[BiasRecord]) -> str:
+        """Monta um prompt único para vários trechos; as instruções gerais e as
+        específicas de cada tipo de viés aparecem uma única vez"""
+        
+        bias_types = []
+        for analysis in batch:
+            if analysis.tipo_vies not in bias_types:
+                bias_types.append(analysis.tipo_vies)
+        
+        instructions_block = "\n".join(
+            f"[{self.bias_type_descriptions.get(bt, 'texto tendencioso')}]\n{self._get_specific_instructions(bt).strip()}"
+            for bt in bias_types
+        )
+        
+        segments_block = "\n\n".join(
+            f"""TRECHO {i}:
+TEXTO ORIGINAL: "{analysis.trecho_original}"
+TIPO DE VIÉS: {self.bias_type_descriptions.get(analysis.tipo_vies, 'texto tendencioso')}
+EXPLICAÇÃO DO PROBLEMA: {analysis.explicacao}"""
+            for i, analysis in enumerate(batch)
+        )
+        
+        return f"""Você é um especialista em escrita neutra e objetiva. Sua tarefa é reformular cada um dos trechos abaixo para remover viés e torná-los mais neutros e factuais.
 
+INSTRUÇÕES GERAIS PARA REFORMULAÇÃO:
+1. Mantenha todas as informações factuais do texto original
+2. Remova ou substitua termos tendenciosos por alternativas neutras
+3. Adicione qualificadores quando necessário (ex: "segundo estudos", "de acordo com")
+4. Evite afirmações categóricas sem evidência
+5. Use linguagem mais objetiva e científica
+6. Mantenha o texto em português brasileiro
+7. Preserve o comprimento aproximado do texto original
+8. Reformule cada trecho de forma independente
+
+INSTRUÇÕES ESPECÍFICAS POR TIPO DE VIÉS:
+{instructions_block}
+
+{segments_block}
+
+IMPORTANTE: Você DEVE modificar cada texto. NÃO retorne os textos originais inalterados.
+
+Responda APENAS com um objeto JSON no formato:
+{{"reformulacoes": [{{"id": 0, "texto": "texto reformulado"}}, ...]}}
+com exatamente um item para cada trecho, usando o número do TRECHO como id."""
+    
+    def _parse_batch_response(self, content: str, batch_length: int) -> dict:
+        """Valida a resposta JSON do lote e retorna {id: reformulação} apenas para itens válidos"""
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Você é um especialista em escrita neutra e objetiva para textos acadêmicos e científicos. Sempre responda em português brasileiro."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=500,
-                temperature=0.3
-            )
-            
-            reformulated = response.choices[0].message.content.strip()
-            
-            # Remove possíveis prefixos da resposta
-            prefixes_to_remove = [
-                "TEXTO REFORMULADO:",
-                "Reformulação:",
-                "Versão neutra:",
-                "Texto reformulado:"
-            ]
-            
-            for prefix in prefixes_to_remove:
-                if reformulated.startswith(prefix):
-                    reformulated = reformulated[len(prefix):].strip()
-            
-            # Remove aspas se presentes
-            if reformulated.startswith('"') and reformulated.endswith('"'):
-                reformulated = reformulated[1:-1]
-            
-            return reformulated
-            
-        except Exception as e:
-            print(f"Erro na API da OpenAI: {e}")
-            return self._fallback_reformulation(original_text, bias_type)
+            data = json.loads(content)
+        except (json.JSONDecodeError, TypeError):
+            print("⚠️ Resposta do lote não é um JSON válido")
+            return {}
+        
+        items = data.get("reformulacoes") if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return {}
+        
+        reformulations = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            segment_id = item.get("id")
+            text = item.get("texto")
+            if isinstance(segment_id, str) and segment_id.isdigit():
+                segment_id = int(segment_id)
+            if (not isinstance(segment_id, int) or isinstance(segment_id, bool) or not 0 <= segment_id < batch_length
+                    or not isinstance(text, str) or not text.strip()):
+                continue
+            reformulations.setdefault(segment_id, self._clean_reformulation(text))
+        
+        return reformulations
     
-    def _fallback_reformulation(self, original_text: str, bias_type: BiasType) -> str:
-        """Reformulação básica caso a API falhe"""
-        
-        fallback_replacements = {
-            # Linguagem carregada - apenas substituições seguras
-            "obviamente": "de acordo com os dados",
-            "claramente": "conforme observado",
-            "certamente": "segundo evidências",
-            "definitivamente": "com base em",
-            "absolutamente": "segundo análises",
-            
-            # Termos exagerados
-            "revolucionário": "inovador",
-            "extraordinário": "notável",
-            "fantástico": "significativo",
-            "incrível": "relevante",
-            "terrível": "problemático",
-            "horrível": "inadequado",
-            
-            # Intensificadores e advérbios problemáticos
-            "significativamente": "de forma considerável",
-            "drasticamente": "de maneira acentuada",
-            "extremamente": "muito",
-            "tremendamente": "consideravelmente",
-            "incrivelmente": "notavelmente",
-            
-            # Termos que implicam julgamento
-            "controverso": "objeto de debate",
-            "polêmico": "que gera discussão",
-            "questionável": "passível de análise",
-            "duvidoso": "incerto",
-            "suspeito": "que requer verificação",
-            
-            # Absolutos problemáticos - apenas quando no início de afirmação
-            " sempre ": " frequentemente ",
-            " nunca ": " raramente ",
-            " todos ": " a maioria dos ",
-            " ninguém ": " poucos ",
-            " completamente ": " amplamente ",
-            " totalmente ": " substancialmente ",
-            
-            # Marcadores de opinião
-            "deve ser": "pode ser considerado",
-            "precisa ser": "seria recomendável que seja",
-            "é essencial": "é considerado importante",
-            "é fundamental": "é relevante",
-            
-            # Expressões de certeza excessiva
-            "sem dúvida": "segundo análises",
-            "com certeza": "provavelmente",
-            "é óbvio que": "indica que",
-            "é claro que": "sugere que"
-        }
+    def _reformulation_messages(self, prompt: str) -> List[dict]:
+        """Mensagens de chat para uma reformulação"""
+        return [
+            {
+                "role": "system",
+                "content": REFORMULATION_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    def _clean_reformulation(self, content: str) -> str:
+        """Remove prefixos e aspas da resposta do modelo"""
+        reformulated = content.strip()
+        
+        # Remove possíveis prefixos da resposta
+        for prefix in REFORMULATION_PREFIXES:
+            if reformulated.startswith(prefix):
+                reformulated = reformulated[len(prefix):].strip()
         
-        reformulated = original_text
-        
-        # Aplicação mais cuidadosa das substituições
-        for old_term, new_term in fallback_replacements.items():
-            # Verifica se a substituição não vai gerar texto nonsense
-            if old_term in reformulated.lower():
-                # Para substituições de palavras isoladas, usa word boundaries
-                if old_term.strip() == old_term:  # Se não tem espaços nas bordas
-                    pattern = r'\b' + re.escape(old_term) + r'\b'
-                    reformulated = re.sub(pattern, new_term, reformulated, flags=re.IGNORECASE)
-                else:
-                    # Para frases, substitui diretamente
-                    reformulated = reformulated.replace(old_term, new_term)
-        
-        # Reformulações específicas por tipo de viés
-        if bias_type == BiasType.EMOTIONAL_LANGUAGE:
-            reformulated = self._apply_emotional_neutralization(reformulated)
-        elif bias_type == BiasType.LOADED_LANGUAGE:
-            reformulated = self._apply_loaded_language_neutralization(reformulated)
+        # Remove aspas se presentes
+        if reformulated.startswith('"') and reformulated.endswith('"'):
+            reformulated = reformulated[1:-1]
         
         return reformulated
     
+    def _fallback_reformulation(self, original_text: str, bias_type: BiasType) -> str:
+        """Reformulação básica caso a API falhe (ou no modo offline).
+        
+        Usa as tabelas de substituição compiladas em __init__: o texto é
+        percorrido uma única vez, inclusive as neutralizações por tipo de viés."""
+        if not self.offline:
+            fallback("reformulation_substitution")
+        engine = self._fallback_engines.get(bias_type, self._fallback_engines[None])
+        return engine.apply(original_text)
+    
     def _apply_emotional_neutralization(self, text: str) -> str:
         """Aplica neutralização específica para linguagem emocional"""
-        
-        # Padrões específicos para linguagem emocional
-        emotional_neutralizations = {
-            # Transformações contextuais para textos políticos/estatísticos
-            r'\bcaíram significativamente\b': 'apresentaram redução',
-            r'\btiveram ganhos reais\b': 'registraram crescimento',
-            r'\bse expandiram\b': 'aumentaram',
-            r'\bmelhorias significativas\b': 'melhorias observadas',
-            r'\bavanços consideráveis\b': 'progressos registrados',
-            r'\bprogressos extraordinários\b': 'progressos notáveis',
-        }
-        
-        result = text
-        for pattern, replacement in emotional_neutralizations.items():
-            result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
-        
-        return result
+        return self._emotional_engine.apply(text)
     
     def _apply_loaded_language_neutralization(self, text: str) -> str:
         """Aplica neutralização específica para linguagem carregada"""
-        
-        # Padrões específicos para linguagem carregada
-        loaded_neutralizations = {
-            # Julgamentos legais e políticos
-            r'\bem um julgamento controverso\b': 'em um julgamento que gerou debate',
-            r'\boperação controversa\b': 'operação que foi objeto de discussão',
-            r'\bdecisão polêmica\b': 'decisão que dividiu opiniões',
-            r'\bmedida questionável\b': 'medida que gerou questionamentos',
-            r'\batitude suspeita\b': 'atitude que levantou questões',
-            
-            # Qualificações excessivas
-            r'\bcompletamente inadequado\b': 'inadequado',
-            r'\btotalmente inaceitável\b': 'inaceitável',
-            r'\babsolutamente necessário\b': 'necessário',
-        }
-        
-        result = text
-        for pattern, replacement in loaded_neutralizations.items():
-            result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
-        
-        return result
+        return self._loaded_engine.apply(text)
     
     def _get_specific_instructions(self, bias_type: BiasType) -> str:
         """Retorna instruções específicas baseadas no tipo de viés"""
@@ -271,28 +760,95 @@ TEXTO REFORMULADO:"""
         
         return instructions_map.get(bias_type, "• Torne o texto mais neutro e objetivo, removendo linguagem tendenciosa.")
     
-    def generate_general_summary(self, analyses: List[BiasAnalysis], article_title: str) -> str:
+    @timed("summary")
+    @tracing.traced("reformulator.summary", lambda self, analyses, *args, **kwargs: {"segments": len(analyses)})
+    def generate_general_summary(self, analyses: List[BiasRecord], article_title: str) -> str:
         """Gera um resumo geral da análise de viés"""
         
         if not analyses:
             return f"Nenhum viés significativo foi detectado no artigo '{article_title}'."
         
+        bias_counts = self._count_bias_types(analyses)
+        if self.offline:
+            return self._fallback_summary(bias_counts, len(analyses), article_title)
+        
+        summary_prompt = self._build_summary_prompt(bias_counts, len(analyses), article_title)
+
+        try:
+            with tracing.span("openai.chat_completion", model=REFORMULATION_MODEL, max_tokens=400) as call_span:
+                response = self.client.chat.completions.create(
+                    model=REFORMULATION_MODEL,
+                    messages=self._summary_messages(summary_prompt),
+                    max_tokens=400,
+                    temperature=0.4
+                )
+                _trace_usage(call_span, response)
+            
+            count_openai_tokens("summary", response.usage)
+            return response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            print(f"Erro ao gerar resumo: {e}")
+            return self._fallback_summary(bias_counts, len(analyses), article_title)
+    
+    @timed("summary")
+    @tracing.traced("reformulator.summary", lambda self, analyses, *args, **kwargs: {"segments": len(analyses)})
+    async def generate_general_summary_async(self, analyses: List[BiasRecord], article_title: str,
+                                             budget_ms: Optional[float] = None) -> str:
+        """Versão assíncrona de generate_general_summary; usa o resumo básico se
+        a resposta não chegar dentro do orçamento de latência"""
+        
+        if not analyses:
+            return f"Nenhum viés significativo foi detectado no artigo '{article_title}'."
+        
+        bias_counts = self._count_bias_types(analyses)
+        if self.offline:
+            return self._fallback_summary(bias_counts, len(analyses), article_title)
+        
+        summary_prompt = self._build_summary_prompt(bias_counts, len(analyses), article_title)
+        
+        try:
+            response = await asyncio.wait_for(
+                self._call_with_retry(
+                    model=REFORMULATION_MODEL,
+                    messages=self._summary_messages(summary_prompt),
+                    max_tokens=400,
+                    temperature=0.4
+                ),
+                timeout=self._budget_seconds(budget_ms)
+            )
+            
+            count_openai_tokens("summary", response.usage)
+            return response.choices[0].message.content.strip()
+            
+        except asyncio.TimeoutError:
+            print("⏱️ Orçamento esgotado ao gerar resumo, usando resumo básico")
+            return self._fallback_summary(bias_counts, len(analyses), article_title)
+        except Exception as e:
+            print(f"Erro ao gerar resumo: {e}")
+            return self._fallback_summary(bias_counts, len(analyses), article_title)
+    
+    def _count_bias_types(self, analyses: List[BiasRecord]) -> dict:
+        """Conta ocorrências por tipo de viés"""
         bias_counts = {}
         for analysis in analyses:
             bias_type = analysis.tipo_vies
             bias_counts[bias_type] = bias_counts.get(bias_type, 0) + 1
-        
+        return bias_counts
+    
+    def _build_summary_prompt(self, bias_counts: dict, total_analyses: int, article_title: str) -> str:
+        """Monta o prompt do resumo executivo"""
         summary_prompt = f"""Analise os seguintes dados sobre viés detectado no artigo da Wikipedia "{article_title}" e crie um resumo executivo em português brasileiro:
 
 ESTATÍSTICAS DE VIÉS DETECTADO:
 """
         
         for bias_type, count in bias_counts.items():
-            description = self.bias_type_descriptions[bias_type]
+            description = self.bias_type_descriptions.get(bias_type, bias_type.value)
             summary_prompt += f"- {description}: {count} ocorrências\n"
         
         summary_prompt += f"""
-TOTAL DE TRECHOS ANALISADOS: {len(analyses)}
+TOTAL DE TRECHOS ANALISADOS: {total_analyses}
 
 Crie um resumo de 2-3 parágrafos que:
 1. Descreva os principais tipos de viés encontrados
@@ -300,37 +856,30 @@ Crie um resumo de 2-3 parágrafos que:
 3. Forneça recomendações gerais para melhorar a objetividade
 
 RESUMO:"""
-
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Você é um especialista em análise de texto e neutralidade editorial. Sempre responda em português brasileiro de forma clara e objetiva."
-                    },
-                    {
-                        "role": "user",
-                        "content": summary_prompt
-                    }
-                ],
-                max_tokens=400,
-                temperature=0.4
-            )
-            
-            return response.choices[0].message.content.strip()
-            
-        except Exception as e:
-            print(f"Erro ao gerar resumo: {e}")
-            return self._fallback_summary(bias_counts, len(analyses), article_title)
+        return summary_prompt
+    
+    def _summary_messages(self, summary_prompt: str) -> List[dict]:
+        """Mensagens de chat para o resumo geral"""
+        return [
+            {
+                "role": "system",
+                "content": SUMMARY_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": summary_prompt
+            }
+        ]
     
     def _fallback_summary(self, bias_counts: dict, total_analyses: int, article_title: str) -> str:
         """Resumo básico caso a API falhe"""
+        if not self.offline:
+            fallback("summary_basic")
         
         summary = f"Análise do artigo '{article_title}' detectou {total_analyses} trechos com possível viés:\n\n"
         
         for bias_type, count in bias_counts.items():
-            description = self.bias_type_descriptions[bias_type]
+            description = self.bias_type_descriptions.get(bias_type, bias_type.value)
             summary += f"• {count} casos de {description}\n"
         
         summary += f"\nRecomenda-se revisar estes trechos para melhorar a neutralidade e objetividade do conteúdo."
@@ -0,0 +1,337 @@
+import bisect
+import math
+import os
+import random
+import re
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+from .models import BiasRecord, BiasType
+from .utils import normalize_text
+
+# Largura máxima do intervalo de confiança (95%) das estimativas principais
+SAMPLING_TARGET_WIDTH = float(os.getenv("SAMPLING_TARGET_WIDTH", "0.1"))
+# Teto de trechos analisados por artigo (limita o custo independentemente do tamanho)
+SAMPLING_MAX_SEGMENTS = int(os.getenv("SAMPLING_MAX_SEGMENTS", "400"))
+# Trechos analisados a cada rodada antes de reavaliar os intervalos
+SAMPLING_ROUND_SIZE = int(os.getenv("SAMPLING_ROUND_SIZE", "40"))
+# Trechos mínimos no total (e por estrato) antes de avaliar a precisão
+SAMPLING_MIN_SEGMENTS = int(os.getenv("SAMPLING_MIN_SEGMENTS", "30"))
+MIN_PER_STRATUM = 2
+# Seções com menos trechos que isto são unidas à seguinte na estratificação
+MIN_SECTION_SEGMENTS = 10
+
+Z_95 = 1.96
+MIN_SEGMENT_LENGTH = 20
+# Faixas de tamanho (caracteres) usadas na estratificação
+LENGTH_BUCKETS = (100, 250)
+METRICS = {
+    "polaridade_media": "polaridade_sentimento",
+    "intensidade_emocional_media": "intensidade_emocional",
+    "complexidade_media": "complexidade_sintatica",
+    "nivel_certeza_medio": "nivel_certeza",
+    "score_formalidade_medio": "score_formalidade",
+}
+
+def section_starts(raw_content: str, normalized_content: str) -> List[int]:
+    """Início (no texto normalizado) de cada seção do artigo.
+
+    O extrato da Wikipedia em texto plano traz os títulos de seção como linhas
+    curtas, sem pontuação final, precedidas de linha em branco; a normalização
+    junta as linhas, então cada título é localizado em sequência no texto
+    normalizado."""
+    starts = [0]
+    position = 0
+    for match in re.finditer(r'(?:^|\n\n)([^\n.!?:;]{2,80})\n', raw_content):
+        heading = normalize_text(match.group(1))
+        found = normalized_content.find(heading, position)
+        if heading and found > position:
+            starts.append(found)
+            position = found + len(heading)
+    return starts
+
+def segment_spans(content: str) -> List[Tuple[int, int]]:
+    """Sentenças [início, fim) por pontuação (quadro amostral)"""
+    spans = []
+    for match in re.finditer(r'[^.!?]+(?:[.!?]+|$)', content):
+        text = match.group(0)
+        stripped = text.strip()
+        if len(stripped) >= MIN_SEGMENT_LENGTH:
+            start = match.start() + text.index(stripped)
+            spans.append((start, start + len(stripped)))
+    return spans
+
+def _length_bucket(span: Tuple[int, int]) -> int:
+    length = span[1] - span[0]
+    return sum(1 for limit in LENGTH_BUCKETS if length > limit)
+
+def build_strata(spans: List[Tuple[int, int]], sections: List[int],
+                 max_strata: int) -> Dict[Tuple[int, int], List[Tuple[int, int]]]:
+    """Trechos por estrato (grupo de seções, faixa de tamanho), com no máximo
+    `max_strata` estratos.
+
+    Seções consecutivas são unidas até cada grupo ter ao menos
+    MIN_SECTION_SEGMENTS trechos (ou a cota que limita o número de grupos), e
+    faixas de tamanho com menos trechos que MIN_PER_STRATUM são unidas à maior
+    faixa do grupo: sem isso, um artigo com muitas seções curtas teria mais
+    estratos que o teto de trechos e a amostra mínima nunca seria atingida."""
+    by_section = defaultdict(list)
+    for span in spans:
+        by_section[bisect.bisect_right(sections, span[0]) - 1].append(span)
+    groups_cap = max(1, max_strata // (len(LENGTH_BUCKETS) + 1))
+    target = max(MIN_SECTION_SEGMENTS, math.ceil(len(spans) / groups_cap))
+
+    groups: List[List[Tuple[int, int]]] = []
+    current: List[Tuple[int, int]] = []
+    for section in sorted(by_section):
+        current.extend(by_section[section])
+        if len(current) >= target:
+            groups.append(current)
+            current = []
+    if current:
+        # Sobra menor que a cota: fica com o último grupo
+        if groups and len(current) < target:
+            groups[-1].extend(current)
+        else:
+            groups.append(current)
+
+    strata = {}
+    for group, group_spans in enumerate(groups):
+        bands = defaultdict(list)
+        for span in group_spans:
+            bands[_length_bucket(span)].append(span)
+        largest = max(bands, key=lambda band: len(bands[band]))
+        for band, band_spans in sorted(bands.items()):
+            key = (group, band if len(band_spans) >= MIN_PER_STRATUM else largest)
+            strata.setdefault(key, []).extend(band_spans)
+    return strata
+
+def _stratified_mean(values: Dict[Any, List[float]], sizes: Dict[Any, int], max_variance: float = 0.25,
+                     floor: bool = False) -> Tuple[float, float]:
+    """Média estratificada e sua variância (com correção de população finita).
+
+    `max_variance` é a maior variância possível de um trecho (usada quando o
+    estrato tem um único trecho); com `floor`, a variância de cada estrato não
+    fica abaixo de max_variance / n, para que poucos trechos iguais não gerem
+    um intervalo de largura zero."""
+    total = sum(sizes.values())
+    mean = variance = 0.0
+    for stratum, size in sizes.items():
+        sample = values.get(stratum, [])
+        if not sample:
+            continue
+        weight = size / total
+        n = len(sample)
+        stratum_mean = sum(sample) / n
+        mean += weight * stratum_mean
+        if n > 1:
+            s2 = sum((v - stratum_mean) ** 2 for v in sample) / (n - 1)
+            if floor:
+                s2 = max(s2, max_variance / n)
+        else:
+            s2 = max_variance
+        variance += weight ** 2 * (1 - n / size) * s2 / n
+    # Reescala pelos pesos dos estratos já amostrados
+    sampled_weight = sum(sizes[s] for s in sizes if values.get(s)) / total
+    if sampled_weight:
+        mean /= sampled_weight
+        variance /= sampled_weight ** 2
+    return mean, variance
+
+def _interval(value: float, variance: float, lower: float = 0.0, upper: Optional[float] = None) -> Dict[str, float]:
+    half = Z_95 * math.sqrt(max(variance, 0.0))
+    low, high = value - half, value + half
+    low = max(low, lower)
+    if upper is not None:
+        high = min(high, upper)
+    return {"valor": round(value, 4), "ic_inferior": round(low, 4), "ic_superior": round(high, 4),
+            "largura": round(high - low, 4)}
+
+def _wilson_interval(p: float, variance: float, n: int, fraction: float, scale: float = 1.0) -> Dict[str, float]:
+    """Intervalo de Wilson para uma proporção estratificada, multiplicado por `scale`.
+
+    Usa o tamanho efetivo n / deff (com deff >= 1, pois a variância do desenho
+    pode ser zero com poucos trechos) e a correção de população finita; ao
+    contrário do intervalo de Wald, não colapsa quando p é 0 ou 1."""
+    if fraction >= 1:
+        return _interval(p * scale, 0.0, upper=scale)
+    srs_variance = p * (1 - p) / n * (1 - fraction)
+    deff = variance / srs_variance if srs_variance > 0 else 1.0
+    n_eff = n / max(1.0, deff) / (1 - fraction)
+    z2 = Z_95 ** 2
+    denominator = 1 + z2 / n_eff
+    center = (p + z2 / (2 * n_eff)) / denominator
+    half = Z_95 / denominator * math.sqrt(p * (1 - p) / n_eff + z2 / (4 * n_eff ** 2))
+    low, high = max(0.0, center - half), min(1.0, center + half)
+    return {"valor": round(p * scale, 4), "ic_inferior": round(low * scale, 4),
+            "ic_superior": round(high * scale, 4), "largura": round((high - low) * scale, 4)}
+
+class StratifiedSampler:
+    """Estima as métricas agregadas de um artigo analisando uma amostra
+    estratificada (por seção e tamanho) de trechos.
+
+    A amostra cresce em rodadas (primeiro cobrindo todos os estratos, depois
+    com alocação proporcional ao tamanho deles) até que, com a amostra mínima
+    atingida, o intervalo de confiança de 95% da proporção de trechos com viés
+    e do score médio fique abaixo da largura alvo, ou até o teto de trechos.
+    Proporções usam a média estratificada com intervalo de Wilson; médias entre
+    os trechos com viés usam o estimador de razão (variância por linearização).
+    """
+
+    def __init__(self, content: str, raw_content: Optional[str] = None,
+                 target_width: float = SAMPLING_TARGET_WIDTH, max_segments: int = SAMPLING_MAX_SEGMENTS,
+                 round_size: int = SAMPLING_ROUND_SIZE, seed: Optional[int] = None):
+        self.content = content
+        self.target_width = target_width
+        self.max_segments = max(1, max_segments)
+        self.round_size = max(1, round_size)
+        self.random = random.Random(seed)
+
+        sections = section_starts(raw_content, content) if raw_content else [0]
+        self.sections = len(sections)
+        # Estratos suficientemente poucos para que a cobertura mínima
+        # (MIN_PER_STRATUM por estrato) use no máximo um quarto do teto
+        max_strata = max(1, self.max_segments // (4 * MIN_PER_STRATUM))
+        self.strata = build_strata(segment_spans(content), sections, max_strata)
+        for spans in self.strata.values():
+            self.random.shuffle(spans)
+        self.sizes = {stratum: len(spans) for stratum, spans in self.strata.items()}
+        self.population = sum(self.sizes.values())
+        # Resultados por estrato: lista de análises de cada trecho amostrado
+        self.samples: Dict[Any, List[List[BiasRecord]]] = defaultdict(list)
+
+    @property
+    def sampled(self) -> int:
+        return sum(len(s) for s in self.samples.values())
+
+    def _next_round(self) -> List[Tuple[Any, Tuple[int, int]]]:
+        """Trechos da próxima rodada, nunca mais que o orçamento: um trecho por
+        estrato (em ordem aleatória de estratos) antes do segundo de qualquer
+        estrato, até MIN_PER_STRATUM; o restante por alocação proporcional"""
+        budget = min(self.round_size, self.max_segments - self.sampled)
+        if budget <= 0:
+            return []
+        taken = {stratum: len(self.samples.get(stratum, [])) for stratum in self.strata}
+        chosen = []
+        order = list(self.strata)
+        self.random.shuffle(order)
+        for level in range(1, MIN_PER_STRATUM + 1):
+            for stratum in order:
+                if len(chosen) >= budget:
+                    return chosen
+                if taken[stratum] < min(level, self.sizes[stratum]):
+                    chosen.append((stratum, self.strata[stratum][taken[stratum]]))
+                    taken[stratum] += 1
+
+        remaining = {s: self.sizes[s] - taken[s] for s in self.strata if self.sizes[s] > taken[s]}
+        total_remaining = sum(remaining.values())
+        budget = min(budget - len(chosen), total_remaining)
+        if budget <= 0:
+            return chosen
+        # Maiores restos: a soma das cotas é exatamente o orçamento
+        quotas = {s: budget * left / total_remaining for s, left in remaining.items()}
+        counts = {s: int(quota) for s, quota in quotas.items()}
+        ranked = sorted(remaining, key=lambda s: (quotas[s] - counts[s], self.random.random()), reverse=True)
+        for stratum in ranked[:budget - sum(counts.values())]:
+            counts[stratum] += 1
+        for stratum, count in counts.items():
+            count = min(count, remaining[stratum])
+            start = taken[stratum]
+            chosen.extend((stratum, span) for span in self.strata[stratum][start:start + count])
+        return chosen
+
+    def _minimum_reached(self) -> bool:
+        """Amostra mínima antes de confiar nos intervalos (no total e por estrato)"""
+        return self.sampled >= min(self.population, SAMPLING_MIN_SEGMENTS) and all(
+            len(self.samples.get(stratum, [])) >= min(MIN_PER_STRATUM, size) for stratum, size in self.sizes.items()
+        )
+
+    def run(self, analyze_spans: Callable[[List[Tuple[int, int]]], List[List[BiasRecord]]]) -> Dict[str, Any]:
+        """Amostra e analisa até atingir a precisão alvo; `analyze_spans` recebe
+        os trechos e retorna as análises de viés de cada um"""
+        rounds = 0
+        while True:
+            batch = self._next_round()
+            if not batch:
+                break
+            rounds += 1
+            for (stratum, _), analyses in zip(batch, analyze_spans([span for _, span in batch])):
+                self.samples[stratum].append(analyses)
+            estimate = self.estimate()
+            if estimate["precisao_atingida"] or self.sampled >= self.max_segments:
+                break
+        estimate = self.estimate()
+        estimate["rodadas"] = rounds
+        return estimate
+
+    def _values(self, fn) -> Dict[Any, List[float]]:
+        return {stratum: [fn(analyses) for analyses in samples] for stratum, samples in self.samples.items()}
+
+    def _ratio(self, numerator, denominator, max_variance: float = 0.25) -> Tuple[float, float]:
+        """Estimador de razão Σy/Σx estratificado e sua variância linearizada
+        (com piso, ver _stratified_mean)"""
+        y_mean, _ = _stratified_mean(self._values(numerator), self.sizes)
+        x_mean, _ = _stratified_mean(self._values(denominator), self.sizes)
+        if x_mean == 0:
+            return 0.0, 0.0
+        ratio = y_mean / x_mean
+        _, residual_var = _stratified_mean(
+            self._values(lambda a: numerator(a) - ratio * denominator(a)), self.sizes, max_variance, floor=True
+        )
+        return ratio, residual_var / x_mean ** 2
+
+    def estimate(self) -> Dict[str, Any]:
+        """Estimativas atuais com intervalos de confiança de 95%"""
+        if not self.population or not self.sampled:
+            return {"total_trechos": self.population, "trechos_amostrados": 0, "precisao_atingida": True,
+                    "amostragem_completa": True}
+
+        def biased(analyses):
+            return 1.0 if analyses else 0.0
+
+        def score(analyses):
+            return max((a.confianca for a in analyses), default=0.0)
+
+        proportion, proportion_var = _stratified_mean(self._values(biased), self.sizes)
+        overall, overall_var = self._ratio(score, biased)
+        fraction = self.sampled / self.population
+
+        distribution = {}
+        for bias_type in BiasType:
+            def has_type(analyses, bias_type=bias_type):
+                return 1.0 if any(a.tipo_vies == bias_type for a in analyses) else 0.0
+            p, var = _stratified_mean(self._values(has_type), self.sizes)
+            if p > 0:
+                distribution[bias_type.value] = _wilson_interval(p, var, self.sampled, fraction, self.population)
+
+        metrics = {}
+        for name, field in METRICS.items():
+            def metric(analyses, field=field):
+                return sum(getattr(a, field) or 0.0 for a in analyses) / len(analyses) if analyses else 0.0
+            polarity = field == "polaridade_sentimento"
+            value, var = self._ratio(metric, biased, max_variance=1.0 if polarity else 0.25)
+            metrics[name] = _interval(value, var, lower=-1.0 if polarity else 0.0, upper=1.0)
+
+        proportion_ci = _wilson_interval(proportion, proportion_var, self.sampled, fraction)
+        overall_ci = _interval(overall, overall_var, upper=1.0)
+        complete = self.sampled >= self.population
+        return {
+            "total_trechos": self.population,
+            "trechos_amostrados": self.sampled,
+            "secoes": self.sections,
+            "estratos": len(self.strata),
+            "amostragem_completa": complete,
+            "precisao_atingida": complete or (
+                self._minimum_reached()
+                and proportion_ci["largura"] <= self.target_width and overall_ci["largura"] <= self.target_width
+            ),
+            "largura_alvo_ic": self.target_width,
+            "nivel_confianca": 0.95,
+            "overall_bias_score": overall_ci,
+            "proporcao_trechos_com_vies": proportion_ci,
+            "total_trechos_com_vies": _wilson_interval(
+                proportion, proportion_var, self.sampled, fraction, self.population
+            ),
+            "distribuicao_tipos_vies": distribution,
+            "metricas_quantitativas": metrics,
+        }
@@ -0,0 +1,399 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, fields, astuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .models import BiasType
+from .metrics import cache_lookup
+from .shared_store import SharedStore, shared_store
+
+@dataclass
+class SemanticFeatures:
+    """Características semânticas de um texto"""
+    sentiment_polarity: float
+    sentiment_confidence: float
+    subjectivity_score: float
+    emotional_intensity: float
+    certainty_level: float
+    formality_score: float
+
+@dataclass
+class SyntacticFeatures:
+    """Características sintáticas de um texto"""
+    dependency_complexity: float
+    pos_diversity: float
+    modal_verb_ratio: float
+    passive_voice_ratio: float
+    hedge_word_ratio: float
+    intensifier_ratio: float
+
+# Análises avançadas mantidas em memória para a expansão sob demanda
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "32"))
+
+SEMANTIC_FIELDS = tuple(f.name for f in fields(SemanticFeatures))
+SYNTACTIC_FIELDS = tuple(f.name for f in fields(SyntacticFeatures))
+BIAS_TYPES = tuple(BiasType)
+_BIAS_INDEX = {bias_type: i for i, bias_type in enumerate(BIAS_TYPES)}
+
+# Uma linha por segmento com viés. `confidence` tem uma coluna por tipo de viés
+# (0 = não significativo) e `type_rank` a ordem em que cada tipo foi detectado
+# (-1 = ausente), que é a ordem de bias_types e de confidence_scores.
+SEGMENT_DTYPE = np.dtype(
+    [("start_pos", np.int64), ("end_pos", np.int64), ("overall_bias_score", np.float64)]
+    + [(name, np.float64) for name in SEMANTIC_FIELDS + SYNTACTIC_FIELDS]
+    + [("confidence", np.float64, (len(BIAS_TYPES),)), ("type_rank", np.int8, (len(BIAS_TYPES),))]
+)
+
+class AdvancedBiasAnalysis:
+    """Análise avançada de viés de um segmento: visão sobre uma linha da
+    SegmentTable (os atributos são lidos das colunas sob demanda)"""
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: "SegmentTable", index: int):
+        self.table = table
+        self.index = index
+
+    @property
+    def _row(self):
+        return self.table.rows[self.index]
+
+    @property
+    def text_segment(self) -> str:
+        return self.table.texts[self.index]
+
+    @property
+    def start_pos(self) -> int:
+        return int(self._row["start_pos"])
+
+    @property
+    def end_pos(self) -> int:
+        return int(self._row["end_pos"])
+
+    @property
+    def overall_bias_score(self) -> float:
+        return float(self._row["overall_bias_score"])
+
+    @property
+    def bias_types(self) -> List[BiasType]:
+        ranks = self._row["type_rank"]
+        present = np.flatnonzero(ranks >= 0)
+        return [BIAS_TYPES[i] for i in present[np.argsort(ranks[present])]]
+
+    @property
+    def confidence_scores(self) -> Dict[BiasType, float]:
+        confidence = self._row["confidence"]
+        return {bias_type: float(confidence[_BIAS_INDEX[bias_type]]) for bias_type in self.bias_types}
+
+    @property
+    def semantic_features(self) -> SemanticFeatures:
+        row = self._row
+        return SemanticFeatures(*(float(row[name]) for name in SEMANTIC_FIELDS))
+
+    @property
+    def syntactic_features(self) -> SyntacticFeatures:
+        row = self._row
+        return SyntacticFeatures(*(float(row[name]) for name in SYNTACTIC_FIELDS))
+
+    @property
+    def explanation(self) -> str:
+        return self.table.explanations[self.index]
+
+    @property
+    def evidence(self) -> Dict[str, Any]:
+        return self.table.evidence[self.index]
+
+    @property
+    def reformulation_suggestions(self) -> List[str]:
+        return self.table.suggestions[self.index]
+
+class LazyColumn:
+    """Coluna de texto calculada linha a linha no primeiro acesso"""
+    __slots__ = ("values", "compute")
+
+    def __init__(self, values: List[Any], compute: Optional[Callable[[int], Any]] = None):
+        self.values = values
+        self.compute = compute
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: int):
+        value = self.values[index]
+        if value is None and self.compute is not None:
+            value = self.values[index] = self.compute(index)
+        return value
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def computed(self) -> int:
+        return sum(1 for value in self.values if value is not None)
+
+class SegmentTable(Sequence):
+    """Tabela colunar das análises avançadas de um texto: um array estruturado
+    NumPy com as features numéricas de cada segmento e listas paralelas com os
+    campos de texto. Iterar/indexar retorna visões AdvancedBiasAnalysis; as
+    agregações operam direto nas colunas.
+
+    Explicação, evidências e sugestões são geradas sob demanda pelo
+    `explainer` (o detector avançado), apenas para as linhas acessadas."""
+
+    def __init__(self, rows: Optional[np.ndarray] = None, texts: Optional[List[str]] = None,
+                 explanations: Optional[List[Optional[str]]] = None,
+                 evidence: Optional[List[Optional[Dict[str, Any]]]] = None,
+                 suggestions: Optional[List[Optional[List[str]]]] = None, explainer=None):
+        self.rows = rows if rows is not None else np.zeros(0, dtype=SEGMENT_DTYPE)
+        self.texts = texts or []
+        self.explainer = explainer
+        size = len(self.texts)
+        self.explanations = LazyColumn(explanations or [None] * size, explainer and self._explanation)
+        self.evidence = LazyColumn(evidence or [None] * size, explainer and self._evidence)
+        self.suggestions = LazyColumn(suggestions or [None] * size, explainer and self._suggestions)
+
+    def _explanation(self, index: int) -> str:
+        view = self[index]
+        return self.explainer._generate_detailed_explanation(
+            view.text_segment, view.confidence_scores, view.semantic_features, view.syntactic_features
+        )
+
+    def _evidence(self, index: int) -> Dict[str, Any]:
+        view = self[index]
+        return self.explainer._collect_evidence(view.text_segment, view.confidence_scores)
+
+    def _suggestions(self, index: int) -> List[str]:
+        view = self[index]
+        return self.explainer._generate_reformulation_suggestions(
+            view.text_segment, view.confidence_scores, view.semantic_features
+        )
+
+    @classmethod
+    def from_analyses(cls, analyses) -> "SegmentTable":
+        """Tabela a partir de uma SegmentTable (retornada como está) ou de uma
+        sequência de análises (p.ex. visões de tabelas diferentes)"""
+        if isinstance(analyses, SegmentTable):
+            return analyses
+        analyses = list(analyses)
+        builder = SegmentTableBuilder(analyses[0].table.explainer if analyses else None)
+        for a in analyses:
+            # Campos de texto já gerados são mantidos; os demais seguem sob demanda
+            builder.add(a.text_segment, a.start_pos, a.end_pos, a.confidence_scores, a.semantic_features,
+                        a.syntactic_features, a.overall_bias_score, a.table.explanations.values[a.index],
+                        a.table.evidence.values[a.index], a.table.suggestions.values[a.index])
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return AdvancedBiasAnalysis(self, index)
+
+    def take(self, indices) -> "SegmentTable":
+        """Subtabela com as linhas indicadas, na ordem dada"""
+        indices = [int(i) for i in indices]
+        # Leva apenas os campos de texto já gerados; os demais seguem sob demanda
+        return SegmentTable(
+            self.rows[indices],
+            [self.texts[i] for i in indices],
+            [self.explanations.values[i] for i in indices],
+            [self.evidence.values[i] for i in indices],
+            [self.suggestions.values[i] for i in indices],
+            explainer=self.explainer,
+        )
+
+    def top(self, k: int, column: str = "overall_bias_score") -> "SegmentTable":
+        """As k linhas com maior valor na coluna (empates na ordem do texto)"""
+        order = np.argsort(-self.rows[column], kind="stable")[:k]
+        return self.take(order)
+
+    @property
+    def confidence(self) -> np.ndarray:
+        return self.rows["confidence"]
+
+    @property
+    def bias_mask(self) -> np.ndarray:
+        return self.rows["type_rank"] >= 0
+
+    def best_bias(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Índice (em BIAS_TYPES) e confiança do tipo de maior confiança de cada
+        linha; empates ficam com o tipo detectado primeiro"""
+        if not len(self):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        confidence = np.where(self.bias_mask, self.confidence, -np.inf)
+        best = confidence.max(axis=1, keepdims=True)
+        # Entre os empatados no máximo, o de menor rank
+        ranks = np.where(confidence == best, self.rows["type_rank"], np.iinfo(np.int8).max)
+        index = ranks.argmin(axis=1)
+        return index, best[:, 0]
+
+    def primary_bias(self) -> np.ndarray:
+        """Índice do primeiro tipo detectado de cada linha (bias_types[0])"""
+        ranks = np.where(self.bias_mask, self.rows["type_rank"], np.iinfo(np.int8).max)
+        return ranks.argmin(axis=1)
+
+    def bias_counts(self) -> np.ndarray:
+        """Segmentos por tipo de viés, na ordem de BIAS_TYPES"""
+        return self.bias_mask.sum(axis=0)
+
+    def bias_explanations(self, type_index: Sequence[int], confidence: Sequence[float]) -> List[str]:
+        """Explicação de um único tipo por linha (p.ex. o de best_bias), montada
+        a partir das colunas de features: não gera a explicação detalhada da
+        linha. Usa a explicação detalhada se já tiver sido gerada"""
+        if self.explainer is None:
+            return [value or "" for value in self.explanations.values]
+        columns = {name: self.rows[name].tolist() for name in SEMANTIC_FIELDS + SYNTACTIC_FIELDS}
+        return [
+            generated if generated is not None else self.explainer._explain_bias(
+                BIAS_TYPES[bias_index], score, {name: values[i] for name, values in columns.items()}
+            )
+            for i, (generated, bias_index, score) in enumerate(zip(self.explanations.values, type_index, confidence))
+        ]
+
+    def bias_type_values(self) -> List[List[str]]:
+        """Tipos de viés de cada linha (valores), na ordem de detecção"""
+        if not len(self):
+            return []
+        ranks = np.where(self.bias_mask, self.rows["type_rank"], np.iinfo(np.int8).max)
+        order = np.argsort(ranks, axis=1, kind="stable").tolist()
+        counts = self.bias_mask.sum(axis=1).tolist()
+        values = [bias_type.value for bias_type in BIAS_TYPES]
+        return [[values[j] for j in row[:count]] for row, count in zip(order, counts)]
+
+    def mean(self, names: Sequence[str]) -> Dict[str, float]:
+        """Média de cada coluna"""
+        return {name: float(self.rows[name].mean()) for name in names}
+
+    def compact(self) -> List[Dict[str, Any]]:
+        """Segmentos com id, posição, tipos e scores, sem os campos de texto
+        gerados (obtidos pela expansão)"""
+        rows = self.rows
+        starts, ends = rows["start_pos"].tolist(), rows["end_pos"].tolist()
+        scores = rows["overall_bias_score"].tolist()
+        confidence = rows["confidence"].tolist()
+        index = {bias_type.value: _BIAS_INDEX[bias_type] for bias_type in BIAS_TYPES}
+        return [
+            {
+                "id": i,
+                "start_pos": starts[i],
+                "end_pos": ends[i],
+                "bias_types": types,
+                "confidence_scores": {value: confidence[i][index[value]] for value in types},
+                "overall_bias_score": scores[i],
+            }
+            for i, types in enumerate(self.bias_type_values())
+        ]
+
+    def expand(self, ids: Sequence[int]) -> List[Dict[str, Any]]:
+        """Texto, explicação, evidências, sugestões e features dos segmentos
+        indicados (ids fora da tabela são ignorados)"""
+        expanded = []
+        for i in ids:
+            if not 0 <= i < len(self):
+                continue
+            row = self.rows[i]
+            expanded.append({
+                "id": i,
+                "text_segment": self.texts[i],
+                "explanation": self.explanations[i],
+                "evidence": self.evidence[i],
+                "reformulation_suggestions": self.suggestions[i],
+                "semantic_features": {name: float(row[name]) for name in SEMANTIC_FIELDS},
+                "syntactic_features": {name: float(row[name]) for name in SYNTACTIC_FIELDS},
+            })
+        return expanded
+
+class SegmentTableCache:
+    """Últimas análises avançadas (LRU), para expandir segmentos depois. Com o
+    estado compartilhado habilitado, as colunas também são gravadas no SQLite e
+    outro worker reconstrói a tabela com o seu próprio detector (explainer)"""
+
+    def __init__(self, max_entries: int = ANALYSIS_CACHE_SIZE, shared: SharedStore = shared_store):
+        self.max_entries = max(1, max_entries)
+        self.shared = shared
+        self._entries: "OrderedDict[str, SegmentTable]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, table: SegmentTable) -> str:
+        analysis_id = uuid.uuid4().hex
+        with self._lock:
+            self._entries[analysis_id] = table
+            self._trim()
+        # Campos de texto ainda não gerados seguem sob demanda no worker que expandir
+        self.shared.put("segment_table", analysis_id, (
+            table.rows, table.texts, table.explanations.values, table.evidence.values, table.suggestions.values
+        ), self.max_entries)
+        return analysis_id
+
+    def _trim(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, analysis_id: str, explainer=None) -> Optional[SegmentTable]:
+        """Tabela da análise; `explainer` gera os campos de texto de uma tabela
+        vinda de outro worker"""
+        with self._lock:
+            table = self._entries.get(analysis_id)
+            if table is not None:
+                self._entries.move_to_end(analysis_id)
+        if table is None:
+            columns = self.shared.get("segment_table", analysis_id)
+            if columns is not None:
+                table = SegmentTable(*columns, explainer=explainer)
+                with self._lock:
+                    self._entries[analysis_id] = table
+                    self._trim()
+        cache_lookup("segment_table", table is not None)
+        return table
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tables = list(self._entries.values())
+        return {
+            "entries": len(tables),
+            "max_entries": self.max_entries,
+            "segments": sum(len(table) for table in tables),
+            "expanded_segments": sum(table.evidence.computed for table in tables),
+        }
+
+class SegmentTableBuilder:
+    """Acumula as linhas de uma SegmentTable durante a análise"""
+    __slots__ = ("rows", "texts", "explanations", "evidence", "suggestions", "explainer")
+
+    def __init__(self, explainer=None):
+        self.rows = []
+        self.texts = []
+        self.explanations = []
+        self.evidence = []
+        self.suggestions = []
+        self.explainer = explainer
+
+    def add(self, text: str, start_pos: int, end_pos: int, confidence_scores: Dict[BiasType, float],
+            semantic: SemanticFeatures, syntactic: SyntacticFeatures, overall_bias_score: float,
+            explanation: Optional[str] = None, evidence: Optional[Dict[str, Any]] = None,
+            suggestions: Optional[List[str]] = None):
+        confidence = [0.0] * len(BIAS_TYPES)
+        ranks = [-1] * len(BIAS_TYPES)
+        for rank, (bias_type, score) in enumerate(confidence_scores.items()):
+            confidence[_BIAS_INDEX[bias_type]] = score
+            ranks[_BIAS_INDEX[bias_type]] = rank
+        self.rows.append(
+            (start_pos, end_pos, overall_bias_score) + astuple(semantic) + astuple(syntactic) + (confidence, ranks)
+        )
+        self.texts.append(text)
+        self.explanations.append(explanation)
+        self.evidence.append(evidence)
+        self.suggestions.append(suggestions)
+
+    def build(self) -> SegmentTable:
+        return SegmentTable(np.array(self.rows, dtype=SEGMENT_DTYPE), self.texts,
+                            self.explanations, self.evidence, self.suggestions, self.explainer)
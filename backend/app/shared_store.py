@@ -0,0 +1,163 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Banco SQLite compartilhado pelos workers do gunicorn (definido pelo
+# gunicorn.conf.py quando WEB_CONCURRENCY > 1); vazio = estado só em memória
+SHARED_STORE_PATH = os.getenv("SHARED_STORE_PATH", "")
+
+class SharedStore:
+    """Estado compartilhado entre os workers em SQLite (WAL): conteúdos de
+    artigos, tabelas de análises avançadas e o progresso das análises em
+    segundo plano, para que continuação, expansão e /article-content
+    funcionem em qualquer worker.
+
+    Os valores são serializados com pickle (o arquivo é local e só o próprio
+    serviço escreve nele). A conexão é reaberta quando o processo muda: uma
+    conexão SQLite não pode ser usada por um processo filho criado por fork."""
+
+    def __init__(self, path: Optional[str] = SHARED_STORE_PATH):
+        self.path = path or None
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Conexão do processo atual (aberta no primeiro uso); chamar com o lock"""
+        if self.path is None:
+            return None
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    token TEXT PRIMARY KEY,
+                    total INTEGER NOT NULL,
+                    processed INTEGER NOT NULL,
+                    done INTEGER NOT NULL,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS job_results (
+                    token TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    value BLOB NOT NULL,
+                    PRIMARY KEY (token, seq)
+                )"""
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Estado compartilhado indisponível ({e}), usando apenas memória do worker")
+            self.path = None
+            return None
+        self._conn, self._pid = conn, os.getpid()
+        return conn
+
+    def _execute(self, statements, fetch: bool = False):
+        """Executa [(sql, parâmetros)] numa transação; com fetch, retorna as
+        linhas do último comando (None se o banco estiver indisponível)"""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                with conn:
+                    cursor = None
+                    for sql, params in statements:
+                        cursor = conn.execute(sql, params)
+                    return cursor.fetchall() if fetch and cursor is not None else []
+            except sqlite3.Error as e:
+                print(f"Erro no estado compartilhado: {e}")
+                return None
+
+    # Entradas chave/valor (LRU por namespace)
+
+    def put(self, namespace: str, key: str, value: Any, max_entries: int):
+        """Grava o valor, descartando as entradas menos recentes do namespace"""
+        if not self.enabled:
+            return
+        self._execute([
+            ("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+             (namespace, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time())),
+            ("""DELETE FROM entries WHERE namespace = ? AND key NOT IN (
+                    SELECT key FROM entries WHERE namespace = ? ORDER BY updated_at DESC LIMIT ?)""",
+             (namespace, namespace, max(1, max_entries))),
+        ])
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        rows = self._execute([
+            ("UPDATE entries SET updated_at = ? WHERE namespace = ? AND key = ?", (time.time(), namespace, key)),
+            ("SELECT value FROM entries WHERE namespace = ? AND key = ?", (namespace, key)),
+        ], fetch=True)
+        return pickle.loads(rows[0][0]) if rows else None
+
+    # Análises em segundo plano: o worker que roda a análise grava o progresso;
+    # os demais leem as análises concluídas a partir de um índice
+
+    def job_start(self, token: str, total: int, created_at: float):
+        self._execute([("INSERT OR REPLACE INTO jobs VALUES (?, ?, 0, 0, NULL, ?, ?)",
+                        (token, total, created_at, created_at))])
+
+    def job_progress(self, token: str, first_seq: int, results: List[Any], processed: int):
+        self._execute(
+            [("INSERT OR REPLACE INTO job_results VALUES (?, ?, ?)",
+              (token, first_seq + i, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)))
+             for i, result in enumerate(results)]
+            + [("UPDATE jobs SET processed = ? WHERE token = ?", (processed, token))]
+        )
+
+    def job_finish(self, token: str, error: Optional[str]):
+        self._execute([("UPDATE jobs SET done = 1, error = ? WHERE token = ?", (error, token))])
+
+    def job_status(self, token: str, touch: bool = False) -> Optional[Dict[str, Any]]:
+        """Estado da análise (total, processed, done, error, last_access);
+        com touch, registra o acesso (renova o prazo de expiração)"""
+        statements = [("UPDATE jobs SET last_access = ? WHERE token = ?", (time.time(), token))] if touch else []
+        rows = self._execute(statements + [
+            ("SELECT total, processed, done, error, created_at, last_access FROM jobs WHERE token = ?", (token,))
+        ], fetch=True)
+        if not rows:
+            return None
+        total, processed, done, error, created_at, last_access = rows[0]
+        return {"total": total, "processed": processed, "done": bool(done), "error": error,
+                "created_at": created_at, "last_access": last_access}
+
+    def job_results(self, token: str, since: int = 0) -> List[Any]:
+        rows = self._execute([
+            ("SELECT value FROM job_results WHERE token = ? AND seq >= ? ORDER BY seq", (token, since))
+        ], fetch=True)
+        return [pickle.loads(row[0]) for row in rows or []]
+
+    def job_delete(self, token: str):
+        self._execute([
+            ("DELETE FROM job_results WHERE token = ?", (token,)),
+            ("DELETE FROM jobs WHERE token = ?", (token,)),
+        ])
+
+shared_store = SharedStore()
@@ -0,0 +1,255 @@
+import importlib
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+# Como os modelos pesados são carregados:
+#   background - em uma thread assim que a aplicação sobe (padrão)
+#   lazy       - na primeira requisição que precisar deles
+#   eager      - de forma síncrona durante o import de main
+#   preload    - como eager, mas sem warm-up: o processo pai do gunicorn carrega
+#                os modelos antes do fork e cada worker faz o próprio warm-up
+MODEL_LOADING = os.getenv("MODEL_LOADING", "background").lower()
+
+# Teto (MB) da memória privada de um worker criado por fork após o preload,
+# verificado por `python -m app.startup worker-memory`
+WORKER_PRIVATE_MB_LIMIT = float(os.getenv("WORKER_PRIVATE_MB_LIMIT", "400"))
+
+# Tempo de import (ms) de cada módulo do backend, medido no processo
+IMPORT_TIMES: Dict[str, float] = {}
+
+BACKEND_MODULES = [
+    "app.models", "app.profiling", "app.metrics", "app.tracing", "app.utils", "app.wikipedia_client", "app.substitution",
+    "app.reformulation_cache", "app.reformulator", "app.bias_detector", "app.fast_detector",
+    "app.detector_selection", "app.shared_store", "app.segment_table", "app.sampling", "app.anytime", "app.content_store",
+    "app.model_registry", "app.inference_batcher", "app.inference_backends",
+    "app.advanced_bias_detector", "app.startup", "app.main",
+]
+
+@contextmanager
+def import_timer(name: str):
+    """Mede o tempo dos imports executados dentro do bloco"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        IMPORT_TIMES[name] = round((time.perf_counter() - start) * 1000, 1)
+
+def measure_import_times(modules=BACKEND_MODULES) -> Dict[str, Optional[float]]:
+    """Mede o custo de import (ms, cumulativo) de cada módulo em um interpretador
+    novo via `python -X importtime`, para que um módulo não se beneficie dos
+    imports já feitos por outro"""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # `import app.main` não deve carregar os modelos nem exigir a chave da OpenAI
+    env = {**os.environ, "MODEL_LOADING": "lazy", "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY") or "import-times"}
+    results = {}
+    for module in modules:
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=backend_dir, capture_output=True, text=True, env=env
+        )
+        cumulative_us = None
+        for line in completed.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            match = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)", line)
+            if match and match.group(2) == module:
+                cumulative_us = int(match.group(1))
+        results[module] = round(cumulative_us / 1000, 1) if cumulative_us is not None else None
+    return results
+
+class BackgroundModelLoader:
+    """Importa o detector avançado e carrega seus modelos fora do caminho de
+    inicialização, expondo o estado de cada modelo para o endpoint de prontidão"""
+
+    def __init__(self, basic_detector=None):
+        self.basic_detector = basic_detector
+        self.detector = None
+        self.state = "pending"  # pending, loading, ready, unavailable, failed
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Inicia o carregamento em uma thread (idempotente)"""
+        with self._lock:
+            if self.state != "pending":
+                return
+            self.state = "loading"
+        threading.Thread(target=self._run, name="model-loader", daemon=True).start()
+
+    def load_now(self, warmup: bool = True):
+        """Carrega de forma síncrona na thread atual (idempotente)"""
+        with self._lock:
+            if self.state != "pending":
+                return
+            self.state = "loading"
+        self._run(warmup)
+
+    def _run(self, warmup: bool = True):
+        self.started_at = time.time()
+        try:
+            if self.basic_detector is not None and self.basic_detector.nlp is None:
+                with import_timer("spacy (detector básico)"):
+                    self.basic_detector.load_nlp()
+
+            try:
+                with import_timer("app.advanced_bias_detector"):
+                    module = importlib.import_module(".advanced_bias_detector", __package__)
+            except ImportError as e:
+                print(f"⚠️ Detector avançado não disponível: {e}")
+                print("💡 Usando apenas detector básico")
+                self.state = "unavailable"
+                self.error = str(e)
+                return
+
+            detector = module.AdvancedBiasDetector(load_models=False)
+            # Exposto antes do fim do carregamento para o status por modelo
+            self.detector = detector
+            for name in detector.MODEL_NAMES:
+                detector.load_model(name, warmup=warmup)
+
+            if detector.nlp is None:
+                print("⚠️ Detector avançado sem modelo spaCy, usando apenas detector básico")
+                self.state = "unavailable"
+            else:
+                self.state = "ready"
+                # Descarrega modelos ociosos se houver orçamento de memória (não
+                # no preload: ver init_worker)
+                if MODEL_LOADING != "preload":
+                    detector.models.start_reaper()
+                print("✅ Detector avançado inicializado")
+        except Exception as e:
+            print(f"⚠️ Erro ao inicializar detector avançado: {e}")
+            self.state = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+            self._ready.set()
+
+    def get(self, timeout: Optional[float] = None):
+        """Retorna o detector pronto ou None. Dispara o carregamento se ainda não
+        começou e aguarda até `timeout` segundos (None aguarda indefinidamente)."""
+        if self.state == "pending":
+            self.start()
+        self._ready.wait(timeout)
+        return self.detector if self.state == "ready" else None
+
+    @property
+    def available(self) -> bool:
+        """Se o detector avançado está ou pode vir a estar disponível"""
+        return self.state in ("pending", "loading", "ready")
+
+    @property
+    def finished(self) -> bool:
+        return self._ready.is_set()
+
+    def status(self) -> Dict[str, Any]:
+        """Estado do carregamento e de cada modelo"""
+        models = {
+            "spacy_basic": {
+                "state": "ready" if self.basic_detector is not None and self.basic_detector.nlp is not None
+                else ("pending" if not self.finished else "unavailable")
+            }
+        }
+        if self.detector is not None:
+            models.update({name: dict(status) for name, status in self.detector.model_status.items()})
+
+        return {
+            "state": self.state,
+            "error": self.error,
+            "load_seconds": round(self.finished_at - self.started_at, 3)
+            if self.started_at and self.finished_at else None,
+            "models": models,
+        }
+
+def init_worker(loader: BackgroundModelLoader, reformulator=None, workers: int = 1):
+    """Prepara um worker criado por fork a partir de um processo com os modelos
+    já carregados: threads e conexões não sobrevivem ao fork e precisam ser
+    recriadas no filho, e os pools de inferência são divididos entre os workers"""
+    if reformulator is not None and reformulator.cache is not None:
+        reformulator.cache.reopen()
+
+    torch = sys.modules.get("torch")
+    if torch is not None and workers > 1:
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+
+    detector = loader.detector
+    if detector is not None and loader.state == "ready":
+        detector.models.warmup_all()
+        # O orçamento de memória não se aplica aos workers: um modelo
+        # descarregado e recarregado vira uma cópia privada do worker, desfazendo
+        # o compartilhamento por copy-on-write dos pesos carregados no pai
+        if detector.models.memory_budget_bytes > 0:
+            print("⚠️ MODEL_MEMORY_BUDGET_MB ignorado com preload (os pesos são compartilhados entre os workers)")
+    print(f"✓ Worker {os.getpid()} pronto")
+
+def measure_worker_memory(analyses: int = 3) -> Dict[str, Any]:
+    """Reproduz o preload do gunicorn: carrega os modelos neste processo, faz
+    fork e, no filho, roda o init_worker e algumas análises avançadas. Retorna
+    a memória do filho lida pelo pai em /proc/<pid>/smaps_rollup; private_mb
+    é o custo incremental de cada worker."""
+    import gc
+    import json
+    from .benchmark import build_article
+    from .model_registry import process_memory_breakdown
+
+    loader = BackgroundModelLoader()
+    loader.load_now(warmup=False)
+    if loader.state != "ready":
+        raise RuntimeError(f"Detector avançado indisponível ({loader.state}: {loader.error})")
+    gc.freeze()
+    parent = process_memory_breakdown()
+
+    ready_read, ready_write = os.pipe()
+    done_read, done_write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 0
+        try:
+            init_worker(loader, workers=2)
+            text = build_article("small")
+            for _ in range(analyses):
+                loader.detector.analyze_text_advanced(text)
+            os.write(ready_write, b"ok")
+        except Exception as e:
+            os.write(ready_write, json.dumps({"error": str(e)}).encode())
+            status = 1
+        # Mantém o processo vivo até o pai ler a memória
+        os.read(done_read, 1)
+        os._exit(status)
+
+    message = os.read(ready_read, 65536)
+    worker = process_memory_breakdown(pid)
+    os.write(done_write, b"1")
+    os.waitpid(pid, 0)
+    if message != b"ok":
+        raise RuntimeError(f"Falha no worker: {json.loads(message)['error']}")
+    return {"parent": parent, "worker": worker, "analyses": analyses}
+
+if __name__ == "__main__":
+    # python -m app.startup                  mede o custo de import de cada módulo do backend
+    # python -m app.startup worker-memory    memória privada de um worker após o fork (preload)
+    if sys.argv[1:2] == ["worker-memory"]:
+        result = measure_worker_memory()
+        worker = result["worker"]
+        print(f"Pai:    rss {result['parent']['rss_mb']} MB")
+        print(f"Worker: rss {worker['rss_mb']} MB, compartilhada {worker['shared_mb']} MB, "
+              f"privada {worker['private_mb']} MB (após {result['analyses']} análises)")
+        if worker["private_mb"] is None:
+            print("⚠️ /proc/<pid>/smaps_rollup indisponível (requer Linux)")
+            sys.exit(1)
+        if worker["private_mb"] > WORKER_PRIVATE_MB_LIMIT:
+            print(f"❌ Memória privada do worker acima de {WORKER_PRIVATE_MB_LIMIT:.0f} MB")
+            sys.exit(1)
+        print(f"✅ Memória privada do worker abaixo de {WORKER_PRIVATE_MB_LIMIT:.0f} MB")
+        sys.exit(0)
+
+    for module, ms in measure_import_times().items():
+        print(f"{module:35s} {ms if ms is not None else 'erro':>10} ms")
@@ -0,0 +1,52 @@
+import re
+from typing import Dict
+
+class SubstitutionEngine:
+    """Substituições de termos em uma única passada sobre o texto.
+
+    Todos os termos da tabela são compilados numa alternação com limites de
+    palavra (termos mais longos primeiro, para que frases vençam palavras
+    isoladas na mesma posição) e a substituição é resolvida por lookup no
+    callback, preservando a capitalização do trecho encontrado.
+    """
+
+    def __init__(self, replacements: Dict[str, str]):
+        # Normaliza as chaves: sem espaços nas bordas e em minúsculas
+        self.replacements = {}
+        for term, replacement in replacements.items():
+            key = term.strip().lower()
+            if key:
+                self.replacements[key] = replacement.strip()
+
+        if self.replacements:
+            alternatives = sorted(self.replacements, key=len, reverse=True)
+            self.pattern = re.compile(
+                r'\b(?:' + '|'.join(re.escape(term) for term in alternatives) + r')\b',
+                re.IGNORECASE
+            )
+        else:
+            self.pattern = None
+
+    def apply(self, text: str) -> str:
+        """Aplica todas as substituições em uma passada"""
+        if self.pattern is None or not text:
+            return text
+        return self.pattern.sub(self._replace, text)
+
+    def _replace(self, match: re.Match) -> str:
+        """Callback de substituição com preservação de capitalização"""
+        found = match.group(0)
+        replacement = self.replacements.get(found.lower())
+        if replacement is None:
+            # Case folding fora do ASCII pode não bater com lower(); mantém o texto
+            return found
+        return self._match_case(found, replacement)
+
+    @staticmethod
+    def _match_case(found: str, replacement: str) -> str:
+        """Copia a capitalização do termo original para a substituição"""
+        if len(found) > 1 and found.isupper():
+            return replacement.upper()
+        if found[:1].isupper():
+            return replacement[:1].upper() + replacement[1:]
+        return replacement
@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import os
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from opentelemetry import context as otel_context, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.trace import Link, Status, StatusCode
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+# Exportador dos spans: none (desligado), console (stdout) ou file (JSON por linha)
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "data/traces.jsonl")
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "bias-detector")
+
+TRACING_ENABLED = OTEL_AVAILABLE and TRACING_EXPORTER in ("console", "file")
+
+def _setup_tracer():
+    """Provider do OpenTelemetry com exportação local (sem coletor). Os spans
+    seguem o modelo do OTel: basta trocar o exportador por OTLP para enviá-los
+    a um coletor."""
+    if TRACING_EXPORTER == "file":
+        directory = os.path.dirname(TRACING_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        exporter = ConsoleSpanExporter(
+            out=open(TRACING_FILE, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    else:
+        exporter = ConsoleSpanExporter()
+    provider = TracerProvider(resource=Resource.create({"service.name": TRACING_SERVICE_NAME}))
+    # Exportação em lote numa thread própria, fora do caminho da requisição
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    print(f"🧭 Tracing habilitado ({TRACING_EXPORTER}{': ' + TRACING_FILE if TRACING_EXPORTER == 'file' else ''})")
+    return trace.get_tracer("app")
+
+_tracer = _setup_tracer() if TRACING_ENABLED else None
+
+def _clean(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    # O OTel aceita apenas str/bool/int/float (e listas deles)
+    return {key: value for key, value in attributes.items() if value is not None}
+
+@contextmanager
+def span(name: str, links=None, **attributes):
+    """Span filho do span atual; None (sem custo) com o tracing desligado"""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, attributes=_clean(attributes), links=links) as current:
+        yield current
+
+def traced(name: str, attributes: Optional[Callable[..., Dict[str, Any]]] = None):
+    """Decorador equivalente a `span` para funções e corrotinas; `attributes`
+    recebe os mesmos argumentos da função e retorna os atributos do span"""
+    def decorator(fn):
+        if not TRACING_ENABLED:
+            return fn
+
+        def start(args, kwargs):
+            return span(name, **(attributes(*args, **kwargs) if attributes else {}))
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with start(args, kwargs):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with start(args, kwargs):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def set_attributes(current, **attributes):
+    if current is not None:
+        current.set_attributes(_clean(attributes))
+
+def current_span():
+    """Span ativo (para acrescentar atributos); None com o tracing desligado"""
+    return trace.get_current_span() if _tracer is not None else None
+
+def current_link():
+    """Referência ao span atual, para ligar a ele o span de um lote executado
+    em outra thread (InferenceBatcher); None com o tracing desligado"""
+    if _tracer is None:
+        return None
+    context = trace.get_current_span().get_span_context()
+    return Link(context) if context.is_valid else None
+
+def start_request_span(name: str, **attributes):
+    """Span raiz de uma requisição HTTP, ativo até `detach`; retorna (span, token)"""
+    current = _tracer.start_span(name, kind=trace.SpanKind.SERVER, attributes=_clean(attributes))
+    token = otel_context.attach(trace.set_span_in_context(current))
+    return current, token
+
+def detach(token):
+    otel_context.detach(token)
+
+def end_request_span(current, status_code: Optional[int] = None, error: Optional[BaseException] = None):
+    if status_code is not None:
+        current.set_attribute("http.status_code", status_code)
+    if error is not None:
+        current.record_exception(error)
+        current.set_status(Status(StatusCode.ERROR, str(error)))
+    elif status_code is not None and status_code >= 500:
+        current.set_status(Status(StatusCode.ERROR))
+    current.end()
+
+def trace_id(current) -> str:
+    return trace.format_trace_id(current.get_span_context().trace_id)
@@ -1,5 +1,5 @@
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 import unicodedata
 
 def normalize_text(text: str) -> str:
@@ -15,31 +15,66 @@ def normalize_text(text: str) -> str:
     
     return text
 
-def split_text_into_chunks(text: str, max_length: int = 1000) -> List[str]:
-    """Divide texto em chunks menores para processamento"""
+def token_windows(length: int, window: int, overlap: int = 0) -> List[Tuple[int, int]]:
+    """Janelas [início, fim) de até `window` unidades (tokens ou caracteres) sobre
+    uma sequência de `length` unidades, com `overlap` unidades repetidas entre
+    janelas vizinhas. Sequências que cabem numa janela geram uma só janela."""
+    if length <= window:
+        return [(0, length)]
+    step = max(1, window - max(0, overlap))
+    windows = []
+    start = 0
+    while True:
+        end = min(start + window, length)
+        windows.append((start, end))
+        if end == length:
+            return windows
+        start += step
+
+def split_text_into_chunk_spans(text: str, max_length: int = 1000) -> List[Tuple[int, int]]:
+    """Posições [início, fim) dos chunks: sentenças inteiras (com a pontuação
+    final) agrupadas até `max_length` caracteres; sentenças maiores que o
+    limite são divididas em janelas"""
     if len(text) <= max_length:
-        return [text]
-    
-    chunks = []
-    sentences = re.split(r'[.!?]+', text)
-    current_chunk = ""
-    
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
+        return [(0, len(text))] if text.strip() else []
+    
+    spans = []
+    chunk_start = chunk_end = None
+    # Pontuação no início do texto (antes da primeira sentença) vira um trecho próprio
+    for match in re.finditer(r'\A[.!?]+|[^.!?]+(?:[.!?]+|$)', text):
+        start, end = match.start(), match.end()
+        # Ignora espaços nas bordas da sentença
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start == end:
             continue
         
-        if len(current_chunk + sentence) <= max_length:
-            current_chunk += sentence + ". "
+        if chunk_start is not None and end - chunk_start <= max_length:
+            chunk_end = end
+            continue
+        if chunk_start is not None:
+            spans.append((chunk_start, chunk_end))
+        
+        if end - start <= max_length:
+            chunk_start, chunk_end = start, end
         else:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = sentence + ". "
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
+            spans.extend((start + a, start + b) for a, b in token_windows(end - start, max_length))
+            chunk_start = chunk_end = None
     
-    return chunks
+    if chunk_start is not None:
+        spans.append((chunk_start, chunk_end))
+    return spans
+
+def split_text_into_chunks(text: str, max_length: int = 1000) -> List[str]:
+    """Divide texto em chunks menores para processamento (texto vazio ou só
+    com espaços não gera chunks)"""
+    if not text.strip():
+        return []
+    if len(text) <= max_length:
+        return [text]
+    return [text[start:end] for start, end in split_text_into_chunk_spans(text, max_length)]
 
 def calculate_text_statistics(text: str) -> Dict[str, Any]:
     """Calcula estatísticas básicas do texto"""
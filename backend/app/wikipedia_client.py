@@ -1,12 +1,22 @@
 import requests
 from typing import Optional, Dict, Any
+import os
 import re
 
+from .metrics import stage, timed
+from . import tracing
+
+# Endereço da Wikipedia (o teste de carga aponta para o servidor de replay local)
+WIKIPEDIA_URL = os.getenv("WIKIPEDIA_URL", "https://pt.wikipedia.org").rstrip("/")
+
 class WikipediaClient:
-    def __init__(self):
-        self.base_url = "https://pt.wikipedia.org/api/rest_v1"
-        self.api_url = "https://pt.wikipedia.org/w/api.php"
+    def __init__(self, url: str = WIKIPEDIA_URL):
+        self.url = url
+        self.base_url = f"{url}/api/rest_v1"
+        self.api_url = f"{url}/w/api.php"
         
+    @timed("wikipedia_search")
+    @tracing.traced("wikipedia.search", lambda self, title: {"title": title})
     def search_article(self, title: str) -> Optional[str]:
         """Busca o título exato do artigo na Wikipedia"""
         params = {
@@ -31,6 +41,7 @@ class WikipediaClient:
             print(f"Erro ao buscar artigo: {e}")
             return None
 
+    @tracing.traced("wikipedia.get_article", lambda self, title: {"title": title})
     def get_article_content(self, title: str) -> Optional[Dict[str, Any]]:
         """Obtém o conteúdo completo do artigo"""
         try:
@@ -44,16 +55,20 @@ class WikipediaClient:
                 'action': 'query',
                 'format': 'json',
                 'titles': correct_title,
-                'prop': 'extracts',
+                'prop': 'extracts|revisions',
+                'rvprop': 'ids',
                 'exintro': False,
                 'explaintext': True,
                 'exsectionformat': 'plain'
             }
             
-            response = requests.get(self.api_url, params=params)
-            response.raise_for_status()
+            with stage("wikipedia_extract"), tracing.span("wikipedia.extract", title=correct_title) as extract_span:
+                response = requests.get(self.api_url, params=params)
+                response.raise_for_status()
+                data = response.json()
+                tracing.set_attributes(extract_span, http_status=response.status_code,
+                                       response_bytes=len(response.content))
             
-            data = response.json()
             pages = data.get('query', {}).get('pages', {})
             
             if not pages:
@@ -67,11 +82,14 @@ class WikipediaClient:
             content = page['extract']
             # Remove referências e limpa o texto
             content = self._clean_content(content)
+            # Revisão atual do artigo (identifica a versão do conteúdo)
+            revisions = page.get('revisions') or [{}]
             
             return {
                 'title': correct_title,
                 'content': content,
-                'url': f"https://pt.wikipedia.org/wiki/{correct_title.replace(' ', '_')}"
+                'url': f"{self.url}/wiki/{correct_title.replace(' ', '_')}",
+                'revision_id': revisions[0].get('revid')
             }
             
         except Exception as e:
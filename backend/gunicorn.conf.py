@@ -0,0 +1,60 @@
+import gc
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Servidor multi-worker: com mais de um worker, o processo pai carrega os
+# modelos uma única vez (preload) e os workers criados por fork compartilham
+# as páginas dos pesos por copy-on-write em vez de carregar cópias próprias.
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+if workers <= 0:
+    workers = multiprocessing.cpu_count()
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+graceful_timeout = 30
+accesslog = "-"
+
+# Com um único worker mantém a inicialização imediata (modelos em background)
+preload_app = workers > 1
+if preload_app:
+    # Carregamento síncrono no pai; o warm-up roda em cada worker, para que os
+    # pools de threads de inferência não sejam criados antes do fork
+    os.environ.setdefault("MODEL_LOADING", "preload")
+
+if workers > 1:
+    # Métricas do Prometheus somadas entre os workers (arquivos mmap por
+    # processo); o diretório precisa existir antes de importar o app
+    metrics_dir = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "bias-detector-metrics")
+    )
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+    # Continuações, análises para expandir e conteúdos de artigos em SQLite:
+    # a requisição seguinte pode cair em outro worker
+    shared_store_path = os.environ.setdefault(
+        "SHARED_STORE_PATH", os.path.join(tempfile.gettempdir(), "bias-detector-shared.sqlite3")
+    )
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(shared_store_path + suffix):
+            os.remove(shared_store_path + suffix)
+
+def pre_fork(server, worker):
+    # Move os objetos já carregados para a geração permanente: o coletor do
+    # worker não os percorre e não suja as páginas compartilhadas
+    gc.freeze()
+
+def post_worker_init(worker):
+    if not preload_app:
+        return
+    from app.main import advanced_model_loader, text_reformulator
+    from app.startup import init_worker
+
+    init_worker(advanced_model_loader, text_reformulator, workers)
+
+def child_exit(server, worker):
+    from app.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
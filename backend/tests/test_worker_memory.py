@@ -0,0 +1,64 @@
+"""Custo incremental de um worker criado por fork (copy-on-write).
+
+Reproduz o preload do gunicorn com um array grande no lugar dos modelos: o
+filho só lendo o array não deve ter memória privada proporcional a ele, e
+escrevendo nele deve passar a ter."""
+import gc
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from app.model_registry import process_memory_breakdown
+
+ARRAY_MB = 64
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux") or not os.path.exists("/proc/self/smaps_rollup"),
+    reason="requer /proc/<pid>/smaps_rollup (Linux)",
+)
+
+def _fork_and_measure(weights: np.ndarray):
+    """Faz fork; o filho lê os pesos (medida 1), escreve neles (medida 2) e
+    sai. Retorna as duas medidas do filho feitas pelo pai"""
+    to_child_r, to_child_w = os.pipe()
+    to_parent_r, to_parent_w = os.pipe()
+    gc.freeze()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(to_child_w)
+            os.close(to_parent_r)
+            float(weights.sum())
+            os.write(to_parent_w, b"r")
+            os.read(to_child_r, 1)
+            weights += 1.0
+            os.write(to_parent_w, b"w")
+            os.read(to_child_r, 1)
+        finally:
+            os._exit(0)
+    gc.unfreeze()
+    os.close(to_child_r)
+    os.close(to_parent_w)
+    try:
+        os.read(to_parent_r, 1)
+        reading = process_memory_breakdown(pid)
+        os.write(to_child_w, b"c")
+        os.read(to_parent_r, 1)
+        writing = process_memory_breakdown(pid)
+        os.write(to_child_w, b"c")
+    finally:
+        os.waitpid(pid, 0)
+        os.close(to_child_w)
+        os.close(to_parent_r)
+    return reading, writing
+
+def test_forked_worker_shares_weights_until_written():
+    weights = np.ones(ARRAY_MB * 1024 * 1024 // 8)
+    reading, writing = _fork_and_measure(weights)
+
+    assert reading["shared_mb"] >= ARRAY_MB * 0.9
+    assert reading["private_mb"] < ARRAY_MB / 2
+    # Escrever nas páginas cria cópias privadas no filho
+    assert writing["private_mb"] - reading["private_mb"] >= ARRAY_MB * 0.9
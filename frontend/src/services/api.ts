@@ -80,6 +80,53 @@ export const analyzeArticleDetailed = async (title: string, useAdvanced: boolean
   return response.data;
 };
 
+// Streaming (Server-Sent Events): reformulações e resumo chegam token a token
+export const analyzeArticleStream = async (
+  title: string,
+  onEvent: (event: string, data: any) => void,
+  useAdvanced: boolean = true,
+  signal?: AbortSignal
+): Promise<void> => {
+  const request: AnalyzeRequest = {
+    titulo_artigo: title,
+    usar_detector_avancado: useAdvanced
+  };
+  const response = await fetch(`${api.defaults.baseURL}/analyze/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify(request),
+    signal,
+  });
+
+  if (!response.ok || !response.body) {
+    const error = await response.json().catch(() => ({}));
+    throw new Error(error.detail || 'Erro ao iniciar análise em streaming.');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Eventos SSE são separados por linha em branco
+    let separator = buffer.indexOf('\n\n');
+    while (separator !== -1) {
+      const rawEvent = buffer.slice(0, separator);
+      buffer = buffer.slice(separator + 2);
+      const eventName = rawEvent.match(/^event: (.*)$/m)?.[1] ?? 'message';
+      const data = rawEvent.match(/^data: (.*)$/m)?.[1];
+      if (data !== undefined) {
+        onEvent(eventName, JSON.parse(data));
+      }
+      separator = buffer.indexOf('\n\n');
+    }
+  }
+};
+
 // Test endpoints
 export const testWikipedia = async (title: string) => {
   const response = await api.get(`/test-wikipedia/${encodeURIComponent(title)}`);
@@ -12,16 +12,43 @@ export interface BiasAnalysis {
   complexidade_sintatica?: number;
   nivel_certeza?: number;
   score_formalidade?: number;
+  // true quando a reformulação é provisória (orçamento de latência esgotado)
+  reformulacao_provisoria?: boolean;
+}
+
+export type DetectorMode = 'basico' | 'avancado' | 'rapido' | 'cascata' | 'auto';
+
+// full: conteúdo completo; slim: hash + revisão (GET /article-content/{hash});
+// highlights-only: só os trechos sinalizados com contexto
+export type ResponseProfile = 'full' | 'slim' | 'highlights-only';
+
+export interface Highlight {
+  posicao_inicio: number;
+  posicao_fim: number;
+  contexto_antes: string;
+  trecho: string;
+  contexto_depois: string;
 }
 
 export interface AnalyzeRequest {
   titulo_artigo: string;
   usar_detector_avancado?: boolean;
+  // Tem precedência sobre usar_detector_avancado quando informado
+  modo_detector?: DetectorMode;
+  orcamento_reformulacao_ms?: number;
+  // Prazo da detecção avançada: o restante é buscado com o token de continuação
+  deadline_ms?: number;
+  perfil_resposta?: ResponseProfile;
 }
 
 export interface AnalyzeResponse {
   titulo: string;
-  conteudo_original: string;
+  // Ausente nos perfis slim e highlights-only
+  conteudo_original?: string;
+  hash_conteudo?: string;
+  revisao_id?: number;
+  perfil_resposta?: ResponseProfile;
+  destaques?: Highlight[];
   url_wikipedia: string;
   analises_vies: BiasAnalysis[];
   resumo_geral: string;
@@ -32,18 +59,41 @@ export interface AnalyzeResponse {
   score_emocional_geral?: number;
   score_complexidade_geral?: number;
   distribuicao_tipos_vies?: Record<string, number>;
+  // Detector que efetivamente rodou e, no modo auto, o motivo da escolha
+  modo_detector?: DetectorMode;
+  motivo_modo_detector?: string;
+  // Com deadline_ms: resultado parcial e token para GET /analyze/continuation/{token}
+  analise_parcial?: boolean;
+  token_continuacao?: string;
+  trechos_pendentes?: number;
+}
+
+export interface ContinuationResponse {
+  token_continuacao: string;
+  concluida: boolean;
+  trechos_processados: number;
+  trechos_pendentes: number;
+  analises_vies: BiasAnalysis[];
+  proximo_indice: number;
+  erro?: string;
 }
 
 // New types for detailed analysis
 export interface AnalysisRequest {
   title: string;
   use_advanced?: boolean;
+  reformulation_budget_ms?: number;
+  response_profile?: ResponseProfile;
 }
 
 export interface AnalysisResult {
   article_title: string;
   article_url: string;
-  article_content: string;
+  // Ausente nos perfis slim e highlights-only
+  article_content?: string;
+  content_hash?: string;
+  revision_id?: number;
+  highlights?: Highlight[];
   ai_related: boolean;
   bias_detected: boolean;
   overall_bias_score: number;